@@ -1,16 +1,8 @@
 """
 ASGI config for TailoRent project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+Kept for servers still pointed at ``TailoRent.asgi``; the application
+lives in config.asgi.
 """
 
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TailoRent.settings')
-
-application = get_asgi_application()
+from config.asgi import application  # noqa: F401
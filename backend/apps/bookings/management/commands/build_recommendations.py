@@ -0,0 +1,23 @@
+"""
+Rebuild "Professionals you may like" lists from the booking graph.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = "Precompute top-N professional recommendations for every customer and professional."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = build_recommendations()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {written} recommendation lists in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,248 @@
+"""
+"Professionals you may like" recommendations from booking co-occurrence.
+
+The nightly build turns the (customer, professional) booking graph into a
+sparse matrix, derives cosine item-item similarity between professionals
+and precomputes the top-N list for every professional and customer. Pages
+then read a single ProfessionalRecommendation row.
+
+Memory stays bounded for ~10M bookings: pairs are streamed into int32
+arrays (8 bytes per booking), similarity is computed a block of
+professionals at a time and each professional keeps only its
+RECOMMENDATIONS_NEIGHBOURS most similar active professionals, so a
+customer's scores touch at most that many entries per booked professional,
+however popular they are. Customer scores are computed in blocks of rows.
+Rows not rewritten by a build (users with no bookings left) are deleted.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.profiles.models import User
+from config.db.bulk import bulk_upsert
+
+from .models import Booking, ProfessionalRecommendation
+
+PROFESSIONAL_ROLES = ["Tailor", "Fashion_Designer"]
+POPULAR_CACHE_KEY = "recommendations:popular"
+FETCH_CHUNK_SIZE = 100000
+CUSTOMER_BLOCK_SIZE = 5000
+PROFESSIONAL_BLOCK_SIZE = 500
+WRITE_BATCH_SIZE = 2000
+
+
+def top_n():
+    return getattr(settings, "RECOMMENDATIONS_TOP_N", 10)
+
+
+def neighbours():
+    return getattr(settings, "RECOMMENDATIONS_NEIGHBOURS", 50)
+
+
+def _booking_pairs():
+    """Stream every (customer_id, professional_id) booking pair into int32 arrays."""
+    import numpy as np
+
+    customers, professionals = [], []
+    last_id = 0
+    while True:
+        rows = list(
+            Booking.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "customer_id", "professional_id")[:FETCH_CHUNK_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        chunk = np.array(rows, dtype=np.int64)
+        customers.append(chunk[:, 1].astype(np.int32))
+        professionals.append(chunk[:, 2].astype(np.int32))
+
+    if not customers:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    return np.concatenate(customers), np.concatenate(professionals)
+
+
+def _top_indices(row_values, row_columns, n, exclude=()):
+    import numpy as np
+
+    if exclude:
+        keep = ~np.isin(row_columns, list(exclude))
+        row_values, row_columns = row_values[keep], row_columns[keep]
+    if len(row_values) > n:
+        picked = np.argpartition(-row_values, n)[:n]
+        row_values, row_columns = row_values[picked], row_columns[picked]
+    order = np.argsort(-row_values, kind="stable")
+    return row_columns[order]
+
+
+def _pruned_similarity(bookings, keep, k):
+    """
+    Cosine similarity between the professionals (columns) of the binary
+    ``bookings`` matrix, keeping each row's ``k`` largest entries among the
+    columns where ``keep`` is true. Rows are computed a block at a time, so
+    at most PROFESSIONAL_BLOCK_SIZE unpruned rows exist at once.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    count = bookings.shape[1]
+    columns = bookings.tocsc()
+    # Binary columns: each professional's norm is sqrt(its customer count).
+    norms = np.sqrt(np.asarray(bookings.sum(axis=0), dtype=np.float64).ravel())
+    norms[norms == 0] = 1.0
+    inverse = (1.0 / norms).astype(np.float32)
+
+    data, indices, lengths = [], [], []
+    for start in range(0, count, PROFESSIONAL_BLOCK_SIZE):
+        stop = min(start + PROFESSIONAL_BLOCK_SIZE, count)
+        block = (columns[:, start:stop].T @ bookings).tocsr()
+        for offset in range(stop - start):
+            row = start + offset
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            cols = block.indices[begin:end]
+            values = block.data[begin:end] * inverse[row] * inverse[cols]
+            mask = keep[cols] & (cols != row)
+            values, cols = values[mask], cols[mask]
+            if len(values) > k:
+                picked = np.argpartition(-values, k)[:k]
+                values, cols = values[picked], cols[picked]
+            data.append(values)
+            indices.append(cols)
+            lengths.append(len(values))
+        del block
+
+    indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    return sparse.csr_matrix(
+        (
+            np.concatenate(data).astype(np.float32),
+            np.concatenate(indices).astype(np.int32),
+            indptr,
+        ),
+        shape=(count, count),
+    )
+
+
+def build_recommendations():
+    """Recompute every stored recommendation list. Returns the number of rows written."""
+    import numpy as np
+    from scipy import sparse
+
+    n = top_n()
+    started = timezone.now()
+    active = set(
+        User.objects.filter(role__in=PROFESSIONAL_ROLES, is_active=True).values_list(
+            "id", flat=True
+        )
+    )
+    customer_ids, professional_ids = _booking_pairs()
+    if not len(customer_ids):
+        ProfessionalRecommendation.objects.all().delete()
+        refresh_popular()
+        return 0
+
+    customers, customer_index = np.unique(customer_ids, return_inverse=True)
+    professionals, professional_index = np.unique(professional_ids, return_inverse=True)
+    del customer_ids, professional_ids
+
+    # Binary customer x professional matrix: repeat bookings count once.
+    bookings = sparse.csr_matrix(
+        (np.ones(len(customer_index), dtype=np.float32), (customer_index, professional_index)),
+        shape=(len(customers), len(professionals)),
+    )
+    bookings.sum_duplicates()
+    bookings.data[:] = 1.0
+    del customer_index, professional_index
+
+    keep = np.array([user_id in active for user_id in professionals], dtype=bool)
+    similarity = _pruned_similarity(bookings, keep, neighbours())
+    rows = []
+
+    for row, user_id in enumerate(professionals):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        picked = _top_indices(similarity.data[start:end], similarity.indices[start:end], n)
+        rows.append(
+            ProfessionalRecommendation(
+                user_id=int(user_id),
+                professional_ids=[int(professionals[c]) for c in picked],
+            )
+        )
+    written = _write(rows)
+
+    for block_start in range(0, len(customers), CUSTOMER_BLOCK_SIZE):
+        block = bookings[block_start : block_start + CUSTOMER_BLOCK_SIZE]
+        scores = (block @ similarity).tocsr()
+        rows = []
+        for offset in range(block.shape[0]):
+            booked = set(block.indices[block.indptr[offset] : block.indptr[offset + 1]])
+            start, end = scores.indptr[offset], scores.indptr[offset + 1]
+            picked = _top_indices(
+                scores.data[start:end], scores.indices[start:end], n, booked
+            )
+            rows.append(
+                ProfessionalRecommendation(
+                    user_id=int(customers[block_start + offset]),
+                    professional_ids=[int(professionals[c]) for c in picked],
+                )
+            )
+        written += _write(rows)
+
+    # Every current row was rewritten above; older ones belong to users
+    # whose bookings are gone.
+    ProfessionalRecommendation.objects.filter(computed_at__lt=started).delete()
+    refresh_popular()
+    return written
+
+
+def _write(rows):
+    bulk_upsert(
+        ProfessionalRecommendation,
+        rows,
+        unique_fields=["user"],
+        update_fields=["professional_ids", "computed_at"],
+        batch_size=WRITE_BATCH_SIZE,
+    )
+    return len(rows)
+
+
+def refresh_popular():
+    """Cache the most-booked professionals as the cold-start fallback."""
+    popular = (
+        Booking.objects.filter(
+            professional__role__in=PROFESSIONAL_ROLES, professional__is_active=True
+        )
+        .values("professional")
+        .annotate(customers=Count("customer", distinct=True))
+        .order_by("-customers")
+        .values_list("professional", flat=True)[: top_n()]
+    )
+    popular = list(popular)
+    cache.set(POPULAR_CACHE_KEY, popular, None)
+    return popular
+
+
+def recommended_professionals(user, limit=5):
+    """Return up to ``limit`` professionals for ``user`` from the precomputed list."""
+    ids = (
+        ProfessionalRecommendation.objects.filter(user=user)
+        .values_list("professional_ids", flat=True)
+        .first()
+    )
+    if not ids:
+        ids = cache.get(POPULAR_CACHE_KEY)
+        if ids is None:
+            ids = refresh_popular()
+    ids = [pk for pk in ids if pk != user.pk][:limit]
+    if not ids:
+        return list(
+            User.objects.filter(role__in=PROFESSIONAL_ROLES, is_active=True).exclude(
+                id=user.pk
+            )[:limit]
+        )
+
+    professionals = User.objects.filter(
+        id__in=ids, role__in=PROFESSIONAL_ROLES, is_active=True
+    ).in_bulk()
+    return [professionals[pk] for pk in ids if pk in professionals]
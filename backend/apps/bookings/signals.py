@@ -0,0 +1,18 @@
+"""
+Signal handlers for bookings models.
+"""
+
+from config.cache import tag, track_model
+
+from .models import Booking
+
+
+def booking_cache_tags(booking):
+    """Tags of cached data that depends on this booking's customer and professional."""
+    return [
+        tag("bookings", "customer", booking.customer_id),
+        tag("bookings", "professional", booking.professional_id),
+    ]
+
+
+track_model(Booking, booking_cache_tags)
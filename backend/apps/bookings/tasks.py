@@ -0,0 +1,55 @@
+"""
+Celery tasks for bookings app.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def build_professional_recommendations():
+    """Nightly rebuild of the "Professionals you may like" lists."""
+    from .recommendations import build_recommendations
+
+    written = build_recommendations()
+    logger.info("Stored %s professional recommendation lists", written)
+    return written
+
+
+@shared_task(expires=60 * 60)  # the next hourly run covers the next window
+def send_booking_reminders():
+    """
+    SMS customers whose accepted booking starts in 24 to 25 hours. Run hourly,
+    every booking falls in exactly one window.
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from apps.profiles.sms import get_gateway
+    from .models import Booking
+
+    start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=24)
+    bookings = (
+        Booking.objects.filter(
+            status="accepted",
+            date__gte=start,
+            date__lt=start + timedelta(hours=1),
+            customer__phone_number__isnull=False,
+        )
+        .exclude(customer__phone_number="")
+        .values_list("customer__phone_number", "service_type", "date")
+    )
+    messages = [
+        (
+            phone_number,
+            f"Reminder: your TailoRent {service_type} booking is on "
+            f"{timezone.localtime(date):%a %d %b at %H:%M}.",
+        )
+        for phone_number, service_type, date in bookings
+    ]
+    results = get_gateway().send_many(messages)
+    sent = sum(result.sent for result in results)
+    logger.info("Sent %s of %s booking reminders", sent, len(results))
+    return sent
@@ -2,6 +2,7 @@
 from django.urls import path
 from .views import (
     BookingListCreateView,
+    BookingExportView,
     ProfessionalBookingsView,
     BookingDetailView,
     UpdateBookingStatusView,
@@ -12,6 +13,7 @@ from .views import (
 urlpatterns = [
     path('', BookingListCreateView.as_view(), name='customer-bookings'),
     path('<int:pk>/', BookingDetailView.as_view(), name='booking-detail'),
+    path('export/', BookingExportView.as_view(), name='booking-export'),
     path('professional/', ProfessionalBookingsView.as_view(), name='professional-bookings'),
     path('<int:pk>/update-status/', UpdateBookingStatusView.as_view(), name='update-booking-status'), 
     path('dashboard/', ProfessionalDashboardView.as_view(), name='professional-dashboard'),
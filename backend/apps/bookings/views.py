@@ -8,6 +8,25 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from .forms import BookingForm
 from profiles.models import User
+from django.db import transaction
+from django.db.models import Count, Q
+from apps.profiles.models import Notification
+from apps.profiles.notifications import notify
+from config.cache import TieredCache, tag
+from config.renderers import StreamingListMixin
+
+dashboard_cache = TieredCache("bookings:dashboard", timeout=300)
+
+
+def booking_status_counts(bookings):
+    """Total and per-status booking counts in a single aggregate query."""
+    return bookings.aggregate(
+        total=Count('id'),
+        **{
+            status_value: Count('id', filter=Q(status=status_value))
+            for status_value, _ in Booking.STATUS_CHOICES
+        }
+    )
 
 class BookingListCreateView(generics.ListCreateAPIView):
     """
@@ -22,6 +41,17 @@ class BookingListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user)
 
+class BookingExportView(StreamingListMixin, generics.ListAPIView):
+    """
+    Streams every booking the user is part of, as customer or professional.
+    """
+    serializer_class = BookingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        return Booking.objects.filter(Q(customer=user) | Q(professional=user)).order_by('id')
+
 class ProfessionalBookingsView(generics.ListAPIView):
     """
     Allows a tailor or fashion designer to view all bookings made to them.
@@ -51,7 +81,14 @@ class UpdateBookingStatusView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Booking.objects.filter(provider=self.request.user)
+        return Booking.objects.filter(professional=self.request.user)
+
+    def perform_update(self, serializer):
+        was_accepted = serializer.instance.status == "accepted"
+        with transaction.atomic():
+            booking = serializer.save()
+            if booking.status == "accepted" and not was_accepted:
+                notify(booking.customer_id, Notification.BOOKING_CONFIRMED, booking=booking)
     
 class ProfessionalDashboardView(views.APIView):
     """
@@ -63,19 +100,23 @@ class ProfessionalDashboardView(views.APIView):
         user = request.user
 
         # Only allow for professionals
-        if user.role not in ['tailor', 'fashion_designer']:
+        if user.role not in ['Tailor', 'Fashion_Designer']:
             return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
 
-        bookings = Booking.objects.filter(provider=user)
+        counts = dashboard_cache.get_or_set(
+            f"professional:{user.id}",
+            lambda: booking_status_counts(Booking.objects.filter(professional=user)),
+            tags=[tag("bookings", "professional", user.id)],
+        )
         data = {
             "id": user.id,
             "email": user.email,
             "full_name": f"{user.first_name} {user.last_name}",
             "role": user.role,
-            "total_bookings": bookings.count(),
-            "accepted_bookings": bookings.filter(status='accepted').count(),
-            "rejected_bookings": bookings.filter(status='rejected').count(),
-            "pending_bookings": bookings.filter(status='pending').count(),
+            "total_bookings": counts["total"],
+            "accepted_bookings": counts["accepted"],
+            "rejected_bookings": counts["rejected"],
+            "pending_bookings": counts["pending"],
         }
 
         return Response(data, status=status.HTTP_200_OK)
@@ -90,19 +131,20 @@ class CustomerDashboardView(APIView):
         user = request.user
 
         # Confirm user is a customer
-        if user.role != 'customer':
+        if user.role != 'Customer':
             return Response({"detail": "You are not authorized to access this dashboard."}, status=403)
 
-        total_bookings = Booking.objects.filter(customer=user).count()
-        pending = Booking.objects.filter(customer=user, status='pending').count()
-        accepted = Booking.objects.filter(customer=user, status='accepted').count()
-        rejected = Booking.objects.filter(customer=user, status='rejected').count()
+        counts = dashboard_cache.get_or_set(
+            f"customer:{user.id}",
+            lambda: booking_status_counts(Booking.objects.filter(customer=user)),
+            tags=[tag("bookings", "customer", user.id)],
+        )
 
         return Response({
-            "total_bookings": total_bookings,
-            "pending": pending,
-            "accepted": accepted,
-            "rejected": rejected,
+            "total_bookings": counts["total"],
+            "pending": counts["pending"],
+            "accepted": counts["accepted"],
+            "rejected": counts["rejected"],
         })
     
 @login_required
@@ -1,4 +1,20 @@
 from django.contrib import admin
+from config.admin import LargeTableAdminMixin
 from .models import NewsfeedPost
+from .tasks import delete_newsfeed_posts
 
-admin.site.register(NewsfeedPost)
\ No newline at end of file
+
+@admin.register(NewsfeedPost)
+class NewsfeedPostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'created_at')
+    list_select_related = ('user',)
+    # Full-text on MySQL (see config.db.lookups); authors by email prefix.
+    search_fields = ('@content', '^user__email')
+    # Follows the (created_at, id) index.
+    ordering = ('-created_at', '-id')
+    raw_id_fields = ('user',)
+    actions = ('delete_in_background',)
+
+    @admin.action(description='Delete selected posts in the background', permissions=['delete'])
+    def delete_in_background(self, request, queryset):
+        self.queue_action(request, queryset, delete_newsfeed_posts, 'deleted')
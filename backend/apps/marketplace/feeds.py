@@ -0,0 +1,55 @@
+"""
+Newsfeed service shared by the JSON API and the server-rendered pages.
+
+Pages are fetched with keyset pagination on ``(created_at, id)`` instead of
+COUNT + OFFSET, so reading page N costs the same as reading page 1. The
+server-rendered page caches each post's HTML with ``{% cachefragment %}``,
+tagged with the post and its author, so editing either re-renders it.
+"""
+
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import NewsfeedPost
+
+NEWSFEED_PAGE_SIZE = 10
+NEWSFEED_MAX_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+FeedPage = namedtuple("FeedPage", ["posts", "next_cursor"])
+
+
+def encode_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor("Invalid cursor.") from exc
+
+
+def newsfeed_page(cursor=None, limit=NEWSFEED_PAGE_SIZE):
+    """Return one page of posts, newest first, with authors already loaded."""
+    limit = max(1, min(int(limit), NEWSFEED_MAX_PAGE_SIZE))
+    posts = NewsfeedPost.objects.select_related("user").order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        posts = posts.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = list(posts[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return FeedPage(posts=rows[:limit], next_cursor=next_cursor)
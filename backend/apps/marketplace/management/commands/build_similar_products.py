@@ -0,0 +1,90 @@
+"""
+Rebuild the similar-products index, or benchmark it on a synthetic catalog.
+"""
+
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.marketplace import similarity
+
+FABRIC_WORDS = (
+    "ankara aso oke adire lace george cotton silk chiffon velvet damask brocade "
+    "linen wool denim satin organza tulle kente batik voile jacquard crepe "
+    "chambray poplin gabardine tweed cashmere mohair sequin embroidered printed "
+    "plain striped floral geometric wax holland hitarget vlisco swiss voile "
+    "blue red green gold purple black white cream burgundy emerald royal navy"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Vectorize products and precompute top-K similar products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="N",
+            help="Run the pipeline on N synthetic products without touching the database.",
+        )
+        parser.add_argument(
+            "--benchmark-rows",
+            type=int,
+            default=20000,
+            help="Rows to compute neighbours for in benchmark mode; the total is extrapolated.",
+        )
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.benchmark(options["benchmark"], options["benchmark_rows"])
+
+        started = time.perf_counter()
+        indexed = similarity.build_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} products in {time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    def benchmark(self, size, sample_rows):
+        import numpy as np
+
+        rng = np.random.default_rng(42)
+        vocabulary = FABRIC_WORDS + [f"sku{i}" for i in range(50000)]
+        # Zipf-distributed word choice gives a realistic long tail of rare terms.
+        ranks = np.minimum(rng.zipf(1.3, size=size * 12), len(vocabulary)) - 1
+        texts = [
+            " ".join(vocabulary[rank] for rank in ranks[i * 12 : (i + 1) * 12])
+            for i in range(size)
+        ]
+        ids = np.arange(1, size + 1, dtype=np.int64)
+
+        timings = {}
+        started = time.perf_counter()
+        counts = similarity.hashed_counts(texts)
+        timings["vectorize"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matrix = similarity.weigh(counts, similarity.fit_idf(counts))
+        timings["tfidf"] = time.perf_counter() - started
+        del counts, texts
+
+        sample_rows = min(sample_rows, size)
+        started = time.perf_counter()
+        for _ in similarity.blocked_neighbors(
+            matrix, ids, similarity.top_k(), stop=sample_rows
+        ):
+            pass
+        elapsed = time.perf_counter() - started
+        timings["neighbors (sampled)"] = elapsed
+        timings["neighbors (extrapolated)"] = elapsed * size / sample_rows
+
+        for stage, seconds in timings.items():
+            self.stdout.write(f"{stage:>26}: {seconds:8.2f}s")
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{size} products, {matrix.nnz} non-zeros, peak RSS {peak_mb:.0f} MB."
+            )
+        )
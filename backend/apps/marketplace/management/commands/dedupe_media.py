@@ -0,0 +1,118 @@
+"""
+Move existing uploads into content-addressed storage.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.marketplace.models import MediaBlob
+from apps.marketplace.signals import MEDIA_FIELDS
+from apps.marketplace.storage import CAS_PREFIX, ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite legacy product, style feed, newsfeed and profile pictures to "
+        "content-addressed names, deduplicating identical files and reporting the "
+        "bytes reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Hash files and report savings without touching storage.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        totals = {"files": 0, "duplicates": 0, "reclaimed": 0, "missing": 0}
+        seen_digests = set()
+        # Legacy name -> content-addressed name, and the storage holding the
+        # legacy file. Rows can share a file name, so files are only deleted
+        # once every row has moved off them.
+        migrated = {}
+        legacy_files = {}
+
+        for model, field_name in MEDIA_FIELDS:
+            storage = model._meta.get_field(field_name).storage
+            if not isinstance(storage, ContentAddressedStorage):
+                self.stderr.write(
+                    f"{model.__name__}.{field_name} does not use ContentAddressedStorage; "
+                    "skipping."
+                )
+                continue
+
+            legacy = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{f"{field_name}__startswith": CAS_PREFIX})
+                .order_by("pk")
+            )
+            last_pk = 0
+            while True:
+                batch = list(
+                    legacy.filter(pk__gt=last_pk).values_list("pk", field_name)[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+
+                for pk, name in batch:
+                    if name in migrated:
+                        if not dry_run:
+                            # Another row already moved this file; this one
+                            # takes its own reference on the blob.
+                            with transaction.atomic():
+                                MediaBlob.objects.filter(name=migrated[name]).update(
+                                    refcount=F("refcount") + 1
+                                )
+                                model.objects.filter(pk=pk).update(
+                                    **{field_name: migrated[name]}
+                                )
+                        continue
+                    if not storage.backend.exists(name):
+                        totals["missing"] += 1
+                        continue
+
+                    with storage.backend.open(name) as content:
+                        digest, size = storage.digest(content)
+                        duplicate = (
+                            digest in seen_digests
+                            or MediaBlob.objects.filter(digest=digest).exists()
+                        )
+                        seen_digests.add(digest)
+                        new_name = None if dry_run else storage.save(name, content)
+                    migrated[name] = new_name
+                    legacy_files[name] = storage
+
+                    totals["files"] += 1
+                    if duplicate:
+                        totals["duplicates"] += 1
+                        totals["reclaimed"] += size
+                    if dry_run:
+                        continue
+
+                    model.objects.filter(pk=pk).update(**{field_name: new_name})
+
+                self.stdout.write(
+                    f"{model.__name__}: processed up to pk={last_pk} "
+                    f"({totals['files']} files so far)"
+                )
+
+        if not dry_run:
+            for name, storage in legacy_files.items():
+                storage.backend.delete(name)
+
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{totals['files']} files migrated, "
+                f"{totals['duplicates']} duplicates, "
+                f"{totals['reclaimed']} bytes reclaimed, "
+                f"{totals['missing']} missing."
+            )
+        )
@@ -0,0 +1,110 @@
+"""
+Recompute every trending score from the full engagement log.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.marketplace.models import EngagementEvent, TrendingCheckpoint, TrendingScore
+from apps.marketplace.trending import (
+    CHECKPOINT_NAME,
+    EPOCH,
+    EVENT_WEIGHTS,
+    decay_rate,
+    event_lag,
+    refresh_top_k,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild TrendingScore from the EngagementEvent log using NumPy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200000)
+
+    def handle(self, *args, **options):
+        import numpy as np
+
+        chunk_size = options["chunk_size"]
+        kinds = list(EVENT_WEIGHTS)
+        log_weights = np.log(np.array([EVENT_WEIGHTS[kind] for kind in kinds]))
+        rate = decay_rate()
+        epoch = EPOCH.timestamp()
+
+        # Collect (object_id, log contribution) columns per category chunk by chunk
+        # so only compact arrays, never model instances, are held in memory.
+        columns = {"style": ([], []), "service": ([], [])}
+        last_id = 0
+        total = 0
+        # Like apply_new_events, leave recent events for the incremental run.
+        cutoff = timezone.now() - timedelta(seconds=event_lag())
+        more = True
+        while more:
+            rows = list(
+                EngagementEvent.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "kind", "style_post_id", "service_id", "created_at")[
+                    :chunk_size
+                ]
+            )
+            for position, row in enumerate(rows):
+                if row[4] >= cutoff:
+                    rows, more = rows[:position], False
+                    break
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            total += len(rows)
+
+            kind_codes = np.array([kinds.index(row[1]) for row in rows], dtype=np.int8)
+            seconds = np.array([row[4].timestamp() for row in rows]) - epoch
+            contributions = log_weights[kind_codes] + rate * seconds
+
+            for category, column in (("style", 2), ("service", 3)):
+                ids = np.array(
+                    [row[column] if row[column] is not None else -1 for row in rows],
+                    dtype=np.int64,
+                )
+                mask = ids >= 0
+                columns[category][0].append(ids[mask])
+                columns[category][1].append(contributions[mask])
+
+        scores = []
+        for category, (id_chunks, value_chunks) in columns.items():
+            if not id_chunks:
+                continue
+            ids = np.concatenate(id_chunks)
+            values = np.concatenate(value_chunks)
+            if not len(ids):
+                continue
+
+            # Grouped log-sum-exp: subtract each group's max before exponentiating.
+            unique_ids, groups = np.unique(ids, return_inverse=True)
+            group_max = np.full(len(unique_ids), -np.inf)
+            np.maximum.at(group_max, groups, values)
+            sums = np.bincount(
+                groups, weights=np.exp(values - group_max[groups]), minlength=len(unique_ids)
+            )
+            log_scores = group_max + np.log(sums)
+
+            scores.extend(
+                TrendingScore(category=category, object_id=int(oid), log_score=float(score))
+                for oid, score in zip(unique_ids, log_scores)
+            )
+
+        with transaction.atomic():
+            TrendingScore.objects.all().delete()
+            TrendingScore.objects.bulk_create(scores, batch_size=5000)
+            TrendingCheckpoint.objects.update_or_create(
+                name=CHECKPOINT_NAME, defaults={"last_event_id": last_id}
+            )
+        refresh_top_k()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(scores)} trending scores from {total} events."
+            )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0003_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsfeedpost',
+            index=models.Index(fields=['-created_at', '-id'], name='newsfeed_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0006_engagement_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarProducts',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similar', serialize=False, to='marketplace.product')),
+                ('neighbors', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEX_NAME = 'newsfeed_content_ft'
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Only MySQL has FULLTEXT; elsewhere content__search falls back to icontains.
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('marketplace', 'NewsfeedPost')._meta.db_table
+    schema_editor.execute(
+        f'CREATE FULLTEXT INDEX {schema_editor.quote_name(INDEX_NAME)} '
+        f'ON {schema_editor.quote_name(table)} ({schema_editor.quote_name("content")})'
+    )
+
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = apps.get_model('marketplace', 'NewsfeedPost')._meta.db_table
+    schema_editor.execute(
+        f'DROP INDEX {schema_editor.quote_name(INDEX_NAME)} ON {schema_editor.quote_name(table)}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0007_similarproducts'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+    ]
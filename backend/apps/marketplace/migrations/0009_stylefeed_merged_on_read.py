@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0008_newsfeedpost_content_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stylefeed',
+            name='merged_on_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='stylefeed',
+            index=models.Index(fields=['merged_on_read', 'user'], name='stylefeed_merged_user_idx'),
+        ),
+    ]
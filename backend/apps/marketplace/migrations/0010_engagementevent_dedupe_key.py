@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0009_stylefeed_merged_on_read'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='engagementevent',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
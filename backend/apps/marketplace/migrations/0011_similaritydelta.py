@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0010_engagementevent_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityDelta',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity_delta', serialize=False, to='marketplace.product')),
+                ('vector', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from config.db.lookups import FullTextSearch
+
 class Product(models.Model):
     """Product listed by a Vendor"""
     vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='products')
@@ -13,6 +15,24 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} by {self.vendor}"
 
+class SimilarProducts(models.Model):
+    """Precomputed top-K most similar products, as [[product_id, score], ...]"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='similar')
+    neighbors = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Similar products for #{self.product_id}"
+
+class SimilarityDelta(models.Model):
+    """TF-IDF row of a product indexed since the last full similarity build, as [[feature, weight], ...]"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='similarity_delta')
+    vector = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Similarity delta for #{self.product_id}"
+
 class Service(models.Model):
     """Service listed by Tailor or Fashion Designer"""
     provider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='services')
@@ -30,15 +50,114 @@ class StyleFeed(models.Model):
     image = models.ImageField(upload_to='stylefeed/')
     caption = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Written while the author was a celebrity: not fanned out, merged on read.
+    merged_on_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['merged_on_read', 'user'], name='stylefeed_merged_user_idx'),
+        ]
 
     def __str__(self):
         return f"Style post by {self.user.email} at {self.created_at}"
 
+class TimelineEntry(models.Model):
+    """A StyleFeed post materialized into one user's home timeline"""
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(StyleFeed, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()  # copy of post.created_at so pages are one index range
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post #{self.post_id} in timeline of user {self.owner_id}"
+
 class NewsfeedPost(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     image = models.ImageField(upload_to='newsfeed/', blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination walks the feed by (created_at, id), newest first.
+            models.Index(fields=['-created_at', '-id'], name='newsfeed_created_id_idx'),
+        ]
+
+    def __str__(self):
+        # Avoid touching self.user so list views don't issue a query per row.
+        return f"Post #{self.pk} by user {self.user_id}: {self.content[:30]}"
+
+
+# content__search uses the FULLTEXT index added in migration 0008 on MySQL.
+NewsfeedPost._meta.get_field('content').register_lookup(FullTextSearch)
+
+
+class MediaBlob(models.Model):
+    """Reference-counted file written by ContentAddressedStorage"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class EngagementEvent(models.Model):
+    """Append-only log of views, likes and bookings used for trending rankings"""
+    KIND_CHOICES = (
+        ('view', 'View'),
+        ('like', 'Like'),
+        ('booking', 'Booking'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    style_post = models.ForeignKey(StyleFeed, on_delete=models.CASCADE, null=True, blank=True, related_name='engagement_events')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, null=True, blank=True, related_name='engagement_events')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # "<user>:<target>" for likes so each user likes a target once; NULL otherwise.
+    dedupe_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}"
+
+class TrendingScore(models.Model):
+    """Exponentially decayed engagement score, stored in log space relative to a fixed epoch"""
+    CATEGORY_CHOICES = (
+        ('style', 'Style post'),
+        ('service', 'Service'),
+    )
+
+    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    object_id = models.BigIntegerField()
+    log_score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'object_id'], name='unique_trending_score'),
+        ]
+        indexes = [
+            models.Index(fields=['category', '-log_score'], name='trending_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category} #{self.object_id}: {self.log_score:.3f}"
+
+class TrendingCheckpoint(models.Model):
+    """Last EngagementEvent folded into TrendingScore"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.user.get_full_name()}: {self.content[:30]}"
+        return f"{self.name} @ {self.last_event_id}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Product, Service, StyleFeed
+from .models import Product, Service, StyleFeed, NewsfeedPost
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,4 +17,19 @@ class StyleFeedSerializer(serializers.ModelSerializer):
     class Meta:
         model = StyleFeed
         fields = ['id', 'user', 'image', 'caption', 'created_at']
-        read_only_fields = ['user', 'created_at']
\ No newline at end of file
+        read_only_fields = ['user', 'created_at']
+
+class NewsfeedAuthorSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    role = serializers.CharField()
+    profile_picture = serializers.ImageField()
+
+class NewsfeedPostSerializer(serializers.ModelSerializer):
+    user = NewsfeedAuthorSerializer(read_only=True)
+
+    class Meta:
+        model = NewsfeedPost
+        fields = ['id', 'user', 'content', 'image', 'created_at']
+        read_only_fields = fields
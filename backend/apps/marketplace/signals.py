@@ -0,0 +1,71 @@
+"""
+Signal handlers for marketplace models.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.profiles.models import User
+from config.cache import track_model
+
+from .models import NewsfeedPost, Product, SimilarProducts, StyleFeed
+
+# File fields holding a reference in ContentAddressedStorage, the default
+# storage, so every upload field in the project belongs here.
+MEDIA_FIELDS = (
+    (Product, "image"),
+    (StyleFeed, "image"),
+    (NewsfeedPost, "image"),
+    (User, "profile_picture"),
+)
+_field_names = dict(MEDIA_FIELDS)
+
+
+def remember_replaced_image(sender, instance, **kwargs):
+    """Keep track of the image being replaced so its reference can be released."""
+    if not instance.pk:
+        return
+    field_name = _field_names[sender]
+    previous = (
+        sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    )
+    if previous and previous != getattr(instance, field_name).name:
+        instance._replaced_image = previous
+
+
+def release_replaced_image(sender, instance, **kwargs):
+    previous = instance.__dict__.pop("_replaced_image", None)
+    if previous:
+        getattr(instance, _field_names[sender]).storage.delete(previous)
+
+
+def release_deleted_image(sender, instance, **kwargs):
+    """Drop the row's reference on its image once the row is gone."""
+    image = getattr(instance, _field_names[sender])
+    if image and image.name:
+        image.storage.delete(image.name)
+
+
+for model, _ in MEDIA_FIELDS:
+    pre_save.connect(remember_replaced_image, sender=model)
+    post_save.connect(release_replaced_image, sender=model)
+    post_delete.connect(release_deleted_image, sender=model)
+
+
+def queue_similar_products_update(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {"name", "description"} & set(update_fields):
+        return
+    from .tasks import update_similar_products
+
+    transaction.on_commit(lambda: update_similar_products.delay(instance.pk))
+
+
+post_save.connect(queue_similar_products_update, sender=Product)
+
+
+# Cached similar-product lists are tagged with the product's and its neighbours' rows
+# (see similarity.py).
+track_model(Product)
+track_model(SimilarProducts)
+# Newsfeed and dashboard post fragments are tagged with the post (see fragments.py).
+track_model(NewsfeedPost)
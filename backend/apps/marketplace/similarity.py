@@ -0,0 +1,362 @@
+"""
+"Similar fabrics" index over Product name and description.
+
+Products are vectorized as TF-IDF over hashed word unigrams and bigrams
+(no vocabulary to store), and top-K cosine neighbours are computed block by
+block with sparse matrix products. The results are written to
+SimilarProducts so detail pages need one primary-key lookup.
+
+New or edited products are handled incrementally: the product is vectorized
+with the stored IDF weights, scored against the persisted matrix and the
+delta, and its vector stored as a SimilarityDelta row that the next full
+rebuild folds back in. The delta lives in the database so every worker sees
+it; the full build is one file in ``SIMILARITY_INDEX_DIR``, which must be
+shared by the hosts that run the similarity tasks, and is swapped in with
+``os.replace`` so readers never see a partial index.
+"""
+
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.cache import cached, invalidate_tags, model_tag
+from config.db.bulk import bulk_upsert
+
+from .models import Product, SimilarityDelta, SimilarProducts
+
+N_FEATURES = 2**18
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FETCH_CHUNK_SIZE = 50000
+BLOCK_SIZE = 256
+WRITE_BATCH_SIZE = 2000
+# Terms found in more than this share of products ("fabric", "yard", ...) say
+# little about similarity and would make every block product nearly dense.
+MAX_DOCUMENT_FREQUENCY = 0.1
+
+_loaded_index = {}
+
+
+def top_k():
+    return getattr(settings, "SIMILAR_PRODUCTS_TOP_K", 10)
+
+
+def index_dir():
+    return Path(
+        getattr(settings, "SIMILARITY_INDEX_DIR", settings.BASE_DIR / "var" / "similarity")
+    )
+
+
+def product_text(name, description):
+    # The name is repeated so it outweighs long descriptions.
+    return f"{name} {name} {description or ''}"
+
+
+def tokens(text):
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def hashed_counts(texts):
+    """Return raw term counts for ``texts`` as an (n x N_FEATURES) CSR matrix."""
+    import numpy as np
+    from scipy import sparse
+
+    indptr = [0]
+    indices = []
+    for text in texts:
+        indices.extend(zlib.crc32(token.encode()) & (N_FEATURES - 1) for token in tokens(text))
+        indptr.append(len(indices))
+
+    counts = sparse.csr_matrix(
+        (
+            np.ones(len(indices), dtype=np.float32),
+            np.array(indices, dtype=np.int32),
+            np.array(indptr, dtype=np.int64),
+        ),
+        shape=(len(texts), N_FEATURES),
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def fit_idf(counts):
+    """Smoothed IDF weights, with overly common terms zeroed out."""
+    import numpy as np
+
+    documents = counts.shape[0]
+    frequency = np.bincount(counts.indices, minlength=N_FEATURES)
+    idf = (np.log((1 + documents) / (1 + frequency)) + 1).astype(np.float32)
+    if documents >= 20:
+        idf[frequency > MAX_DOCUMENT_FREQUENCY * documents] = 0
+    return idf
+
+
+def weigh(counts, idf):
+    """Turn raw counts into L2-normalized sublinear TF-IDF rows."""
+    import numpy as np
+    from scipy import sparse
+
+    weighted = counts.copy().astype(np.float32)
+    weighted.data = 1 + np.log(weighted.data)
+    weighted = (weighted @ sparse.diags(idf)).tocsr()
+    weighted.eliminate_zeros()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ weighted).astype(np.float32).tocsr()
+
+
+def _top(values, columns, ids, k):
+    import numpy as np
+
+    if len(values) > k:
+        picked = np.argpartition(-values, k)[:k]
+        values, columns = values[picked], columns[picked]
+    order = np.argsort(-values, kind="stable")
+    return [
+        [int(ids[column]), round(float(value), 4)]
+        for value, column in zip(values[order], columns[order])
+        if value > 0
+    ]
+
+
+def blocked_neighbors(matrix, ids, k, start=0, stop=None, block_size=BLOCK_SIZE):
+    """Yield ``(id, neighbors)`` for rows ``start:stop``, one block product at a time."""
+    transposed = matrix.T.tocsr()
+    stop = matrix.shape[0] if stop is None else stop
+    for block_start in range(start, stop, block_size):
+        scores = (matrix[block_start : min(block_start + block_size, stop)] @ transposed).tocsr()
+        for offset in range(scores.shape[0]):
+            row = block_start + offset
+            begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+            columns = scores.indices[begin:end]
+            keep = columns != row
+            yield ids[row], _top(scores.data[begin:end][keep], columns[keep], ids, k)
+
+
+def _save_neighbors(rows):
+    bulk_upsert(
+        SimilarProducts,
+        rows,
+        unique_fields=["product"],
+        update_fields=["neighbors", "computed_at"],
+        batch_size=WRITE_BATCH_SIZE,
+    )
+
+
+def build_index():
+    """Rebuild the whole index and every neighbour list. Returns the product count."""
+    import numpy as np
+    from scipy import sparse
+
+    started = timezone.now()
+    ids, chunks = [], []
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "name", "description")[:FETCH_CHUNK_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids.extend(row[0] for row in rows)
+        chunks.append(hashed_counts([product_text(row[1], row[2]) for row in rows]))
+
+    if not ids:
+        return 0
+
+    ids = np.array(ids, dtype=np.int64)
+    counts = sparse.vstack(chunks).tocsr()
+    idf = fit_idf(counts)
+    matrix = weigh(counts, idf)
+    del counts, chunks
+    _persist(matrix, ids, idf)
+    # Products saved while we were reading keep their delta rows.
+    SimilarityDelta.objects.filter(updated_at__lt=started).delete()
+
+    batch = []
+    for product_id, neighbors in blocked_neighbors(matrix, ids, top_k()):
+        batch.append(SimilarProducts(product_id=int(product_id), neighbors=neighbors))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            _save_neighbors(batch)
+            batch = []
+    if batch:
+        _save_neighbors(batch)
+    # bulk_create sends no signals, so drop cached lists explicitly.
+    invalidate_tags(SimilarProducts)
+    return len(ids)
+
+
+def _index_path():
+    return index_dir() / "index.npz"
+
+
+def _persist(matrix, ids, idf):
+    import numpy as np
+
+    directory = index_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            np.savez(
+                file,
+                data=matrix.data,
+                indices=matrix.indices,
+                indptr=matrix.indptr,
+                shape=np.array(matrix.shape),
+                ids=ids,
+                idf=idf,
+            )
+        os.replace(temporary, _index_path())
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+    _loaded_index.clear()
+
+
+def _load_main():
+    """Load (and memoize per process) the last full build."""
+    import numpy as np
+    from scipy import sparse
+
+    path = _index_path()
+    stat = path.stat()
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    if _loaded_index.get("stamp") != stamp:
+        with np.load(path) as stored:
+            matrix = sparse.csr_matrix(
+                (stored["data"], stored["indices"], stored["indptr"]),
+                shape=tuple(stored["shape"]),
+            )
+            _loaded_index.update(stamp=stamp, matrix=matrix, ids=stored["ids"], idf=stored["idf"])
+    return _loaded_index["matrix"], _loaded_index["ids"], _loaded_index["idf"]
+
+
+def _load_delta(exclude):
+    """The delta rows of every product but ``exclude``, as (matrix, ids)."""
+    import numpy as np
+    from scipy import sparse
+
+    ids, indptr, indices, data = [], [0], [], []
+    for product_id, vector in (
+        SimilarityDelta.objects.exclude(product_id=exclude)
+        .order_by("product_id")
+        .values_list("product_id", "vector")
+        .iterator()
+    ):
+        ids.append(product_id)
+        indices.extend(feature for feature, _ in vector)
+        data.extend(weight for _, weight in vector)
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (
+            np.array(data, dtype=np.float32),
+            np.array(indices, dtype=np.int32),
+            np.array(indptr, dtype=np.int64),
+        ),
+        shape=(len(ids), N_FEATURES),
+    )
+    return matrix, np.array(ids, dtype=np.int64)
+
+
+def _scores(matrix, vector):
+    import numpy as np
+
+    return np.asarray((matrix @ vector.T).todense()).ravel()
+
+
+def update_product(product_id):
+    """Compute neighbours for one new or edited product without a full rebuild."""
+    import numpy as np
+
+    if not _index_path().exists():
+        return None
+    product = Product.objects.filter(id=product_id).values_list("name", "description").first()
+    if product is None:
+        return None
+
+    matrix, ids, idf = _load_main()
+    vector = weigh(hashed_counts([product_text(*product)]), idf)
+    SimilarityDelta.objects.update_or_create(
+        product_id=product_id,
+        defaults={
+            "vector": [
+                [int(feature), float(weight)] for feature, weight in zip(vector.indices, vector.data)
+            ]
+        },
+    )
+    delta, delta_ids = _load_delta(exclude=product_id)
+
+    # Score the main matrix and the delta separately, ignoring main rows
+    # superseded by a delta row and the product itself.
+    main_scores = _scores(matrix, vector)
+    main_scores[np.isin(ids, delta_ids) | (ids == product_id)] = 0
+    delta_scores = _scores(delta, vector)
+    main_columns = np.flatnonzero(main_scores)
+    delta_columns = np.flatnonzero(delta_scores)
+    values = np.concatenate([main_scores[main_columns], delta_scores[delta_columns]])
+    candidate_ids = np.concatenate([ids[main_columns], delta_ids[delta_columns]])
+    neighbors = _top(values, np.arange(len(values)), candidate_ids, top_k())
+
+    with transaction.atomic():
+        SimilarProducts.objects.update_or_create(
+            product_id=product_id, defaults={"neighbors": neighbors}
+        )
+        _offer_to_neighbors(product_id, neighbors)
+    return neighbors
+
+
+def _offer_to_neighbors(product_id, neighbors):
+    """Insert the product into neighbour lists it now ranks in."""
+    k = top_k()
+    scores = dict(neighbors)
+    changed = []
+    # Row locks serialise concurrent updates offering to the same lists.
+    rows = SimilarProducts.objects.select_for_update().filter(product_id__in=list(scores))
+    for row in rows.order_by("product_id"):
+        entries = [entry for entry in row.neighbors if entry[0] != product_id]
+        entries.append([product_id, scores[row.product_id]])
+        entries.sort(key=lambda entry: -entry[1])
+        row.neighbors = entries[:k]
+        changed.append(row)
+    SimilarProducts.objects.bulk_update(changed, ["neighbors"])
+    tags = [model_tag(SimilarProducts, row.product_id) for row in changed]
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+@cached(
+    "marketplace:similar",
+    timeout=60 * 60,
+    tags=lambda product_id: [model_tag(SimilarProducts, product_id)],
+)
+def neighbor_ids(product_id):
+    """Ids of the stored neighbours of a product, most similar first."""
+    neighbors = (
+        SimilarProducts.objects.filter(product_id=product_id)
+        .values_list("neighbors", flat=True)
+        .first()
+    ) or []
+    return [entry[0] for entry in neighbors]
+
+
+@cached(
+    "marketplace:similar-products",
+    timeout=60 * 60,
+    tags=lambda ids: [model_tag(Product, pk) for pk in ids],
+)
+def _products(ids):
+    products = Product.objects.in_bulk(ids)
+    return [products[pk] for pk in ids if pk in products]
+
+
+def similar_products(product_id, limit=None):
+    """Return the stored neighbours of a product as Product instances."""
+    return _products(tuple(neighbor_ids(product_id)[: limit or top_k()]))
@@ -0,0 +1,150 @@
+"""
+Content-addressed media storage for TailoRent uploads.
+
+Files are named after the SHA-256 of their contents, so uploading the same
+fabric photo twice stores it once. Every save takes a reference on the
+underlying blob and every delete releases one; the file is only removed from
+the wrapped storage when the last reference goes away, under the blob's row
+lock so a concurrent save of the same content can't lose it.
+"""
+
+import hashlib
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+# Content-addressed names never change meaning, so they can be cached forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CAS_PREFIX = "cas/"
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Wrap the configured media storage and dedupe files by content hash."""
+
+    def __init__(self, backend=None, options=None):
+        backend = backend or settings.MEDIA_STORAGE_BACKEND
+        self.backend = import_string(backend)(**(options or {}))
+
+        # Backends that upload to object storage (S3 and friends) accept
+        # default object parameters; make them emit the immutable header too.
+        object_parameters = getattr(self.backend, "object_parameters", None)
+        if isinstance(object_parameters, dict):
+            object_parameters.setdefault("CacheControl", IMMUTABLE_CACHE_CONTROL)
+
+    @staticmethod
+    def digest(content):
+        """Return the (sha256 hexdigest, size) of a file, leaving it rewound."""
+        sha = hashlib.sha256()
+        size = 0
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+            size += len(chunk)
+        content.seek(0)
+        return sha.hexdigest(), size
+
+    @staticmethod
+    def hashed_name(digest, original_name):
+        """Build the storage name for a digest, sharded to keep directories small."""
+        ext = posixpath.splitext(original_name)[1].lower()
+        return f"{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    @staticmethod
+    def is_content_addressed(name):
+        return bool(name) and str(name).startswith(CAS_PREFIX)
+
+    def get_available_name(self, name, max_length=None):
+        # The real name is only known once the content has been hashed in _save.
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        digest, size = self.digest(content)
+        hashed = self.hashed_name(digest, name)
+
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                digest=digest, defaults={"name": hashed, "size": size, "refcount": 1}
+            )
+            if not created:
+                MediaBlob.objects.filter(pk=blob.pk).update(
+                    refcount=F("refcount") + 1
+                )
+
+        if created or not self.backend.exists(blob.name):
+            saved = self.backend.save(blob.name, content)
+            if saved != blob.name:
+                # Another worker wrote the same blob concurrently; keep theirs.
+                self.backend.delete(saved)
+
+        return blob.name
+
+    def delete(self, name):
+        """Release one reference to ``name`` and remove the file with the last one."""
+        from .models import MediaBlob
+
+        if not self.is_content_addressed(name):
+            # Legacy uploads that predate content addressing are not counted.
+            self.backend.delete(name)
+            return
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None or blob.refcount == 0:
+                return
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") - 1)
+            if blob.refcount > 1:
+                return
+
+        # The row stays, with no references, until the file is gone; a save
+        # of the same content in the meantime takes it back.
+        transaction.on_commit(lambda: self._remove_unreferenced(name))
+
+    def _remove_unreferenced(self, name):
+        from .models import MediaBlob
+
+        # Hold the row lock across the file delete: a concurrent _save of the
+        # same content waits for it, then finds no blob and writes the file.
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name, refcount=0).first()
+            if blob is None:
+                return
+            self.backend.delete(name)
+            blob.delete()
+
+    # Everything else is delegated to the wrapped storage.
+
+    def _open(self, name, mode="rb"):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
@@ -0,0 +1,89 @@
+"""
+Celery tasks for marketplace app.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def fan_out_style_post(post_id):
+    """Deliver a new style post to its followers' timelines."""
+    from .models import StyleFeed
+    from .timelines import fan_out_post
+
+    post = StyleFeed.objects.filter(id=post_id).first()
+    if post is None:
+        return 0
+    delivered = fan_out_post(post)
+    logger.info("Style post %s fanned out to %s timelines", post_id, delivered)
+    return delivered
+
+
+@shared_task
+def backfill_timeline(follower_id, followee_id):
+    """Seed a follower's timeline with a newly followed author's posts."""
+    from .timelines import backfill_timeline
+
+    backfill_timeline(follower_id, followee_id)
+
+
+@shared_task
+def maintain_timelines():
+    """Refresh the celebrity set, deliver former celebrities' posts and cap timeline lengths."""
+    from .timelines import fan_out_former_celebrities, refresh_celebrities, trim_timelines
+
+    celebrities, _ = refresh_celebrities()
+    delivered = fan_out_former_celebrities(celebrities)
+    trimmed = trim_timelines()
+    logger.info(
+        "Timelines maintained: %s celebrities, %s entries delivered, %s entries trimmed",
+        len(celebrities),
+        delivered,
+        trimmed,
+    )
+    return trimmed
+
+
+@shared_task
+def update_trending_scores():
+    """Fold new engagement events into the decayed trending scores."""
+    from .trending import apply_new_events
+
+    applied = apply_new_events()
+    logger.info("Applied %s engagement events to trending scores", applied)
+    return applied
+
+
+@shared_task
+def update_similar_products(product_id):
+    """Refresh the neighbours of a new or edited product."""
+    from .similarity import update_product
+
+    update_product(product_id)
+
+
+@shared_task
+def rebuild_similar_products():
+    """Nightly full rebuild of the similar-products index."""
+    from .similarity import build_index
+
+    indexed = build_index()
+    logger.info("Similar-products index rebuilt for %s products", indexed)
+    return indexed
+
+
+@shared_task
+def delete_newsfeed_posts(selection):
+    """Delete newsfeed posts selected in the admin, a chunk at a time."""
+    from config.admin import selection_chunks
+
+    from .models import NewsfeedPost
+
+    deleted = 0
+    for post_ids in selection_chunks(selection):
+        deleted += NewsfeedPost.objects.filter(id__in=post_ids).delete()[0]
+    logger.info("Deleted %s newsfeed posts", deleted)
+    return deleted
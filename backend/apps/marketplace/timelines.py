@@ -0,0 +1,214 @@
+"""
+Personalized StyleFeed home timelines.
+
+Posts are fanned out on write into a capped ``TimelineEntry`` list per
+follower. Authors with very large followings ("celebrities") are skipped at
+write time and merged in on read instead, so one popular designer posting
+does not turn into hundreds of thousands of inserts.
+
+Skipped posts are flagged ``merged_on_read``, and their authors keep being
+merged on read until ``fan_out_former_celebrities()`` has delivered those
+posts, so an author dropping below the threshold doesn't lose them.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.profiles.models import Follow
+
+from .feeds import decode_cursor, encode_cursor
+from .models import StyleFeed, TimelineEntry
+
+TIMELINE_PAGE_SIZE = 20
+FAN_OUT_BATCH_SIZE = 1000
+CELEBRITIES_CACHE_KEY = "stylefeed:celebrity-sets"
+CELEBRITIES_CACHE_TIMEOUT = 60 * 10
+
+
+def timeline_length():
+    return getattr(settings, "STYLEFEED_TIMELINE_LENGTH", 500)
+
+
+def celebrity_threshold():
+    return getattr(settings, "STYLEFEED_CELEBRITY_FOLLOWERS", 5000)
+
+
+def refresh_celebrities():
+    """
+    Recompute ``(celebrities, merged)``: the authors whose new posts are not
+    fanned out, and the authors merged in on read, who are those plus any
+    with posts still flagged.
+    """
+    celebrities = set(
+        Follow.objects.values("followee")
+        .annotate(followers=Count("id"))
+        .filter(followers__gte=celebrity_threshold())
+        .values_list("followee", flat=True)
+    )
+    merged = celebrities | set(
+        StyleFeed.objects.filter(merged_on_read=True)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    cache.set(CELEBRITIES_CACHE_KEY, (celebrities, merged), CELEBRITIES_CACHE_TIMEOUT)
+    return celebrities, merged
+
+
+def _celebrity_sets():
+    sets = cache.get(CELEBRITIES_CACHE_KEY)
+    if sets is None:
+        sets = refresh_celebrities()
+    return sets
+
+
+def celebrity_ids():
+    return _celebrity_sets()[0]
+
+
+def merged_author_ids():
+    return _celebrity_sets()[1]
+
+
+def _deliver(post):
+    """Insert ``post`` into every follower's timeline."""
+    follower_ids = Follow.objects.filter(followee_id=post.user_id).values_list(
+        "follower_id", flat=True
+    )
+    delivered = 0
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FAN_OUT_BATCH_SIZE):
+        batch.append(
+            TimelineEntry(owner_id=follower_id, post=post, created_at=post.created_at)
+        )
+        if len(batch) >= FAN_OUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            delivered += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        delivered += len(batch)
+    return delivered
+
+
+def fan_out_post(post):
+    """Push a new post into its author's and followers' timelines."""
+    entries = [TimelineEntry(owner_id=post.user_id, post=post, created_at=post.created_at)]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    if post.user_id in celebrity_ids():
+        StyleFeed.objects.filter(pk=post.pk).update(merged_on_read=True)
+        return 0
+    return _deliver(post)
+
+
+def fan_out_former_celebrities(celebrities):
+    """
+    Deliver the skipped posts of authors no longer in ``celebrities``: the
+    newest STYLEFEED_TIMELINE_LENGTH each, as many as a timeline holds.
+    """
+    authors = list(
+        StyleFeed.objects.filter(merged_on_read=True)
+        .exclude(user_id__in=celebrities)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    delivered = 0
+    for author_id in authors:
+        skipped = StyleFeed.objects.filter(user_id=author_id, merged_on_read=True)
+        for post in skipped.order_by("-created_at", "-id")[: timeline_length()]:
+            delivered += _deliver(post)
+        # Only now may reads stop merging this author in.
+        skipped.update(merged_on_read=False)
+    return delivered
+
+
+def backfill_timeline(follower_id, followee_id):
+    """Copy a newly followed author's recent posts into the follower's timeline."""
+    if followee_id in celebrity_ids():
+        return
+    posts = StyleFeed.objects.filter(user_id=followee_id).order_by("-created_at", "-id")
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=follower_id, post_id=pk, created_at=created_at)
+            for pk, created_at in posts.values_list("id", "created_at")[: timeline_length()]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_from_timeline(follower_id, followee_id):
+    TimelineEntry.objects.filter(owner_id=follower_id, post__user_id=followee_id).delete()
+
+
+def trim_timelines():
+    """Cap every timeline at STYLEFEED_TIMELINE_LENGTH entries."""
+    length = timeline_length()
+    owners = (
+        TimelineEntry.objects.values("owner")
+        .annotate(entries=Count("id"))
+        .filter(entries__gt=length)
+        .values_list("owner", flat=True)
+    )
+    trimmed = 0
+    for owner_id in owners:
+        oldest_kept = (
+            TimelineEntry.objects.filter(owner_id=owner_id)
+            .order_by("-created_at", "-post_id")
+            .values_list("created_at", "post_id")[length - 1]
+        )
+        trimmed += TimelineEntry.objects.filter(
+            Q(created_at__lt=oldest_kept[0])
+            | Q(created_at=oldest_kept[0], post_id__lt=oldest_kept[1]),
+            owner_id=owner_id,
+        ).delete()[0]
+    return trimmed
+
+
+def _keyset(queryset, cursor, created_field, id_field):
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(**{f"{created_field}__lt": created_at})
+        | Q(**{created_field: created_at, f"{id_field}__lt": pk})
+    )
+
+
+def timeline_page(user, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    Return one page of the user's home timeline, newest first.
+
+    Materialized entries are one index range read; posts by followed
+    celebrities (see ``merged_author_ids()``) are read from StyleFeed and
+    merged in. The surviving post ids
+    are then hydrated with a single query.
+    """
+    limit = max(1, min(int(limit), 50))
+
+    entries = TimelineEntry.objects.filter(owner=user).order_by("-created_at", "-post_id")
+    candidates = list(
+        _keyset(entries, cursor, "created_at", "post_id").values_list(
+            "created_at", "post_id"
+        )[: limit + 1]
+    )
+
+    merged = merged_author_ids()
+    if merged:
+        followed = Follow.objects.filter(
+            follower=user, followee_id__in=merged
+        ).values_list("followee_id", flat=True)
+        posts = StyleFeed.objects.filter(user_id__in=list(followed)).order_by(
+            "-created_at", "-id"
+        )
+        candidates += list(
+            _keyset(posts, cursor, "created_at", "id").values_list("created_at", "id")[
+                : limit + 1
+            ]
+        )
+        candidates = sorted(set(candidates), reverse=True)
+
+    page_ids = [pk for _, pk in candidates[:limit]]
+    posts = StyleFeed.objects.select_related("user").in_bulk(page_ids)
+    page = [posts[pk] for pk in page_ids if pk in posts]
+    next_cursor = encode_cursor(page[-1]) if len(candidates) > limit and page else None
+    return page, next_cursor
@@ -0,0 +1,196 @@
+"""
+Time-decayed "Trending styles" and "Trending services" rankings.
+
+Each engagement event contributes ``weight * exp(-decay * age)`` to its
+target's score. Scores are stored as ``log(sum(weight * exp(decay * (t - EPOCH))))``:
+every score decays at the same rate, so this value orders targets exactly like
+the live score does, and new events can be folded in with ``logaddexp``
+without ever rewriting untouched rows.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import EngagementEvent, Service, StyleFeed, TrendingCheckpoint, TrendingScore
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+EVENT_WEIGHTS = {"view": 1.0, "like": 3.0, "booking": 10.0}
+CHECKPOINT_NAME = "trending"
+BATCH_SIZE = 10000
+CATEGORY_MODELS = {"style": StyleFeed, "service": Service}
+
+
+def decay_rate():
+    """Per-second decay constant derived from TRENDING_HALF_LIFE_HOURS."""
+    half_life = getattr(settings, "TRENDING_HALF_LIFE_HOURS", 24)
+    return math.log(2) / (half_life * 3600)
+
+
+def event_lag():
+    """Seconds an event must age before it is folded in (see apply_new_events)."""
+    return getattr(settings, "TRENDING_EVENT_LAG_SECONDS", 60)
+
+
+def top_k():
+    return getattr(settings, "TRENDING_TOP_K", 50)
+
+
+def cache_key(category):
+    return f"trending:{category}"
+
+
+def log_contribution(kind, created_at, rate=None):
+    rate = decay_rate() if rate is None else rate
+    return math.log(EVENT_WEIGHTS[kind]) + rate * (created_at - EPOCH).total_seconds()
+
+
+def live_score(log_score, now=None, rate=None):
+    """Convert a stored log score into the decayed score at ``now``."""
+    now = now or timezone.now()
+    rate = decay_rate() if rate is None else rate
+    return math.exp(log_score - rate * (now - EPOCH).total_seconds())
+
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def record_engagement(kind, style_post_id=None, service_id=None, user=None):
+    """
+    Append one event to the engagement log. A user's repeated like of the
+    same target is not recorded again; None is returned instead.
+    """
+    if user is not None and not user.is_authenticated:
+        user = None
+    dedupe_key = None
+    if kind == "like" and user is not None:
+        target = f"style:{style_post_id}" if style_post_id is not None else f"service:{service_id}"
+        dedupe_key = f"{user.pk}:{target}"
+    try:
+        with transaction.atomic():
+            return EngagementEvent.objects.create(
+                kind=kind,
+                style_post_id=style_post_id,
+                service_id=service_id,
+                user=user,
+                dedupe_key=dedupe_key,
+            )
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        return None
+
+
+def apply_new_events(batch_size=BATCH_SIZE):
+    """
+    Fold events logged since the last run into TrendingScore.
+
+    The checkpoint is an event id, and ids are handed out before commit, so
+    a lower id can become visible after a higher one. Events younger than
+    TRENDING_EVENT_LAG_SECONDS are left for the next run, and a batch stops
+    at the first of them, so a slow writer only loses its event if its
+    transaction outlives the lag.
+    """
+    rate = decay_rate()
+    applied = 0
+    while True:
+        cutoff = timezone.now() - timedelta(seconds=event_lag())
+        with transaction.atomic():
+            checkpoint, _ = TrendingCheckpoint.objects.select_for_update().get_or_create(
+                name=CHECKPOINT_NAME
+            )
+            events = list(
+                EngagementEvent.objects.filter(id__gt=checkpoint.last_event_id)
+                .order_by("id")
+                .values_list("id", "kind", "style_post_id", "service_id", "created_at")[
+                    :batch_size
+                ]
+            )
+            for position, event in enumerate(events):
+                if event[4] >= cutoff:
+                    events = events[:position]
+                    break
+            if not events:
+                break
+
+            deltas = {}
+            for _, kind, style_post_id, service_id, created_at in events:
+                contribution = log_contribution(kind, created_at, rate)
+                for category, object_id in (("style", style_post_id), ("service", service_id)):
+                    if object_id is not None:
+                        key = (category, object_id)
+                        deltas[key] = _logaddexp(deltas.get(key), contribution)
+
+            _merge_scores(deltas)
+            checkpoint.last_event_id = events[-1][0]
+            checkpoint.save(update_fields=["last_event_id", "updated_at"])
+            applied += len(events)
+
+    if applied:
+        refresh_top_k()
+    return applied
+
+
+def _merge_scores(deltas):
+    for category in CATEGORY_MODELS:
+        updates = {oid: score for (cat, oid), score in deltas.items() if cat == category}
+        if not updates:
+            continue
+        existing = {
+            row.object_id: row
+            for row in TrendingScore.objects.filter(
+                category=category, object_id__in=list(updates)
+            )
+        }
+        changed, created = [], []
+        now = timezone.now()
+        for object_id, delta in updates.items():
+            row = existing.get(object_id)
+            if row is None:
+                created.append(
+                    TrendingScore(category=category, object_id=object_id, log_score=delta)
+                )
+            else:
+                row.log_score = _logaddexp(row.log_score, delta)
+                row.updated_at = now
+                changed.append(row)
+        TrendingScore.objects.bulk_create(created)
+        TrendingScore.objects.bulk_update(changed, ["log_score", "updated_at"])
+
+
+def refresh_top_k():
+    """Cache the top-K (object_id, log_score) pairs per category."""
+    for category in CATEGORY_MODELS:
+        ranking = list(
+            TrendingScore.objects.filter(category=category)
+            .order_by("-log_score")
+            .values_list("object_id", "log_score")[: top_k()]
+        )
+        cache.set(cache_key(category), ranking, None)
+
+
+def trending(category, limit=None):
+    """Return up to ``limit`` (object, score) pairs, hottest first."""
+    ranking = cache.get(cache_key(category))
+    if ranking is None:
+        refresh_top_k()
+        ranking = cache.get(cache_key(category), [])
+
+    ranking = ranking[: limit or top_k()]
+    model = CATEGORY_MODELS[category]
+    objects = model.objects.in_bulk([object_id for object_id, _ in ranking])
+    now = timezone.now()
+    rate = decay_rate()
+    return [
+        (objects[object_id], live_score(log_score, now, rate))
+        for object_id, log_score in ranking
+        if object_id in objects
+    ]
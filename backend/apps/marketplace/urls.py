@@ -1,9 +1,11 @@
 from django.urls import path
 from .views import (
-    ProductListCreateView, ProductDetailView,
+    ProductListCreateView, ProductDetailView, SimilarProductsView,
     ServiceListCreateView, ServiceDetailView,
-    StyleFeedListCreateView, StyleFeedDetailView,
-    newsfeed_view
+    StyleFeedListCreateView, StyleFeedDetailView, StyleFeedTimelineView,
+    NewsfeedListView, newsfeed_view,
+    StyleFeedLikeView, ServiceLikeView,
+    TrendingStylesView, TrendingServicesView,
 )
 
 app_name = 'marketplace'  # ✅ Required for namespacing
@@ -11,9 +13,16 @@ app_name = 'marketplace'  # ✅ Required for namespacing
 urlpatterns = [
     path('products/', ProductListCreateView.as_view(), name='product-list-create'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('products/<int:pk>/similar/', SimilarProductsView.as_view(), name='product-similar'),
     path('services/', ServiceListCreateView.as_view(), name='service-list-create'),
     path('services/<int:pk>/', ServiceDetailView.as_view(), name='service-detail'),
     path('style-feed/', StyleFeedListCreateView.as_view(), name='style-feed'),
     path('style-feed/<int:pk>/', StyleFeedDetailView.as_view(), name='style-feed-detail'),
-    path('newsfeed/', newsfeed_view, name='newsfeed'),
+    path('style-feed/timeline/', StyleFeedTimelineView.as_view(), name='style-feed-timeline'),
+    path('style-feed/<int:pk>/like/', StyleFeedLikeView.as_view(), name='style-feed-like'),
+    path('services/<int:pk>/like/', ServiceLikeView.as_view(), name='service-like'),
+    path('trending/styles/', TrendingStylesView.as_view(), name='trending-styles'),
+    path('trending/services/', TrendingServicesView.as_view(), name='trending-services'),
+    path('newsfeed/', NewsfeedListView.as_view(), name='newsfeed-list'),
+    path('newsfeed/page/', newsfeed_view, name='newsfeed'),
 ]
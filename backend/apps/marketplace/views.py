@@ -1,7 +1,17 @@
-from rest_framework import generics, permissions, filters
+from rest_framework import generics, permissions, filters, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Product, Service,  StyleFeed, NewsfeedPost
-from django.shortcuts import render
-from .serializers import ProductSerializer, ServiceSerializer, StyleFeedSerializer
+from django.db import transaction
+from django.http import HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+from .feeds import InvalidCursor, newsfeed_page, NEWSFEED_PAGE_SIZE
+from .tasks import fan_out_style_post
+from .timelines import timeline_page, TIMELINE_PAGE_SIZE
+from .trending import record_engagement, trending
+from .similarity import similar_products
+from .serializers import ProductSerializer, ServiceSerializer, StyleFeedSerializer, NewsfeedPostSerializer
 from django.core.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -44,6 +54,18 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Product.objects.filter(vendor=self.request.user)
 
 
+class SimilarProductsView(APIView):
+    """
+    "Similar fabrics" for a product, read from the precomputed index.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        get_object_or_404(Product, pk=pk)
+        serializer = ProductSerializer(similar_products(pk), many=True, context={'request': request})
+        return Response(serializer.data)
+
+
 # --- Service Views ---
 class ServiceListCreateView(generics.ListCreateAPIView):
     serializer_class = ServiceSerializer
@@ -53,16 +75,24 @@ class ServiceListCreateView(generics.ListCreateAPIView):
         return Service.objects.all()
 
     def perform_create(self, serializer):
-        if self.request.user.role not in ['tailor', 'fashion_designer']:
+        if self.request.user.role not in ['Tailor', 'Fashion_Designer']:
             raise PermissionDenied("Only tailors or fashion designers can offer services.")
-        serializer.save(professional=self.request.user)
+        serializer.save(provider=self.request.user)
 
 class ServiceDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Service.objects.filter(professional=self.request.user)
+        # Anyone may look at a service; only its provider may change it.
+        if self.request.method in permissions.SAFE_METHODS:
+            return Service.objects.all()
+        return Service.objects.filter(provider=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        record_engagement('view', service_id=kwargs['pk'], user=request.user)
+        return response
 
 class StyleFeedListCreateView(generics.ListCreateAPIView):
     queryset = StyleFeed.objects.all().order_by('-created_at')
@@ -70,7 +100,27 @@ class StyleFeedListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        post = serializer.save(user=self.request.user)
+        transaction.on_commit(lambda: fan_out_style_post.delay(post.id))
+
+class StyleFeedTimelineView(APIView):
+    """
+    The authenticated user's home timeline: posts by the people they follow.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            posts, next_cursor = timeline_page(
+                request.user,
+                cursor=request.query_params.get('cursor'),
+                limit=request.query_params.get('limit', TIMELINE_PAGE_SIZE),
+            )
+        except (InvalidCursor, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor or limit.'})
+
+        serializer = StyleFeedSerializer(posts, many=True, context={'request': request})
+        return Response({'next': next_cursor, 'results': serializer.data})
 
 class StyleFeedDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = StyleFeed.objects.all()
@@ -79,7 +129,86 @@ class StyleFeedDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return StyleFeed.objects.all().order_by('-created_at')
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        record_engagement('view', style_post_id=kwargs['pk'], user=request.user)
+        return response
+
+class StyleFeedLikeView(APIView):
+    """
+    Like a style post, once per user. Likes feed the trending rankings.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk, *args, **kwargs):
+        post = get_object_or_404(StyleFeed, pk=pk)
+        liked = record_engagement('like', style_post_id=post.pk, user=request.user)
+        return Response(status=status.HTTP_201_CREATED if liked else status.HTTP_200_OK)
+
+class ServiceLikeView(APIView):
+    """
+    Like a service, once per user. Likes feed the trending rankings.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk, *args, **kwargs):
+        service = get_object_or_404(Service, pk=pk)
+        liked = record_engagement('like', service_id=service.pk, user=request.user)
+        return Response(status=status.HTTP_201_CREATED if liked else status.HTTP_200_OK)
+
+class TrendingView(APIView):
+    """
+    Hottest style posts or services, served from the cached top-K ranking.
+    """
+    permission_classes = [permissions.AllowAny]
+    category = None
+    serializer_class = None
+
+    def get(self, request, *args, **kwargs):
+        ranking = trending(self.category)
+        serializer = self.serializer_class(
+            [obj for obj, _ in ranking], many=True, context={'request': request}
+        )
+        return Response([
+            {**item, 'score': round(score, 4)}
+            for item, (_, score) in zip(serializer.data, ranking)
+        ])
+
+class TrendingStylesView(TrendingView):
+    category = 'style'
+    serializer_class = StyleFeedSerializer
+
+class TrendingServicesView(TrendingView):
+    category = 'service'
+    serializer_class = ServiceSerializer
     
+class NewsfeedListView(APIView):
+    """
+    Cursor-paginated newsfeed for infinite scroll.
+    Pass the returned `next` cursor back as `?cursor=` to load the next page.
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            page = newsfeed_page(
+                cursor=request.query_params.get('cursor'),
+                limit=request.query_params.get('limit', NEWSFEED_PAGE_SIZE),
+            )
+        except (InvalidCursor, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor or limit.'})
+
+        serializer = NewsfeedPostSerializer(page.posts, many=True, context={'request': request})
+        return Response({'next': page.next_cursor, 'results': serializer.data})
+
 def newsfeed_view(request):
-    posts = NewsfeedPost.objects.all().order_by('-created_at')
-    return render(request, 'newsfeed.html', {'posts': posts})
+    try:
+        page = newsfeed_page(cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+
+    return render(request, 'newsfeed.html', {
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
+    })
@@ -1,14 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
+from config.admin import LargeTableAdminMixin
 from .models import User
+from .tasks import deactivate_users
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     # Fields you want to show in the admin list view
     list_display = ('id', 'email', 'phone_number', 'first_name', 'last_name', 'role', 'is_staff', 'profile_image')
     list_filter = ('role', 'is_staff', 'is_superuser')
-    search_fields = ('email', 'phone_number', 'first_name', 'last_name')
+    # Prefix searches (LIKE 'term%') can use the column indexes; icontains can't.
+    search_fields = ('^email', '^phone_number', '^first_name', '^last_name')
     ordering = ('-date_joined',)
+    actions = ('deactivate_in_background',)
 
     # Fieldsets for editing user
     fieldsets = (
@@ -34,4 +38,11 @@ class UserAdmin(BaseUserAdmin):
 
     profile_image.short_description = 'Profile Pic'
 
+    @admin.action(description='Deactivate selected users in the background', permissions=['change'])
+    def deactivate_in_background(self, request, queryset):
+        # Never lock out the admin doing the deactivating.
+        self.queue_action(
+            request, queryset, deactivate_users, 'deactivated', exclude=[request.user.pk]
+        )
+
 admin.site.register(User, UserAdmin)
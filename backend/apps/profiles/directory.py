@@ -0,0 +1,108 @@
+"""
+Professional directory for the server-rendered pages.
+
+Pages are keyset-paginated on ``id``, newest first, so page N costs the same
+as page 1. The page query reads only ids; card HTML for the whole page is
+fetched from the fragment cache in one batch, and only professionals whose
+cards are missing are loaded, with just the columns a card shows. Saving a
+``User`` bumps its cache tag (see profiles.signals), which re-renders that
+professional's card on the next view.
+"""
+
+from collections import namedtuple
+
+from django.template.loader import render_to_string
+
+from config.cache import cached, model_tag
+
+from .models import User
+from .templatetags.fragments import fragment_cache, fragment_cache_settings
+
+PROFESSIONAL_ROLES = ("Tailor", "Fashion_Designer")
+DIRECTORY_PAGE_SIZE = 24
+DIRECTORY_MAX_PAGE_SIZE = 100
+
+# What professional_card.html uses, including get_full_name()'s fallbacks.
+CARD_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "role",
+    "about_me",
+    "profile_picture",
+)
+DETAIL_FIELDS = (*CARD_FIELDS, "address", "date_joined")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+DirectoryPage = namedtuple("DirectoryPage", ["cards", "next_cursor"])
+
+
+def professionals(role=None, location=None):
+    queryset = User.objects.filter(role__in=PROFESSIONAL_ROLES, is_active=True)
+    if role:
+        queryset = queryset.filter(role=role)
+    if location:
+        queryset = queryset.filter(address__icontains=location)
+    return queryset
+
+
+def directory_page(role=None, location=None, cursor=None, limit=DIRECTORY_PAGE_SIZE):
+    """Return one page of card HTML, newest professionals first."""
+    limit = max(1, min(int(limit), DIRECTORY_MAX_PAGE_SIZE))
+    queryset = professionals(role, location).order_by("-id")
+    if cursor:
+        try:
+            queryset = queryset.filter(id__lt=int(cursor))
+        except ValueError as exc:
+            raise InvalidCursor("Invalid cursor.") from exc
+
+    # Fetch one extra id to learn whether another page exists.
+    ids = list(queryset.values_list("id", flat=True)[: limit + 1])
+    next_cursor = str(ids[limit - 1]) if len(ids) > limit else None
+    return DirectoryPage(cards=render_cards(ids[:limit]), next_cursor=next_cursor)
+
+
+def card_key(pk):
+    # The same key {% cachefragment "professional_card" professional %} uses.
+    return f"professional_card:{model_tag(User, pk)}"
+
+
+def render_card(professional):
+    return render_to_string("professional_card.html", {"professional": professional})
+
+
+def render_cards(ids):
+    """Card HTML for each professional id, in order."""
+    if not fragment_cache_settings()["ENABLED"]:
+        users = User.objects.only(*CARD_FIELDS).in_bulk(ids)
+        return [render_card(users[pk]) for pk in ids if pk in users]
+
+    keys = {card_key(pk): pk for pk in ids}
+
+    def render_missing(missing):
+        users = User.objects.only(*CARD_FIELDS).in_bulk([keys[key] for key in missing])
+        return {key: render_card(users[keys[key]]) for key in missing if keys[key] in users}
+
+    cards = fragment_cache.get_many_or_set(
+        {key: [model_tag(User, pk)] for key, pk in keys.items()},
+        render_missing,
+        timeout=fragment_cache_settings()["TIMEOUT"],
+    )
+    return [cards[key] for key in keys if key in cards]
+
+
+@cached(
+    "profiles:professional",
+    timeout=60 * 60,
+    tags=lambda pk: [model_tag(User, pk)],
+    key=lambda pk: pk,
+)
+def professional_profile(pk):
+    """The active professional ``pk`` with the detail page's columns, or None."""
+    return professionals().only(*DETAIL_FIELDS).filter(pk=pk).first()
@@ -0,0 +1,249 @@
+"""
+Compare how many auth requests one process keeps in flight with the sync DRF
+views on a fixed pool of worker threads versus the async views on one event
+loop, at the same client concurrency.
+
+Requests go through Django's WSGIHandler and ASGIHandler, so the whole
+MIDDLEWARE stack runs as it does in gunicorn and uvicorn; only the
+benchmark's own URLconf (``/sync/<endpoint>/`` and ``/async/<endpoint>/``)
+is swapped in.
+"""
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+from apps.profiles import tasks, views
+from apps.profiles.models import EmailVerification, User
+
+ENDPOINTS = {
+    "otp-login": (views.OTPLoginView, views.AsyncOTPLoginView),
+    "email-verify": (views.EmailVerificationView, views.AsyncEmailVerificationView),
+    "register": (views.RegistrationView, views.AsyncRegistrationView),
+}
+PUBLISHED_TASKS = (tasks.send_otp_sms, tasks.dispatch_notifications)
+PHONE_PREFIX = "+1999"
+EMAIL_DOMAIN = "concurrency.benchmark.invalid"
+HOST = "testserver"
+
+urlpatterns = [
+    path(f"{mode}/{endpoint}/", view.as_view())
+    for endpoint, modes in ENDPOINTS.items()
+    for mode, view in zip(("sync", "async"), modes)
+]
+
+
+class InFlight:
+    """Count requests currently inside the handler and remember the peak."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+@contextmanager
+def simulated_broker(latency):
+    """Replace task publishes with a blocking sleep of ``latency`` seconds."""
+    if latency is None:
+        yield
+        return
+
+    def publish(*args, **kwargs):
+        time.sleep(latency)
+
+    for task in PUBLISHED_TASKS:
+        task.apply_async = publish
+    try:
+        yield
+    finally:
+        for task in PUBLISHED_TASKS:
+            del task.apply_async
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the sync and async auth views under concurrent load and report "
+        "throughput, latency and peak in-flight requests per process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="otp-login")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients.")
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Threads of the sync worker being compared."
+        )
+        parser.add_argument(
+            "--broker-latency-ms",
+            type=float,
+            help="Publish no tasks; sleep this long instead, standing in for the broker round trip.",
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(self.benchmark_users()).exists():
+            raise CommandError("Leftover benchmark users found; delete them first.")
+        latency = options["broker_latency_ms"]
+        endpoint = options["endpoint"]
+        count = options["requests"]
+        urls = override_settings(
+            ROOT_URLCONF=__name__, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]
+        )
+        try:
+            with simulated_broker(None if latency is None else latency / 1000), urls:
+                results = [
+                    (
+                        f"wsgi ({options['threads']} threads)",
+                        self.run_sync(
+                            f"/sync/{endpoint}/",
+                            self.build_bodies(endpoint, count, 0),
+                            options["concurrency"],
+                            options["threads"],
+                        ),
+                    ),
+                    (
+                        "asgi (event loop)",
+                        asyncio.run(
+                            self.run_async(
+                                f"/async/{endpoint}/",
+                                self.build_bodies(endpoint, count, count),
+                                options["concurrency"],
+                            )
+                        ),
+                    ),
+                ]
+        finally:
+            User.objects.filter(self.benchmark_users()).delete()
+
+        self.stdout.write(
+            f"{'mode':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'peak in-flight':>15} {'errors':>7}"
+        )
+        for mode, (elapsed, latencies, peak, errors) in results:
+            p50, p95 = (
+                statistics.quantiles(latencies, n=100)[index] * 1000 for index in (49, 94)
+            )
+            self.stdout.write(
+                f"{mode:<20} {len(latencies) / elapsed:8.1f} {p50:8.1f} {p95:8.1f} "
+                f"{peak:15d} {errors:7d}"
+            )
+
+    def benchmark_users(self):
+        return Q(phone_number__startswith=PHONE_PREFIX) | Q(email__endswith=EMAIL_DOMAIN)
+
+    def build_bodies(self, endpoint, count, offset):
+        numbers = range(offset, offset + count)
+        if endpoint == "otp-login":
+            bodies = [{"phone_number": f"{PHONE_PREFIX}{n:07d}"} for n in numbers]
+        elif endpoint == "register":
+            bodies = [
+                {
+                    "email": f"user{n}@{EMAIL_DOMAIN}",
+                    "password": "Benchmark-pass-123",
+                    "password_confirm": "Benchmark-pass-123",
+                    "role": "Customer",
+                }
+                for n in numbers
+            ]
+        else:
+            users = User.objects.bulk_create(
+                User(email=f"user{n}@{EMAIL_DOMAIN}", role="Customer") for n in numbers
+            )
+            verifications = EmailVerification.objects.bulk_create(
+                EmailVerification(user=user) for user in users
+            )
+            bodies = [{"token": str(verification.token)} for verification in verifications]
+        return [json.dumps(body).encode() for body in bodies]
+
+    def run_sync(self, path, bodies, concurrency, threads):
+        handler, factory = WSGIHandler(), RequestFactory()
+        in_flight, workers = InFlight(), threading.BoundedSemaphore(threads)
+
+        def call(body):
+            environ = factory.post(
+                path, data=body, content_type="application/json", secure=True
+            ).environ
+            status = []
+            started = time.perf_counter()
+            with workers, in_flight:
+                response = handler(environ, lambda line, headers: status.append(line))
+                b"".join(response)
+                # Fires request_finished, as the WSGI server would.
+                response.close()
+            return time.perf_counter() - started, int(status[0].split()[0]) >= 400
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            outcomes = list(clients.map(call, bodies))
+        return self.summarize(time.perf_counter() - started, outcomes, in_flight)
+
+    async def run_async(self, path, bodies, concurrency):
+        handler = ASGIHandler()
+        in_flight, clients = InFlight(), asyncio.Semaphore(concurrency)
+
+        async def call(body):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "POST",
+                "scheme": "https",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [
+                    (b"host", HOST.encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+                "client": ("127.0.0.1", 0),
+                "server": (HOST, 443),
+            }
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # The client never disconnects; the handler cancels this wait.
+                await asyncio.Future()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            async with clients:
+                started = time.perf_counter()
+                with in_flight:
+                    await handler(scope, receive, send)
+                return time.perf_counter() - started, status[0] >= 400
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(call(body) for body in bodies))
+        return self.summarize(time.perf_counter() - started, outcomes, in_flight)
+
+    def summarize(self, elapsed, outcomes, in_flight):
+        latencies = [latency for latency, _ in outcomes]
+        errors = sum(failed for _, failed in outcomes)
+        return elapsed, latencies, in_flight.peak, errors
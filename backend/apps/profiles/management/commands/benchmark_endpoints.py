@@ -0,0 +1,252 @@
+"""
+Drive every GET route in the URLconf and record latency, queries and memory.
+
+Requests go through the Django test client, so the numbers cover the whole
+middleware/view/serializer stack against whatever database the active
+settings point at (SQLite or a local MySQL), without network noise.
+Run ``seed_data`` first so list endpoints have realistic volumes.
+"""
+
+import json
+import logging
+import platform
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.bookings.models import Booking
+from apps.marketplace.models import Product, Service, StyleFeed
+from apps.profiles.models import User
+from config.instrumentation import QueryRecorder
+
+PARAM_RE = re.compile(r"<(?:\w+:)?(\w+)>")
+SKIPPED_NAMESPACES = {"admin"}
+# Metrics compared against the baseline; a higher value is a regression.
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries", "peak_kb")
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def iter_routes(patterns, prefix="", namespace=None):
+    """Yield ``(route, url_name, view)`` for every named pattern in the URLconf."""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            child_namespace = namespace
+            if pattern.namespace:
+                child_namespace = (
+                    f"{namespace}:{pattern.namespace}" if namespace else pattern.namespace
+                )
+            yield from iter_routes(pattern.url_patterns, route, child_namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+            yield route, name, pattern.callback
+
+
+def allows_get(view):
+    view_class = getattr(view, "view_class", None) or getattr(view, "cls", None)
+    return view_class is None or hasattr(view_class, "get")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every GET endpoint: p50/p95/p99 latency, queries per request and "
+        "peak memory. Results can be saved as JSON and compared with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--memory-iterations",
+            type=int,
+            default=3,
+            help="Extra requests traced with tracemalloc (kept out of the latency samples).",
+        )
+        parser.add_argument("--role", default="Customer", help="Role of the user to log in as.")
+        parser.add_argument("--email", help="Log in as this user instead of picking one by role.")
+        parser.add_argument("--anonymous", action="store_true")
+        parser.add_argument(
+            "--only", action="append", default=[], help="Substring of URL names to include."
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare against results saved by --output.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Relative increase over the baseline reported as a regression.",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        client = Client(SERVER_NAME="localhost", raise_request_exception=False)
+        user = None if options["anonymous"] else self.pick_user(options)
+        headers = {}
+        if user is not None:
+            client.force_login(user)
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(user).access_token}"
+
+        samples = self.sample_ids(user)
+        # Failing views are reported by status code; their tracebacks would
+        # otherwise be logged once per iteration.
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        results = {}
+        for route, name, view in iter_routes(get_resolver().url_patterns):
+            if name.split(":")[0] in SKIPPED_NAMESPACES or not allows_get(view):
+                continue
+            if options["only"] and not any(part in name for part in options["only"]):
+                continue
+            path = self.build_path(route, samples)
+            if path is None:
+                self.stdout.write(self.style.WARNING(f"skip {name}: no sample data for {route}"))
+                continue
+            results[name] = self.measure(client, path, headers, options)
+            self.report(name, results[name])
+
+        payload = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "settings": settings.SETTINGS_MODULE,
+                "user_role": getattr(user, "role", None),
+                "iterations": options["iterations"],
+            },
+            "endpoints": results,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(payload, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}."))
+        if options["baseline"]:
+            regressions = self.compare(results, options["baseline"], options["tolerance"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} metric(s) regressed beyond tolerance.")
+
+    # Setup
+
+    def pick_user(self, options):
+        if options["email"]:
+            user = User.objects.filter(email=options["email"]).first()
+        else:
+            # Seeded accounts are the newest, so this picks one with data attached.
+            user = (
+                User.objects.filter(role=options["role"], is_active=True)
+                .order_by("-id")
+                .first()
+            )
+        if user is None:
+            raise CommandError("No matching user; run seed_data first or pass --email.")
+        return user
+
+    def sample_ids(self, user):
+        """Pick one existing object per parameterized route family."""
+        bookings = Booking.objects.all()
+        if user is not None:
+            own = bookings.filter(customer=user) | bookings.filter(professional=user)
+            bookings = own if own.exists() else bookings
+        professional = User.objects.filter(role__in=["Tailor", "Fashion_Designer"])
+        # Ordered by specificity: the first prefix found in the route wins.
+        return [
+            ("bookings/book/", professional.values_list("id", flat=True).first()),
+            ("bookings/", bookings.values_list("id", flat=True).first()),
+            ("products/", Product.objects.values_list("id", flat=True).first()),
+            ("services/", Service.objects.values_list("id", flat=True).first()),
+            ("style-feed/", StyleFeed.objects.values_list("id", flat=True).first()),
+            ("professional", professional.values_list("id", flat=True).first()),
+        ]
+
+    def build_path(self, route, samples):
+        route = route.lstrip("^").rstrip("$")
+        if not PARAM_RE.search(route):
+            return "/" + route
+        for prefix, value in samples:
+            if prefix in route:
+                return None if value is None else "/" + PARAM_RE.sub(str(value), route)
+        return None
+
+    # Measurement
+
+    def measure(self, client, path, headers, options):
+        for _ in range(options["warmup"]):
+            client.get(path, **headers)
+
+        latencies, queries = [], []
+        status = None
+        for _ in range(options["iterations"]):
+            recorder = QueryRecorder()
+            with recorder.installed():
+                started = time.perf_counter()
+                response = client.get(path, **headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(recorder.count)
+            status = response.status_code
+
+        peak = 0
+        for _ in range(options["memory_iterations"]):
+            tracemalloc.start()
+            try:
+                client.get(path, **headers)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        return {
+            "path": path,
+            "status": status,
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "queries": max(queries),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def report(self, name, result):
+        line = (
+            f"{name:<45} {result['status']:>3}  p50 {result['p50_ms']:8.2f}ms  "
+            f"p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+            f"{result['queries']:>3} queries  {result['peak_kb']:9.1f} KB"
+        )
+        self.stdout.write(line if result["status"] < 400 else self.style.WARNING(line))
+
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            baseline = json.loads(Path(baseline_path).read_text())["endpoints"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read baseline {baseline_path}: {exc}")
+
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            for metric in COMPARED_METRICS:
+                before, after = previous.get(metric), result[metric]
+                if before is None:
+                    continue
+                # Query counts are exact, so any increase is a regression.
+                limit = before if metric == "queries" else before * (1 + tolerance)
+                if after > limit:
+                    regressions.append((name, metric, before, after))
+
+        for name, metric, before, after in regressions:
+            self.stdout.write(
+                self.style.ERROR(f"REGRESSION {name} {metric}: {before} -> {after}")
+            )
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+        return regressions
@@ -0,0 +1,103 @@
+"""
+Compare DRF's stock JSON renderer/parser with the orjson-backed ones.
+"""
+
+import io
+import time
+import uuid
+from decimal import Decimal
+
+import orjson
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import BookingSerializer
+from apps.marketplace.models import Product
+from apps.marketplace.serializers import ProductSerializer
+from config.parsers import ORJSONParser
+from config.renderers import ORJSONRenderer
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark JSON rendering and parsing on Product and Booking payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=5000, help="Rows per payload.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        size, repeat = options["size"], options["repeat"]
+        now = timezone.now()
+        payloads = {
+            "products": ProductSerializer(
+                [
+                    Product(
+                        id=i,
+                        vendor_id=i % 97 + 1,
+                        name=f"Ankara print {i}",
+                        description="Six yards of wax print cotton, hand-finished in Lagos. " * 3,
+                        price=Decimal(f"{1500 + i}.50"),
+                        created_at=now,
+                    )
+                    for i in range(size)
+                ],
+                many=True,
+            ).data,
+            "bookings": BookingSerializer(
+                [
+                    Booking(
+                        id=i,
+                        customer_id=i % 500 + 1,
+                        professional_id=i % 40 + 1,
+                        service_type="Agbada sewing",
+                        date=now,
+                        status="pending",
+                    )
+                    for i in range(size)
+                ],
+                many=True,
+            ).data,
+            # Un-serialized values exercise the Decimal/datetime/UUID fallbacks.
+            "raw values": [
+                {"id": uuid.uuid4(), "price": Decimal("19.99"), "at": now} for _ in range(size)
+            ],
+        }
+
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+        self.stdout.write(f"{'payload':<12} {'stage':<7} {'DRF ms':>9} {'orjson ms':>10} {'speedup':>8}")
+        for name, data in payloads.items():
+            expected = stock.render(data)
+            rendered = fast.render(data)
+            if orjson.loads(expected) != orjson.loads(rendered):
+                raise CommandError(f"{name}: orjson output differs from DRF's")
+
+            self.report(
+                name,
+                "render",
+                best_of(repeat, lambda: stock.render(data)),
+                best_of(repeat, lambda: fast.render(data)),
+            )
+            self.report(
+                name,
+                "parse",
+                best_of(repeat, lambda: JSONParser().parse(io.BytesIO(expected))),
+                best_of(repeat, lambda: ORJSONParser().parse(io.BytesIO(rendered))),
+            )
+
+    def report(self, name, stage, stock_seconds, fast_seconds):
+        self.stdout.write(
+            f"{name:<12} {stage:<7} {stock_seconds * 1000:9.1f} {fast_seconds * 1000:10.1f} "
+            f"{stock_seconds / fast_seconds:7.1f}x"
+        )
@@ -0,0 +1,51 @@
+"""
+Compare one-at-a-time SMS sends with the pooled, concurrent gateway against
+a local stub provider that answers after a realistic delay.
+"""
+
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.profiles.sms import HTTPStubProvider, SMSGateway, StubSMSServer
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk SMS throughput of a single worker against a local stub provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument("--latency-ms", type=float, default=100, help="Stub response time.")
+        parser.add_argument("--concurrency", type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        messages = [(f"+1555{n:07d}", f"Reminder {n}") for n in range(count)]
+        server = StubSMSServer(latency=options["latency_ms"] / 1000).start()
+        try:
+            # What send_otp_sms used to do: a new client and connection per message.
+            started = time.perf_counter()
+            for to, body in messages:
+                with requests.Session() as session:
+                    HTTPStubProvider(url=server.url).send(session, to, body, timeout=10)
+            sequential = time.perf_counter() - started
+
+            gateway = SMSGateway(
+                [HTTPStubProvider(url=server.url)], concurrency=options["concurrency"]
+            )
+            started = time.perf_counter()
+            results = gateway.send_many(messages)
+            pooled = time.perf_counter() - started
+            gateway.close()
+        finally:
+            server.stop()
+
+        failed = sum(not result.sent for result in results)
+        self.stdout.write(f"{'mode':<28} {'msgs/s':>8} {'seconds':>8}")
+        self.stdout.write(f"{'sequential, new session':<28} {count / sequential:8.1f} {sequential:8.2f}")
+        self.stdout.write(
+            f"{'pooled, concurrency ' + str(options['concurrency']):<28} "
+            f"{count / pooled:8.1f} {pooled:8.2f}"
+        )
+        self.stdout.write(f"speedup {sequential / pooled:.1f}x, {failed} failed")
@@ -0,0 +1,165 @@
+"""
+Compare server-rendered page throughput with a non-caching template loader,
+no fragment caching and an unpaginated professional list (how pages used to
+render) against the cached loader, {% cachefragment %} blocks, whole-page
+caching of static pages and the keyset-paginated, cached directory.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import get_object_or_404, render
+from django.test import RequestFactory, override_settings
+
+from apps.marketplace.models import NewsfeedPost
+from apps.marketplace.views import newsfeed_view
+from apps.profiles import views
+from apps.profiles.directory import PROFESSIONAL_ROLES, render_card
+from apps.profiles.models import User
+from config.cache import reset_local_cache
+
+EMAIL_DOMAIN = "templates.benchmark.invalid"
+
+UNCACHED_TEMPLATES = {
+    "loaders": [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ],
+}
+
+
+def unpaginated_professional_list(request):
+    professionals = User.objects.filter(role__in=PROFESSIONAL_ROLES, is_active=True)
+    cards = [render_card(professional) for professional in professionals]
+    return render(request, "professional_list.html", {"cards": cards})
+
+
+def uncached_professional_detail(request, pk):
+    professional = get_object_or_404(User, pk=pk, role__in=PROFESSIONAL_ROLES, is_active=True)
+    return render(request, "professional_detail.html", {"professional": professional})
+
+
+def uncached_templates(templates):
+    return [
+        {**engine, "OPTIONS": {**engine.get("OPTIONS", {}), **UNCACHED_TEMPLATES}}
+        for engine in templates
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark rendering of the template pages before and after template, "
+        "fragment and static-page caching and report requests per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per page.")
+        parser.add_argument("--professionals", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__endswith=EMAIL_DOMAIN).exists():
+            raise CommandError("Leftover benchmark users found; delete them first.")
+        try:
+            customer, professionals = self.seed(options["professionals"], options["posts"])
+            pages = self.pages(customer, professionals[0])
+            # As in production: DEBUG re-renders static pages on every request.
+            with override_settings(DEBUG=False):
+                with override_settings(
+                    TEMPLATES=uncached_templates(settings.TEMPLATES),
+                    FRAGMENT_CACHE={"ENABLED": False},
+                ):
+                    before = {
+                        name: self.run(view, request, kwargs, options["requests"])
+                        for name, (view, _, request, kwargs) in pages.items()
+                    }
+                reset_local_cache()
+                after = {
+                    name: self.run(view, request, kwargs, options["requests"])
+                    for name, (_, view, request, kwargs) in pages.items()
+                }
+        finally:
+            User.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+
+        self.stdout.write(f"{'page':<22} {'before req/s':>13} {'after req/s':>12} {'speedup':>8}")
+        for name in pages:
+            self.stdout.write(
+                f"{name:<22} {before[name]:13.1f} {after[name]:12.1f} "
+                f"{after[name] / before[name]:7.1f}x"
+            )
+
+    def seed(self, professional_count, post_count):
+        customer = User.objects.create_user(
+            email=f"customer@{EMAIL_DOMAIN}", password=None, role="Customer", first_name="Casey"
+        )
+        professionals = User.objects.bulk_create(
+            User(
+                email=f"pro{n}@{EMAIL_DOMAIN}",
+                role="Tailor" if n % 2 else "Fashion_Designer",
+                first_name=f"Pro{n}",
+                last_name="Benchmark",
+                about_me="Bespoke suits, alterations and bridal wear. " * 5,
+            )
+            for n in range(professional_count)
+        )
+        NewsfeedPost.objects.bulk_create(
+            NewsfeedPost(
+                user=professionals[n % len(professionals)],
+                content=f"Fitting session number {n}, linen and wool.\nMore photos soon.",
+            )
+            for n in range(post_count)
+        )
+        return customer, professionals
+
+    def pages(self, customer, professional):
+        """``{name: (view before, view after, request, view kwargs)}``"""
+        factory = RequestFactory()
+
+        def request(path):
+            request = factory.get(path)
+            request.user = customer
+            return request
+
+        return {
+            "home": (
+                lambda request: render(request, "home.html"),
+                views.home_view,
+                request("/home/"),
+                {},
+            ),
+            "about": (
+                lambda request: render(request, "about.html"),
+                views.about_view,
+                request("/about/"),
+                {},
+            ),
+            "professional_list": (
+                unpaginated_professional_list,
+                views.professional_list_view,
+                request("/professionals-template/"),
+                {},
+            ),
+            "professional_detail": (
+                uncached_professional_detail,
+                views.professional_detail_view,
+                request(f"/professional-detail/{professional.pk}/"),
+                {"pk": professional.pk},
+            ),
+            "dashboard": (
+                views.dashboard_view,
+                views.dashboard_view,
+                request("/dashboard-template/"),
+                {},
+            ),
+            "newsfeed": (newsfeed_view, newsfeed_view, request("/newsfeed/"), {}),
+        }
+
+    def run(self, view, request, kwargs, count):
+        view(request, **kwargs)  # warm up
+        started = time.perf_counter()
+        for _ in range(count):
+            response = view(request, **kwargs)
+            if response.status_code != 200:
+                raise CommandError(f"{request.path} returned {response.status_code}")
+        return count / (time.perf_counter() - started)
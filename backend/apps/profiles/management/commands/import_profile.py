@@ -0,0 +1,116 @@
+"""
+Report per-module import time for a cold web or Celery worker start.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a freshly forked process imports before it can serve its first job.
+PROBES = {
+    "web": (
+        "from django.core.wsgi import get_wsgi_application\n"
+        "get_wsgi_application()\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    ),
+    "celery": (
+        "import django\n"
+        "django.setup()\n"
+        "from config.celery import app\n"
+        "app.loader.import_default_modules()\n"
+    ),
+}
+
+
+def profile_imports(target):
+    """
+    Run the ``target`` probe under ``python -X importtime`` and return a list of
+    ``(module, self_us, cumulative_us)`` in import order.
+    """
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+        "PYTHONPATH": os.pathsep.join(path for path in sys.path if path),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBES[target]],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=settings.BASE_DIR,
+    )
+    if result.returncode:
+        raise CommandError(f"The {target} probe failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long a cold web or Celery process spends importing modules, "
+        "and optionally enforce an import time budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(PROBES), default="web")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--sort", choices=["self", "cumulative"], default="cumulative")
+        parser.add_argument(
+            "--budget-ms", type=float, help="Fail if the total import time exceeds this."
+        )
+        parser.add_argument(
+            "--forbid",
+            action="append",
+            default=[],
+            help="Fail if this top-level package is imported (e.g. twilio).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print machine-readable output.")
+
+    def handle(self, *args, **options):
+        modules = profile_imports(options["target"])
+        total_ms = sum(self_us for _, self_us, _ in modules) / 1000
+        imported = {name.split(".")[0] for name, _, _ in modules}
+        forbidden = sorted(set(options["forbid"]) & imported)
+
+        column = 1 if options["sort"] == "self" else 2
+        slowest = sorted(modules, key=lambda module: -module[column])[: options["top"]]
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "target": options["target"],
+                        "total_ms": round(total_ms, 1),
+                        "modules": len(modules),
+                        "slowest": [
+                            {"module": name, "self_ms": s / 1000, "cumulative_ms": c / 1000}
+                            for name, s, c in slowest
+                        ],
+                    },
+                    indent=2,
+                )
+            )
+        else:
+            self.stdout.write(f"{'self ms':>9} {'cumul. ms':>10}  module")
+            for name, self_us, cumulative_us in slowest:
+                self.stdout.write(f"{self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}  {name}")
+            self.stdout.write(
+                f"{options['target']}: {len(modules)} modules imported in {total_ms:.0f} ms"
+            )
+
+        if forbidden:
+            raise CommandError(f"Forbidden packages imported at startup: {', '.join(forbidden)}")
+        if options["budget_ms"] is not None and total_ms > options["budget_ms"]:
+            raise CommandError(
+                f"Import time {total_ms:.0f} ms exceeds the budget of {options['budget_ms']:.0f} ms."
+            )
@@ -0,0 +1,147 @@
+"""
+Recommend missing indexes for a captured query workload and flag unused ones
+(see config.db.index_advisor).
+
+Capture the test suite's workload with::
+
+    INDEX_ADVISOR_WORKLOAD=workload.jsonl pytest
+
+then run ``index_advisor workload.jsonl`` against a database with realistic
+volumes (``seed_data`` or a staging copy): plans on an empty table say
+nothing about a large one.
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from config.db.index_advisor import advise, load_workload, unused_indexes
+
+
+def index_source(index):
+    fields = ", ".join(f'"{field}"' for field in index.fields)
+    return f'models.Index(fields=[{fields}], name="{index.name}")'
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN each query shape of a captured workload, rank missing indexes "
+        "by the planner cost they save and emit a migration adding them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workloads", nargs="+", help="JSON-lines workload files.")
+        parser.add_argument("--database", default="default", help="Database to EXPLAIN on.")
+        parser.add_argument(
+            "--min-calls", type=int, default=1, help="Ignore shapes run fewer times."
+        )
+        parser.add_argument("--top", type=int, default=20, help="Recommendations to keep.")
+        parser.add_argument(
+            "--min-saving",
+            type=float,
+            default=0.1,
+            help="Drop candidates saving less than this share of their shapes' cost.",
+        )
+        parser.add_argument(
+            "--build",
+            action="store_true",
+            help=(
+                "Build each candidate briefly to EXPLAIN with it on PostgreSQL/MySQL. "
+                "Staging only; SQLite always does this in a rolled-back transaction."
+            ),
+        )
+        parser.add_argument(
+            "--write", action="store_true", help="Write the migrations instead of printing them."
+        )
+        parser.add_argument(
+            "--unused", action="store_true", help="Also list indexes nothing read."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            queries = [query for path in options["workloads"] for query in load_workload(path)]
+        except (OSError, ValueError, TypeError) as exc:
+            raise CommandError(f"Could not read the workload: {exc}") from exc
+        if not queries:
+            raise CommandError("The workload is empty.")
+
+        recommendations = advise(
+            queries,
+            using=options["database"],
+            build=True if options["build"] else None,
+            min_calls=options["min_calls"],
+            min_saving=options["min_saving"],
+        )[: options["top"]]
+        self.report(recommendations)
+        if recommendations:
+            self.emit_migrations(recommendations, options["write"])
+        if options["unused"]:
+            self.report_unused(unused_indexes(queries, using=options["database"]))
+
+    def report(self, recommendations):
+        self.stdout.write(
+            f"{'rank':>4} {'calls':>7} {'cost before':>12} {'cost after':>12} {'saved':>6}  index"
+        )
+        for rank, item in enumerate(recommendations, start=1):
+            saved = 1 - item.cost_after / item.cost_before
+            self.stdout.write(
+                f"{rank:4d} {item.calls:7d} {item.cost_before:12.1f} {item.cost_after:12.1f} "
+                f"{saved:6.0%}  {item.model._meta.label}({', '.join(item.index.fields)})"
+                f"{' *' if item.estimated else ''}"
+            )
+            for shape in item.shapes[:3]:
+                # The select list is noise; the shape is in FROM onwards.
+                start = shape.find(" FROM ")
+                self.stdout.write(f"{'':6}{shape[start + 1 if start >= 0 else 0:][:150]}")
+        if not recommendations:
+            self.stdout.write("No missing indexes found.")
+        elif any(item.estimated for item in recommendations):
+            self.stdout.write(
+                "* estimated without building the index; rerun with --build on staging to confirm."
+            )
+
+    def emit_migrations(self, recommendations, write):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        by_app = defaultdict(list)
+        for item in recommendations:
+            by_app[item.model._meta.app_label].append(item)
+
+        for app_label, items in sorted(by_app.items()):
+            leaves = loader.graph.leaf_nodes(app_label)
+            if len(leaves) > 1:
+                raise CommandError(f"{app_label} has {len(leaves)} leaf migrations; merge them first.")
+            number = (MigrationAutodetector.parse_number(leaves[0][1]) or 0) + 1 if leaves else 1
+            migration = Migration(f"{number:04d}_advised_indexes", app_label)
+            migration.dependencies = leaves
+            migration.operations = [
+                AddIndex(model_name=item.model._meta.model_name, index=item.index) for item in items
+            ]
+            writer = MigrationWriter(migration)
+            try:
+                path = writer.path
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            if write:
+                with open(path, "w") as stream:
+                    stream.write(writer.as_string())
+                self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
+            else:
+                self.stdout.write(f"\n# {path}\n{writer.as_string()}")
+
+            self.stdout.write("Add to Meta.indexes so makemigrations agrees:")
+            for item in items:
+                self.stdout.write(f"    {item.model.__name__}: {index_source(item.index)},")
+
+    def report_unused(self, unused):
+        self.stdout.write("\nUnused indexes (workload: no plan used it; server: never read):")
+        if not unused:
+            self.stdout.write("None.")
+        for item in unused:
+            self.stdout.write(
+                f"  {item.table}.{item.name} ({', '.join(item.columns)}) [{item.source}]"
+                f"{' backs a foreign key' if item.foreign_key else ''}"
+            )
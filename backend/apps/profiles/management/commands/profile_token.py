@@ -0,0 +1,17 @@
+"""
+Print a signed header that makes the next requests get profiled.
+"""
+
+from django.core.management.base import BaseCommand
+
+from config.profiling import make_profile_token, profiling_settings
+
+
+class Command(BaseCommand):
+    help = "Print a signed profiling header, valid for PROFILING['TOKEN_MAX_AGE'] seconds."
+
+    def handle(self, *args, **options):
+        config = profiling_settings()
+        if not config["ENABLED"]:
+            self.stderr.write(self.style.WARNING("PROFILING is disabled in these settings."))
+        self.stdout.write(f"{config['HEADER']}: {make_profile_token()}")
@@ -0,0 +1,53 @@
+"""
+Report how long Celery tasks waited in each queue (see config.queue_latency).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.queue_latency import latency_summary, queue_latency_settings
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return f">{queue_latency_settings()['BUCKETS'][-1]}"
+    return f"<={value:g}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Show per-queue publish-to-start wait percentiles for recent Celery tasks. "
+        "With --check, exit non-zero when a queue's p99 is over its SLO."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, default=15, help="Window to summarize.")
+        parser.add_argument(
+            "--queue", action="append", dest="queues", help="Queue to report (repeatable)."
+        )
+        parser.add_argument("--check", action="store_true", help="Fail if a p99 misses its SLO.")
+
+    def handle(self, *args, **options):
+        queues = options["queues"] or [queue.name for queue in settings.CELERY_TASK_QUEUES]
+        slo = queue_latency_settings()["SLO"]
+        summary = latency_summary(queues, minutes=options["minutes"])
+
+        self.stdout.write(
+            f"{'queue':<15} {'started':>8} {'expired':>8} {'p50 s':>8} {'p95 s':>8} "
+            f"{'p99 s':>8} {'slo s':>6}"
+        )
+        missed = []
+        for queue, result in summary.items():
+            target = slo.get(queue)
+            if target is not None and result["p99"] is not None and result["p99"] > target:
+                missed.append(queue)
+            self.stdout.write(
+                f"{queue:<15} {result['started']:8d} {result['expired']:8d} "
+                f"{_seconds(result['p50']):>8} {_seconds(result['p95']):>8} "
+                f"{_seconds(result['p99']):>8} {'-' if target is None else target:>6}"
+            )
+
+        if options["check"] and missed:
+            raise CommandError(f"p99 wait over SLO for: {', '.join(missed)}")
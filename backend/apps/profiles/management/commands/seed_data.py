@@ -0,0 +1,215 @@
+"""
+Bulk-generate realistic volumes of TailoRent data for load testing.
+"""
+
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.marketplace.models import NewsfeedPost, Product, Service, StyleFeed
+from apps.profiles.models import Follow, User
+
+# Share of generated users per role; every ROLE_CHOICES entry is represented.
+ROLE_WEIGHTS = {
+    "Customer": 0.70,
+    "Tailor": 0.10,
+    "Fashion_Designer": 0.08,
+    "Vendor": 0.10,
+    "Admin": 0.02,
+}
+FABRICS = [
+    "Ankara", "Aso Oke", "Adire", "Lace", "George", "Kente", "Damask", "Brocade",
+    "Chiffon", "Velvet", "Linen", "Silk", "Cotton", "Organza", "Batik", "Voile",
+]
+COLOURS = ["Royal blue", "Emerald", "Burgundy", "Gold", "Cream", "Navy", "Coral", "Black"]
+SERVICES = [
+    "Suit tailoring", "Agbada sewing", "Wedding gown design", "Alterations",
+    "Kaftan design", "Bespoke shirts", "Aso ebi styling", "Corset fitting",
+]
+CITIES = ["Lagos", "Abuja", "Port Harcourt", "Ibadan", "Enugu", "Kano", "Benin City"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users across all roles plus bookings, products, services, "
+        "follows and feed posts. Activity is Zipf-skewed towards popular accounts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--bookings", type=int, default=5000)
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--services", type=int, default=1000)
+        parser.add_argument("--style-posts", type=int, default=2000)
+        parser.add_argument("--newsfeed-posts", type=int, default=2000)
+        parser.add_argument("--follows", type=int, default=5000)
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent for picking active accounts (0 = uniform).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--password", default="seedpass123")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.skew = options["skew"]
+        self.now = timezone.now()
+        run = uuid.uuid4().hex[:8]
+
+        users = self.create_users(options["users"], options["password"], run)
+        customers = users["Customer"] or users["Vendor"]
+        professionals = users["Tailor"] + users["Fashion_Designer"]
+        vendors = users["Vendor"]
+        everyone = [pk for ids in users.values() for pk in ids]
+
+        if customers and professionals:
+            self.create_bookings(options["bookings"], customers, professionals)
+            self.create_follows(options["follows"], customers, professionals)
+        if vendors:
+            self.create_products(options["products"], vendors)
+        if professionals:
+            self.create_services(options["services"], professionals)
+            self.create_style_posts(options["style_posts"], professionals)
+        if everyone:
+            self.create_newsfeed_posts(options["newsfeed_posts"], everyone)
+
+        self.stdout.write(self.style.SUCCESS(f"Seed run {run} complete."))
+
+    # Helpers
+
+    def skewed(self, population, k):
+        """Pick ``k`` items, favouring the front of ``population`` by a Zipf law."""
+        weights = [1 / (rank + 1) ** self.skew for rank in range(len(population))]
+        return self.rng.choices(population, weights=weights, k=k)
+
+    def recent(self, days=365):
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def bulk(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size, ignore_conflicts=True)
+        self.stdout.write(f"  {model.__name__}: {len(objects)}")
+
+    # Generators
+
+    def create_users(self, count, password, run):
+        hashed = make_password(password)
+        roles = self.rng.choices(list(ROLE_WEIGHTS), weights=list(ROLE_WEIGHTS.values()), k=count)
+        self.bulk(
+            User,
+            [
+                User(
+                    email=f"seed-{run}-{i}@example.com",
+                    first_name=f"Seed{i}",
+                    last_name=role.replace("_", " "),
+                    role=role,
+                    address=self.rng.choice(CITIES),
+                    password=hashed,
+                    is_staff=role == "Admin",
+                    is_verified=True,
+                )
+                for i, role in enumerate(roles)
+            ],
+        )
+        # bulk_create does not return primary keys on MySQL, so read them back.
+        users = {role: [] for role in ROLE_WEIGHTS}
+        for pk, role in User.objects.filter(email__startswith=f"seed-{run}-").values_list(
+            "id", "role"
+        ):
+            users[role].append(pk)
+        for ids in users.values():
+            self.rng.shuffle(ids)
+        return users
+
+    def create_bookings(self, count, customers, professionals):
+        statuses = [value for value, _ in Booking.STATUS_CHOICES]
+        chosen = self.skewed(professionals, count)
+        self.bulk(
+            Booking,
+            [
+                Booking(
+                    customer_id=self.rng.choice(customers),
+                    professional_id=professional_id,
+                    service_type=self.rng.choice(SERVICES),
+                    date=self.recent() + timedelta(days=30),
+                    location=self.rng.choice(CITIES),
+                    status=self.rng.choice(statuses),
+                )
+                for professional_id in chosen
+            ],
+        )
+
+    def create_follows(self, count, customers, professionals):
+        self.bulk(
+            Follow,
+            [
+                Follow(follower_id=self.rng.choice(customers), followee_id=followee_id)
+                for followee_id in self.skewed(professionals, count)
+            ],
+        )
+
+    def create_products(self, count, vendors):
+        self.bulk(
+            Product,
+            [
+                Product(
+                    vendor_id=vendor_id,
+                    name=f"{self.rng.choice(COLOURS)} {self.rng.choice(FABRICS)}",
+                    description=(
+                        f"{self.rng.choice(FABRICS)} fabric, {self.rng.randint(2, 12)} yards, "
+                        f"sourced in {self.rng.choice(CITIES)}."
+                    ),
+                    price=Decimal(self.rng.randint(1500, 250000)) / 100,
+                )
+                for vendor_id in self.skewed(vendors, count)
+            ],
+        )
+
+    def create_services(self, count, professionals):
+        self.bulk(
+            Service,
+            [
+                Service(
+                    provider_id=provider_id,
+                    title=self.rng.choice(SERVICES),
+                    description=f"Available in {self.rng.choice(CITIES)}.",
+                    price=Decimal(self.rng.randint(5000, 500000)) / 100,
+                    available=self.rng.random() > 0.1,
+                )
+                for provider_id in self.skewed(professionals, count)
+            ],
+        )
+
+    def create_style_posts(self, count, professionals):
+        self.bulk(
+            StyleFeed,
+            [
+                StyleFeed(
+                    user_id=user_id,
+                    image=f"stylefeed/seed-{self.rng.randint(1, 50)}.jpg",
+                    caption=f"{self.rng.choice(COLOURS)} {self.rng.choice(FABRICS)} look",
+                )
+                for user_id in self.skewed(professionals, count)
+            ],
+        )
+
+    def create_newsfeed_posts(self, count, users):
+        self.bulk(
+            NewsfeedPost,
+            [
+                NewsfeedPost(
+                    user_id=user_id,
+                    content=f"Fresh {self.rng.choice(FABRICS)} just arrived in {self.rng.choice(CITIES)}!",
+                )
+                for user_id in self.skewed(users, count)
+            ],
+        )
@@ -0,0 +1,51 @@
+"""
+List the worst SQL shapes and slowest statements recorded by the slow-query
+log across all processes (see config.slow_queries).
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from config.slow_queries import ORDERINGS, top_offenders
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the top query shapes per view or task by total, count, max or "
+        "average time, and the slowest statements with their EXPLAIN output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--order-by", choices=ORDERINGS, default="total_ms")
+        parser.add_argument("--context", help="Only this view or task name.")
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the slow statements and their plans."
+        )
+
+    def handle(self, *args, **options):
+        shapes, slow = top_offenders(options["limit"], options["order_by"], options["context"])
+
+        self.stdout.write(
+            f"{'count':>8} {'total ms':>11} {'avg ms':>9} {'max ms':>9}  context / shape"
+        )
+        for row in shapes:
+            self.stdout.write(
+                f"{row['count']:8d} {row['total_ms']:11.1f} {row['avg_ms']:9.2f} "
+                f"{row['max_ms']:9.1f}  {row['context']}"
+            )
+            self.stdout.write(f"{'':40}{row['fingerprint'][:200]}")
+        if not shapes:
+            self.stdout.write("No queries recorded.")
+
+        if not options["plans"]:
+            return
+        self.stdout.write(f"\nSlowest statements ({len(slow)}):")
+        for entry in slow:
+            at = datetime.fromtimestamp(entry["at"]).isoformat(timespec="seconds")
+            self.stdout.write(
+                f"\n{entry['ms']:.1f} ms  {entry['context']}  {at}  request={entry['request_id'] or '-'}"
+            )
+            self.stdout.write(entry["fingerprint"])
+            self.stdout.write(entry["plan"] or "(no plan captured)")
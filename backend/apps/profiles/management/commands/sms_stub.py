@@ -0,0 +1,32 @@
+"""
+Run a local SMS provider stub for development (see apps.profiles.sms).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.profiles.sms import StubSMSServer
+
+
+class Command(BaseCommand):
+    help = "Accept SMS sends from HTTPStubProvider locally and print them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--latency-ms", type=float, default=0, help="Delay every response.")
+        parser.add_argument("--rate-limit", type=float, help="Answer 429 above this many per second.")
+
+    def handle(self, *args, **options):
+        server = StubSMSServer(
+            (options["host"], options["port"]),
+            latency=options["latency_ms"] / 1000,
+            rate_limit=options["rate_limit"],
+        )
+        self.stdout.write(f"SMS stub listening on {server.url} (set SMS_STUB_URL to use it)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"{len(server.messages)} messages received")
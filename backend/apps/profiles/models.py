@@ -32,22 +32,6 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
-    def get_full_name(self):
-        """Returns the user's full name if available, otherwise email/phone"""
-        name = f"{self.first_name or ''} {self.last_name or ''}".strip()
-        return name or self.email or self.phone_number
-
-    def get_role_display_color(self):
-        """Returns Tailwind color class based on role"""
-        color_map = {
-            "Fashion_Designer": "purple",
-            "Tailor": "blue",
-            "Vendor": "green",
-            "Customer": "gray",
-            "Admin": "red",
-        }
-        return color_map.get(self.role, "gray")
-
     def create_superuser(
         self, email=None, password=None, phone_number=None, **extra_fields
     ):
@@ -109,6 +93,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"  # Email is the login identifier
     REQUIRED_FIELDS = ["role"]  # This is required when creating a user
 
+    class Meta:
+        indexes = [
+            # Admin changelist ordering and its prefix searches on names.
+            models.Index(fields=["-date_joined"], name="user_date_joined_idx"),
+            models.Index(fields=["first_name"], name="user_first_name_idx"),
+            models.Index(fields=["last_name"], name="user_last_name_idx"),
+            # Keyset pages of the professional directory, newest first.
+            models.Index(fields=["role", "is_active", "-id"], name="user_directory_idx"),
+        ]
+
     def __str__(self):
         """
         Return a string represenative of the user, showing email or phone number.
@@ -117,6 +111,44 @@ class User(AbstractBaseUser, PermissionsMixin):
             self.email if self.email else self.phone_number
         )  # show either email or phone number
 
+    def get_full_name(self):
+        """Returns the user's full name if available, otherwise email/phone"""
+        name = f"{self.first_name or ''} {self.last_name or ''}".strip()
+        return name or self.email or self.phone_number
+
+    def get_role_display_color(self):
+        """Returns Tailwind color class based on role"""
+        color_map = {
+            "Fashion_Designer": "purple",
+            "Tailor": "blue",
+            "Vendor": "green",
+            "Customer": "gray",
+            "Admin": "red",
+        }
+        return color_map.get(self.role, "gray")
+
+
+class Follow(models.Model):
+    """A user following a tailor or fashion designer's style posts."""
+
+    follower = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="following"
+    )
+    followee = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="followers"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followee"], name="unique_follow"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} follows {self.followee_id}"
+
 
 class OTPDevice(Device):
     """Custom OTP device for SMS and email verification."""
@@ -162,3 +194,45 @@ class PhoneVerification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class Notification(models.Model):
+    """
+    Outbox row for an email to a user. Written in the same transaction as the
+    change that causes it and delivered in batches by
+    apps.profiles.notifications.dispatch().
+    """
+
+    VERIFY_EMAIL = "verify_email"
+    WELCOME = "welcome"
+    BOOKING_CONFIRMED = "booking_confirmed"
+    KIND_CHOICES = (
+        (VERIFY_EMAIL, "Verify email"),
+        (WELCOME, "Welcome"),
+        (BOOKING_CONFIRMED, "Booking confirmed"),
+    )
+
+    recipient = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="notifications"
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    booking = models.ForeignKey(
+        "bookings.Booking",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    context = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sent_at", "id"], name="notification_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.recipient_id}"
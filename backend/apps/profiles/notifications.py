@@ -0,0 +1,182 @@
+"""
+Transactional email outbox.
+
+``notify()`` writes a Notification row in the caller's transaction, so an
+email is only ever sent for a change that committed, and asks for a
+dispatch once the transaction commits. Dispatch requests are debounced:
+every signup or booking in a ``DISPATCH_DELAY`` window shares one broker
+message, and a periodic sweep picks up anything a lost message left behind.
+
+``dispatch()`` drains the outbox in batches. One query loads a batch with
+its recipients and bookings, all messages for the same recipient are merged
+into one email, and the whole batch goes out over a single mail connection.
+Delivery is at least once: a crash between sending and committing the batch
+resends it.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger("tailorent.notifications")
+
+NOTIFICATIONS_DEFAULTS = {
+    "BATCH_SIZE": 200,
+    # Notifications that failed this many times are left for inspection.
+    "MAX_ATTEMPTS": 5,
+    # Seconds a dispatch waits so the requests in that window share one task.
+    "DISPATCH_DELAY": 2,
+}
+
+DISPATCH_REQUESTED_KEY = "notifications:dispatch-requested"
+
+SIGN_OFF = "Best regards,\nThe TailoRent Team"
+
+
+def notifications_settings():
+    return {**NOTIFICATIONS_DEFAULTS, **getattr(settings, "NOTIFICATIONS", {})}
+
+
+def notify(recipient_id, kind, booking=None, **context):
+    """Queue a ``kind`` email to the user ``recipient_id``; sent after commit."""
+    notification = Notification.objects.create(
+        recipient_id=recipient_id, kind=kind, booking=booking, context=context
+    )
+    transaction.on_commit(request_dispatch)
+    return notification
+
+
+def request_dispatch():
+    """Publish one dispatch task per DISPATCH_DELAY window."""
+    from .tasks import dispatch_notifications
+
+    delay = notifications_settings()["DISPATCH_DELAY"]
+    if cache.add(DISPATCH_REQUESTED_KEY, True, delay):
+        dispatch_notifications.apply_async(countdown=delay)
+
+
+# Rendering. Each returns (subject, body) for one notification.
+
+
+def render_verify_email(notification):
+    return (
+        "Verify Your TailoRent Account",
+        "Please click the link below to verify your email address:\n\n"
+        f"{notification.context['verification_url']}\n\n"
+        "If you didn't create an account with us, please ignore this email.",
+    )
+
+
+def render_welcome(notification):
+    return (
+        "Welcome to TailoRent!",
+        "Welcome to TailoRent! Your account has been successfully created.\n\n"
+        "You can now:\n"
+        "- Browse and book services from talented tailors and fashion designers\n"
+        "- List your own services if you're a professional\n"
+        "- Connect with the fashion community\n\n"
+        "Get started by visiting our platform and exploring the available services.",
+    )
+
+
+def render_booking_confirmed(notification):
+    booking = notification.booking
+    return (
+        "Booking Confirmation - TailoRent",
+        "Your booking has been confirmed!\n\n"
+        f"Service: {booking.service_type}\n"
+        f"Professional: {booking.professional.get_full_name()}\n"
+        f"Date: {booking.date}\n"
+        f"Location: {booking.location or 'To be discussed'}\n\n"
+        "You can track your booking status in your dashboard.",
+    )
+
+
+RENDERERS = {
+    Notification.VERIFY_EMAIL: render_verify_email,
+    Notification.WELCOME: render_welcome,
+    Notification.BOOKING_CONFIRMED: render_booking_confirmed,
+}
+
+
+def build_message(recipient, notifications):
+    """One email for all of a recipient's pending notifications, oldest first."""
+    parts = [RENDERERS[notification.kind](notification) for notification in notifications]
+    subject = parts[0][0]
+    if len(parts) > 1:
+        subject = f"{subject} (+{len(parts) - 1} more)"
+    body = "\n\n".join(
+        [f"Hi {recipient.first_name or 'there'},"]
+        + [text if len(parts) == 1 else f"{title}\n\n{text}" for title, text in parts]
+        + [SIGN_OFF]
+    )
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient.email])
+
+
+def pending():
+    config = notifications_settings()
+    return (
+        Notification.objects.filter(sent_at__isnull=True, attempts__lt=config["MAX_ATTEMPTS"])
+        .select_related("recipient", "booking__professional")
+        .order_by("id")
+    )
+
+
+def dispatch(batch_size=None):
+    """Send every pending notification; returns how many were sent."""
+    batch_size = batch_size or notifications_settings()["BATCH_SIZE"]
+    sent = failed = batches = last_id = 0
+    with get_connection() as connection:
+        while True:
+            with transaction.atomic():
+                # Concurrent dispatchers skip each other's rows instead of waiting.
+                batch = list(
+                    pending()
+                    .filter(id__gt=last_id)
+                    .select_for_update(skip_locked=True, of=("self",))[:batch_size]
+                )
+                if not batch:
+                    break
+                batches += 1
+                # Failures are retried by the next dispatch, not within this one.
+                last_id = batch[-1].id
+                by_recipient = defaultdict(list)
+                for notification in batch:
+                    by_recipient[notification.recipient].append(notification)
+
+                delivered, errors = [], defaultdict(list)
+                for recipient, notifications in by_recipient.items():
+                    ids = [notification.id for notification in notifications]
+                    if not recipient.email:
+                        errors["Recipient has no email address."].extend(ids)
+                        continue
+                    try:
+                        connection.send_messages([build_message(recipient, notifications)])
+                    except Exception as exc:
+                        logger.warning(
+                            "notification send failed recipient=%s error=%s", recipient.pk, exc
+                        )
+                        errors[str(exc)[:500]].extend(ids)
+                    else:
+                        delivered.extend(ids)
+
+                Notification.objects.filter(id__in=delivered).update(sent_at=timezone.now())
+                for error, ids in errors.items():
+                    Notification.objects.filter(id__in=ids).update(
+                        attempts=F("attempts") + 1, last_error=error
+                    )
+                sent += len(delivered)
+                failed += len(batch) - len(delivered)
+            if len(batch) < batch_size:
+                break
+    if batches:
+        logger.info("notifications dispatched sent=%d failed=%d batches=%d", sent, failed, batches)
+    return sent
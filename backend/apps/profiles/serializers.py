@@ -2,13 +2,26 @@
 Serializers for profiles app.
 """
 
+from asgiref.sync import sync_to_async
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import User, EmailVerification, PhoneVerification
-from .tasks import send_verification_email, send_otp_sms, send_welcome_email
+from django.db import transaction
+from .models import User, EmailVerification, Notification, PhoneVerification
+from .notifications import notify
+from .tasks import send_otp_sms
+import random
 import uuid
+from config.async_views import apublish
+
+
+def email_verification_url(verification):
+    return f"http://localhost:3000/verify-email/{verification.token}/"
+
+
+def generate_otp():
+    return str(random.randint(100000, 999999))
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -53,22 +66,28 @@ class RegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop("password_confirm")
         password = validated_data.pop("password")
 
-        user = User.objects.create_user(password=password, **validated_data)
-
-        # Send verification email if email provided
-        if user.email:
-            verification = EmailVerification.objects.create(user=user)
-            verification_url = (
-                f"http://localhost:3000/verify-email/{verification.token}/"
-            )
-            send_verification_email.delay(user.id, verification_url)
+        # The user, the verification token and the outbox rows commit together,
+        # so the emails never reference a user that doesn't exist yet.
+        with transaction.atomic():
+            user = User.objects.create_user(password=password, **validated_data)
 
-        # Send welcome email
-        if user.email:
-            send_welcome_email.delay(user.id)
+            if user.email:
+                verification = EmailVerification.objects.create(user=user)
+                notify(
+                    user.id,
+                    Notification.VERIFY_EMAIL,
+                    verification_url=email_verification_url(verification),
+                )
+                notify(user.id, Notification.WELCOME)
 
         return user
 
+    async def acreate(self, validated_data):
+        """Async create() for AsyncRegistrationView."""
+        # Password hashing is deliberately slow and the outbox needs a
+        # transaction, so this runs in a thread off the event loop.
+        return await sync_to_async(self.create)(validated_data)
+
 
 class LoginSerializer(serializers.Serializer):
     """Serializer for user login."""
@@ -123,9 +142,7 @@ class OTPLoginSerializer(serializers.Serializer):
         )
 
         # Generate OTP
-        import random
-
-        otp_code = str(random.randint(100000, 999999))
+        otp_code = generate_otp()
 
         # Create phone verification record
         PhoneVerification.objects.create(
@@ -137,6 +154,19 @@ class OTPLoginSerializer(serializers.Serializer):
 
         return {"message": "OTP sent successfully", "phone_number": phone_number}
 
+    async def acreate(self, validated_data):
+        """Async create() for AsyncOTPLoginView."""
+        phone_number = validated_data["phone_number"]
+        user, created = await User.objects.aget_or_create(
+            phone_number=phone_number, defaults={"role": "Customer"}
+        )
+        otp_code = generate_otp()
+        await PhoneVerification.objects.acreate(
+            user=user, phone_number=phone_number, otp_code=otp_code
+        )
+        await apublish(send_otp_sms, phone_number, otp_code)
+        return {"message": "OTP sent successfully", "phone_number": phone_number}
+
 
 class OTPVerifySerializer(serializers.Serializer):
     """Serializer for OTP verification."""
@@ -206,6 +236,21 @@ class EmailVerificationSerializer(serializers.Serializer):
 
         return user
 
+    async def asave(self):
+        """Async save() for AsyncEmailVerificationView."""
+        token = self.validated_data["token"]
+        verification = await EmailVerification.objects.select_related("user").aget(
+            token=token
+        )
+        verification.is_used = True
+        await verification.asave(update_fields=["is_used"])
+
+        user = verification.user
+        user.is_verified = True
+        await user.asave(update_fields=["is_verified"])
+
+        return user
+
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
     """Serializer for profile updates."""
@@ -0,0 +1,10 @@
+"""
+Signal handlers for profiles models.
+"""
+
+from config.cache import track_model
+
+from .models import User
+
+# Professional cards and profile fragments are tagged with their user.
+track_model(User)
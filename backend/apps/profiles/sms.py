@@ -0,0 +1,340 @@
+"""
+SMS gateway: pluggable providers behind one pooled HTTP session.
+
+Every message goes through ``SMSGateway``, which keeps a single keep-alive
+``requests.Session`` per process and sends batches on a bounded thread pool,
+so a bulk task pays for its HTTP round trips ``CONCURRENCY`` at a time
+instead of one after another. Each provider has a token-bucket rate limit;
+a provider that answers 429 or fails is retried with exponential backoff,
+then the next provider in ``PROVIDERS`` is tried. A provider that refuses
+our credentials (401/403) is skipped straight away.
+
+Providers are configured in ``settings.SMS``::
+
+    SMS = {
+        "PROVIDERS": [
+            {"BACKEND": "apps.profiles.sms.TwilioProvider", "RATE_LIMIT": 50},
+            {"BACKEND": "apps.profiles.sms.HTTPStubProvider", "URL": "http://localhost:8025/"},
+        ],
+    }
+
+``HTTPStubProvider`` posts to a local ``StubSMSServer`` (``manage.py
+sms_stub``), so development and tests exercise the real HTTP path without
+sending anything.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("tailorent.sms")
+
+SMS_DEFAULTS = {
+    "PROVIDERS": [{"BACKEND": "apps.profiles.sms.TwilioProvider"}],
+    # Messages in flight at once per process.
+    "CONCURRENCY": 20,
+    "TIMEOUT": 10.0,
+    # Attempts per provider before falling back to the next one.
+    "MAX_ATTEMPTS": 3,
+    # Seconds before the first retry; doubles on each attempt.
+    "BACKOFF": 0.5,
+}
+
+
+def sms_settings():
+    return {**SMS_DEFAULTS, **getattr(settings, "SMS", {})}
+
+
+class SMSError(Exception):
+    """A provider failed to accept a message."""
+
+
+class SMSRejected(SMSError):
+    """The message itself was refused (bad number, blocked body); not retried."""
+
+
+class ProviderRefused(SMSError):
+    """The provider refused the account (bad credentials, suspended); try the next one."""
+
+
+class RateLimited(SMSError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class SMSResult:
+    to: str
+    sent: bool
+    provider: str = ""
+    message_id: str = ""
+    error: str = ""
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing ``rate`` sends per second."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while wait := self.try_acquire():
+            time.sleep(wait)
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class SMSProvider:
+    """Base class; ``send()`` returns the provider's message id or raises SMSError."""
+
+    def __init__(self, name=None, rate_limit=None, **options):
+        self.name = name or type(self).__name__
+        self.limiter = RateLimiter(rate_limit)
+
+    def send(self, session, to, body, timeout):
+        raise NotImplementedError
+
+    def check(self, response):
+        if response.status_code == 429:
+            raise RateLimited(f"{self.name} rate limited", _retry_after(response))
+        if response.status_code >= 500:
+            raise SMSError(f"{self.name} returned {response.status_code}: {response.text[:200]}")
+        if response.status_code in (401, 403):
+            raise ProviderRefused(
+                f"{self.name} returned {response.status_code}: {response.text[:200]}"
+            )
+        if response.status_code >= 400:
+            raise SMSRejected(f"{self.name} returned {response.status_code}: {response.text[:200]}")
+
+
+class TwilioProvider(SMSProvider):
+    """Twilio's Messages REST API, called directly over the shared session."""
+
+    API_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+
+    def __init__(self, account_sid=None, auth_token=None, from_number=None, **options):
+        super().__init__(**options)
+        self.account_sid = account_sid or settings.TWILIO_ACCOUNT_SID
+        self.auth_token = auth_token or settings.TWILIO_AUTH_TOKEN
+        self.from_number = from_number or settings.TWILIO_PHONE_NUMBER
+
+    def send(self, session, to, body, timeout):
+        response = session.post(
+            self.API_URL.format(sid=self.account_sid),
+            data={"To": to, "From": self.from_number, "Body": body},
+            auth=(self.account_sid, self.auth_token),
+            timeout=timeout,
+        )
+        self.check(response)
+        return response.json().get("sid", "")
+
+
+class HTTPStubProvider(SMSProvider):
+    """Posts ``{"to", "body"}`` as JSON to a local stub such as StubSMSServer."""
+
+    def __init__(self, url="http://localhost:8025/", **options):
+        super().__init__(**options)
+        self.url = url
+
+    def send(self, session, to, body, timeout):
+        response = session.post(self.url, json={"to": to, "body": body}, timeout=timeout)
+        self.check(response)
+        return response.json().get("id", "")
+
+
+def build_provider(config):
+    options = {key.lower(): value for key, value in config.items() if key != "BACKEND"}
+    return import_string(config["BACKEND"])(**options)
+
+
+class SMSGateway:
+    def __init__(self, providers, concurrency=20, timeout=10.0, max_attempts=3, backoff=0.5):
+        self.providers = providers
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.session = requests.Session()
+        # One keep-alive connection per worker thread to each provider host.
+        adapter = HTTPAdapter(pool_connections=len(providers), pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix="sms")
+
+    @classmethod
+    def from_settings(cls):
+        config = sms_settings()
+        return cls(
+            [build_provider(provider) for provider in config["PROVIDERS"]],
+            concurrency=config["CONCURRENCY"],
+            timeout=config["TIMEOUT"],
+            max_attempts=config["MAX_ATTEMPTS"],
+            backoff=config["BACKOFF"],
+        )
+
+    def send(self, to, body):
+        """Send one message, trying each provider in turn; returns an SMSResult."""
+        errors = []
+        for provider in self.providers:
+            for attempt in range(self.max_attempts):
+                provider.limiter.acquire()
+                try:
+                    message_id = provider.send(self.session, to, body, self.timeout)
+                except SMSRejected as exc:
+                    logger.warning("sms rejected to=%s error=%s", to, exc)
+                    return SMSResult(to, False, provider.name, error=str(exc))
+                except ProviderRefused as exc:
+                    logger.error("sms provider refused provider=%s error=%s", provider.name, exc)
+                    errors.append(f"{provider.name}: {exc}")
+                    break
+                except (SMSError, requests.RequestException) as exc:
+                    errors.append(f"{provider.name}: {exc}")
+                    if attempt + 1 < self.max_attempts:
+                        delay = self.backoff * 2**attempt
+                        if isinstance(exc, RateLimited) and exc.retry_after:
+                            delay = max(delay, exc.retry_after)
+                        time.sleep(delay)
+                    continue
+                return SMSResult(to, True, provider.name, message_id)
+        logger.warning("sms send failed to=%s errors=%s", to, "; ".join(errors))
+        return SMSResult(to, False, error="; ".join(errors))
+
+    def send_many(self, messages):
+        """Send ``(to, body)`` pairs concurrently; results are in input order."""
+        return list(self._executor.map(lambda message: self.send(*message), messages))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+_gateway = None
+_gateway_pid = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """This process's gateway; forked children build their own."""
+    global _gateway, _gateway_pid
+    with _gateway_lock:
+        if _gateway is None or _gateway_pid != os.getpid():
+            _gateway, _gateway_pid = SMSGateway.from_settings(), os.getpid()
+        return _gateway
+
+
+def reset_gateway():
+    """Drop the cached gateway so the next call re-reads settings.SMS."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None and _gateway_pid == os.getpid():
+            _gateway.close()
+        _gateway = None
+
+
+# Local stub
+
+
+class StubSMSServer(ThreadingHTTPServer):
+    """
+    HTTP server that accepts HTTPStubProvider posts and records them in
+    ``messages``. ``latency`` simulates a provider's response time and
+    ``rate_limit`` (messages per second) makes it answer 429 when exceeded.
+    ``status`` makes it answer every request with that error status.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, rate_limit=None, status=None):
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.messages = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name="sms-stub").start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def accept(self):
+        """Return False if this request is over the rate limit."""
+        return self.limiter is None or not self.limiter.try_acquire()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real provider
+    # Headers and body are separate writes; don't let Nagle hold the body back.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if server.latency:
+            time.sleep(server.latency)
+        with server._lock:
+            server.requests += 1
+        if server.status:
+            self.respond(server.status, {"error": "refused"})
+            return
+        if not server.accept():
+            self.respond(429, {"error": "rate limited"}, {"Retry-After": "0.1"})
+            return
+        with server._lock:
+            server.messages.append(payload)
+            message_id = f"stub-{len(server.messages)}"
+        self.respond(201, {"id": message_id})
+
+    def respond(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("sms stub " + format, *args)
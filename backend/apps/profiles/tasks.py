@@ -3,150 +3,89 @@ Celery tasks for profiles app.
 """
 
 from celery import shared_task
-from django.conf import settings
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
-from twilio.rest import Client
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@shared_task(expires=5 * 60)  # the periodic sweep publishes a fresh one
+def dispatch_notifications():
+    """Send pending outbox notifications (see apps.profiles.notifications)."""
+    from .notifications import dispatch
+
+    return dispatch()
+
+
+@shared_task(expires=10 * 60)  # the code itself expires after 10 minutes
+def send_otp_sms(phone_number, otp_code):
+    """Send an OTP code by SMS through the gateway (see apps.profiles.sms)."""
+    # Imported here so web workers that never send SMS don't load requests.
+    from .sms import SMSError, get_gateway
+
+    result = get_gateway().send(
+        phone_number,
+        f"Your TailoRent verification code is: {otp_code}. This code expires in 10 minutes.",
+    )
+    if not result.sent:
+        raise SMSError(result.error)
+    logger.info("OTP SMS sent to=%s provider=%s", phone_number, result.provider)
+    return result.message_id
+
+
 @shared_task
-def send_verification_email(user_id, verification_url):
-    """Send email verification to user."""
-    try:
-        from .models import User
-
-        user = User.objects.get(id=user_id)
-
-        subject = "Verify Your TailoRent Account"
-        message = f"""
-        Hi {user.first_name or 'there'},
-        
-        Welcome to TailoRent! Please click the link below to verify your email address:
-        
-        {verification_url}
-        
-        If you didn't create an account with us, please ignore this email.
-        
-        Best regards,
-        The TailoRent Team
-        """
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-
-        logger.info(f"Verification email sent to {user.email}")
-        return f"Verification email sent to {user.email}"
-
-    except Exception as e:
-        logger.error(f"Failed to send verification email: {str(e)}")
-        raise
+def send_bulk_sms(messages):
+    """Send ``[to, body]`` pairs concurrently from one task; returns counts."""
+    from .sms import get_gateway
+
+    results = get_gateway().send_many(messages)
+    sent = sum(result.sent for result in results)
+    logger.info("bulk SMS sent=%d failed=%d", sent, len(results) - sent)
+    return {"sent": sent, "failed": len(results) - sent}
 
 
 @shared_task
-def send_otp_sms(phone_number, otp_code):
-    """Send OTP via SMS using Twilio."""
-    try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+def deactivate_users(selection):
+    """Deactivate users selected in the admin, a chunk at a time."""
+    from config.admin import selection_chunks
+
+    from .models import User
 
-        message = client.messages.create(
-            body=f"Your TailoRent verification code is: {otp_code}. This code expires in 10 minutes.",
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=phone_number,
-        )
+    updated = 0
+    for user_ids in selection_chunks(selection):
+        updated += User.objects.filter(id__in=user_ids, is_active=True).update(is_active=False)
+    logger.info("Deactivated %s users", updated)
+    return updated
 
-        logger.info(f"OTP SMS sent to {phone_number}")
-        return f"OTP SMS sent to {phone_number}"
 
-    except Exception as e:
-        logger.error(f"Failed to send OTP SMS: {str(e)}")
-        raise
+# The three tasks below only exist so messages queued before the outbox
+# still deliver; new code calls apps.profiles.notifications.notify().
+
+
+@shared_task
+def send_verification_email(user_id, verification_url):
+    """Queue an email verification notification for the user."""
+    from .models import Notification
+    from .notifications import notify
+
+    notify(user_id, Notification.VERIFY_EMAIL, verification_url=verification_url)
 
 
 @shared_task
 def send_welcome_email(user_id):
-    """Send welcome email to new user."""
-    try:
-        from .models import User
-
-        user = User.objects.get(id=user_id)
-
-        subject = "Welcome to TailoRent!"
-        message = f"""
-        Hi {user.first_name or 'there'},
-        
-        Welcome to TailoRent! Your account has been successfully created.
-        
-        You can now:
-        - Browse and book services from talented tailors and fashion designers
-        - List your own services if you're a professional
-        - Connect with the fashion community
-        
-        Get started by visiting our platform and exploring the available services.
-        
-        Best regards,
-        The TailoRent Team
-        """
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-
-        logger.info(f"Welcome email sent to {user.email}")
-        return f"Welcome email sent to {user.email}"
-
-    except Exception as e:
-        logger.error(f"Failed to send welcome email: {str(e)}")
-        raise
+    """Queue a welcome notification for the user."""
+    from .models import Notification
+    from .notifications import notify
+
+    notify(user_id, Notification.WELCOME)
 
 
 @shared_task
 def send_booking_confirmation_email(booking_id):
-    """Send booking confirmation email."""
-    try:
-        from apps.bookings.models import Booking
-
-        booking = Booking.objects.get(id=booking_id)
-
-        subject = "Booking Confirmation - TailoRent"
-        message = f"""
-        Hi {booking.customer.first_name or 'there'},
-        
-        Your booking has been confirmed!
-        
-        Service: {booking.service_type}
-        Professional: {booking.professional.get_full_name()}
-        Date: {booking.date}
-        Location: {booking.location or 'To be discussed'}
-        
-        You can track your booking status in your dashboard.
-        
-        Best regards,
-        The TailoRent Team
-        """
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.customer.email],
-            fail_silently=False,
-        )
-
-        logger.info(f"Booking confirmation email sent to {booking.customer.email}")
-        return f"Booking confirmation email sent to {booking.customer.email}"
-
-    except Exception as e:
-        logger.error(f"Failed to send booking confirmation email: {str(e)}")
-        raise
+    """Queue a booking confirmation notification for the customer."""
+    from apps.bookings.models import Booking
+    from .models import Notification
+    from .notifications import notify
+
+    booking = Booking.objects.get(id=booking_id)
+    notify(booking.customer_id, Notification.BOOKING_CONFIRMED, booking=booking)
@@ -0,0 +1,74 @@
+"""
+``{% cachefragment %}``: cache part of a template until the rows it shows change.
+
+    {% load fragments %}
+    {% cachefragment "professional_card" professional %}
+        ...
+    {% endcachefragment %}
+
+The arguments after the name are what the fragment depends on: model
+instances, model classes or tag strings (see config.cache). The rendered
+HTML is stored in the tiered cache under those tags, so saving a tracked
+row re-renders every fragment that shows it. Per-user content only belongs
+in a fragment that lists the user as a dependency.
+"""
+
+from django import template
+from django.conf import settings
+from django.db.models import Model
+
+from config.cache import TieredCache, model_tag
+
+register = template.Library()
+
+FRAGMENT_CACHE_DEFAULTS = {
+    "ENABLED": True,
+    "TIMEOUT": 60 * 60,
+}
+
+fragment_cache = TieredCache("fragments", timeout=FRAGMENT_CACHE_DEFAULTS["TIMEOUT"])
+
+
+def fragment_cache_settings():
+    return {**FRAGMENT_CACHE_DEFAULTS, **getattr(settings, "FRAGMENT_CACHE", {})}
+
+
+def dependency_tag(item):
+    if isinstance(item, Model):
+        return model_tag(type(item), item.pk)
+    if isinstance(item, type) and issubclass(item, Model):
+        return model_tag(item)
+    return str(item)
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, dependencies):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+
+    def render(self, context):
+        config = fragment_cache_settings()
+        if not config["ENABLED"]:
+            return self.nodelist.render(context)
+        tags = [dependency_tag(dependency.resolve(context)) for dependency in self.dependencies]
+        return fragment_cache.get_or_set(
+            ":".join([str(self.name.resolve(context)), *tags]),
+            lambda: self.nodelist.render(context),
+            tags=tags,
+            timeout=config["TIMEOUT"],
+        )
+
+
+@register.tag
+def cachefragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(("endcachefragment",))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
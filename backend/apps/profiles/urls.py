@@ -1,15 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = "profiles"
 
+# Under ASGI the I/O-bound auth endpoints can be served by native async views.
+if settings.ASYNC_AUTH_VIEWS:
+    registration_view = views.AsyncRegistrationView
+    otp_login_view = views.AsyncOTPLoginView
+    email_verification_view = views.AsyncEmailVerificationView
+else:
+    registration_view = views.RegistrationView
+    otp_login_view = views.OTPLoginView
+    email_verification_view = views.EmailVerificationView
+
 urlpatterns = [
     # API Endpoints
-    path("register/", views.RegistrationView.as_view(), name="register"),
+    path("register/", registration_view.as_view(), name="register"),
     path("login/", views.LoginView.as_view(), name="login"),
-    path("otp-login/", views.OTPLoginView.as_view(), name="otp-login"),
+    path("otp-login/", otp_login_view.as_view(), name="otp-login"),
     path("otp-verify/", views.OTPVerifyView.as_view(), name="otp-verify"),
-    path("email-verify/", views.EmailVerificationView.as_view(), name="email-verify"),
+    path("email-verify/", email_verification_view.as_view(), name="email-verify"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
     path("profile-update/", views.ProfileUpdateView.as_view(), name="profile-update"),
     path("dashboard/", views.DashboardView.as_view(), name="dashboard"),
@@ -17,7 +28,18 @@ urlpatterns = [
         "change-password/", views.ChangePasswordView.as_view(), name="change-password"
     ),
     path("professionals/", views.ProfessionalListView.as_view(), name="professionals"),
+    path(
+        "professionals/<int:pk>/follow/", views.FollowView.as_view(), name="follow"
+    ),
     # Template Views
+    path("home/", views.home_view, name="home"),
+    path("about/", views.about_view, name="about"),
+    path("dashboard-template/", views.dashboard_view, name="dashboard-template"),
+    path(
+        "professionals-template/",
+        views.professional_list_view,
+        name="professionals-template",
+    ),
     path("signup/", views.Signup_view, name="signup"),
     path("custom-login/", views.custom_login_view, name="custom-login"),
     path("logout-template/", views.logout_view, name="logout-template"),
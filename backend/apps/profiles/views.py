@@ -16,9 +16,11 @@ from .serializers import (
     EmailVerificationSerializer,
 )
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import EmailVerification, PhoneVerification
-from .tasks import send_verification_email, send_welcome_email
+from apps.marketplace.tasks import backfill_timeline
+from config.async_views import AsyncAPIView
+from .models import EmailVerification, PhoneVerification, Follow
 
 User = get_user_model()
 
@@ -147,6 +149,59 @@ class EmailVerificationView(generics.GenericAPIView):
         )
 
 
+# Async variants of the auth endpoints above, used under ASGI when
+# settings.ASYNC_AUTH_VIEWS is on. Responses are identical.
+
+
+class AsyncRegistrationView(AsyncAPIView):
+    serializer_class = RegistrationSerializer
+
+    async def post(self, request, *args, **kwargs):
+        serializer = await self.validated_serializer(request)
+        user = await serializer.acreate(serializer.validated_data)
+        return self.respond(
+            {
+                "message": "User registered successfully",
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "phone_number": user.phone_number,
+                    "role": user.role,
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncOTPLoginView(AsyncAPIView):
+    serializer_class = OTPLoginSerializer
+    validation_queries = False
+
+    async def post(self, request, *args, **kwargs):
+        serializer = await self.validated_serializer(request)
+        data = await serializer.acreate(serializer.validated_data)
+        return self.respond(data, status=status.HTTP_200_OK)
+
+
+class AsyncEmailVerificationView(AsyncAPIView):
+    serializer_class = EmailVerificationSerializer
+
+    async def post(self, request, *args, **kwargs):
+        serializer = await self.validated_serializer(request)
+        user = await serializer.asave()
+        return self.respond(
+            {
+                "message": "Email verified successfully",
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "is_verified": user.is_verified,
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class LogoutView(generics.GenericAPIView):
     serializer_class = LogoutSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -207,6 +262,53 @@ class ProfessionalListView(generics.ListAPIView):
         )
 
 
+class FollowView(generics.GenericAPIView):
+    """
+    Follow (POST) or unfollow (DELETE) a tailor or fashion designer.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_followee(self):
+        return get_object_or_404(
+            User,
+            pk=self.kwargs["pk"],
+            role__in=["Tailor", "Fashion_Designer"],
+            is_active=True,
+        )
+
+    def post(self, request, *args, **kwargs):
+        followee = self.get_followee()
+        if followee.pk == request.user.pk:
+            return Response(
+                {"detail": "You cannot follow yourself."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        _, created = Follow.objects.get_or_create(
+            follower=request.user, followee=followee
+        )
+        if created:
+            transaction.on_commit(
+                lambda: backfill_timeline.delay(request.user.pk, followee.pk)
+            )
+        return Response(
+            {"message": f"You are now following user {followee.pk}."},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, *args, **kwargs):
+        from apps.marketplace.timelines import remove_from_timeline
+
+        followee = self.get_followee()
+        deleted, _ = Follow.objects.filter(
+            follower=request.user, followee=followee
+        ).delete()
+        if deleted:
+            remove_from_timeline(request.user.pk, followee.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # TEMPLATE VIEWS
 
 from django.shortcuts import render, get_object_or_404
@@ -216,12 +318,16 @@ from profiles.models import User
 from bookings.models import Booking
 from marketplace.models import Product, Service
 from marketplace.models import NewsfeedPost
+from apps.marketplace.views import newsfeed_view
+from apps.bookings.recommendations import recommended_professionals
 from django.contrib.auth import authenticate, login, logout
 from .forms import SignUpForm, ProfileUpdateForm, LoginForm
 from django.shortcuts import redirect
 from django.contrib.auth.views import LoginView as DjangoLoginView
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseBadRequest
+from config.pages import static_page
+from .directory import InvalidCursor, PROFESSIONAL_ROLES, directory_page, professional_profile
 
 
 def Signup_view(request):
@@ -265,15 +371,13 @@ def dashboard_view(request):
         .order_by("-date")[:5]
     )
 
-    # 4. Discoverable professionals (for customers or vendors)
+    # 4. Professionals you may like (precomputed nightly from bookings)
     professionals = []
     if role not in ["Tailor", "Fashion_Designer"]:
-        professionals = User.objects.filter(
-            role__in=["Tailor", "Fashion_Designer"], is_active=True
-        ).exclude(id=user.id)[:5]
+        professionals = recommended_professionals(user, limit=5)
 
     # 5. Latest newsfeed posts
-    newsfeed_posts = NewsfeedPost.objects.all().order_by("-created_at")[:5]
+    newsfeed_posts = NewsfeedPost.objects.select_related("user").order_by("-created_at")[:5]
 
     # 6. Dashboard statistics
     total_bookings = (
@@ -318,19 +422,35 @@ def profile_update_view(request):
     return render(request, "profile_update.html", {"form": form})
 
 
-def home_view(request):
-    return render(request, "home.html")
+# Fully static: rendered once per process and revalidated by ETag.
+home_view = static_page("home.html")
 
 
 def professional_list_view(request):
-    professionals = User.objects.filter(
-        role__in=["Tailor", "Fashion_Designer"], is_active=True
-    )
-    return render(request, "professional_list.html", {"professionals": professionals})
-
-
-def about_view(request):
-    return render(request, "about.html")
+    role = request.GET.get("role") or None
+    if role is not None and role not in PROFESSIONAL_ROLES:
+        return HttpResponseBadRequest("Invalid role.")
+    location = request.GET.get("location", "").strip()
+    try:
+        page = directory_page(role=role, location=location, cursor=request.GET.get("cursor"))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    next_query = None
+    if page.next_cursor:
+        query = request.GET.copy()
+        query["cursor"] = page.next_cursor
+        next_query = query.urlencode()
+    return render(request, "professional_list.html", {
+        "cards": page.cards,
+        "next_query": next_query,
+        "role": role,
+        "location": location,
+        "roles": [(value, label) for value, label in User.ROLE_CHOICES if value in PROFESSIONAL_ROLES],
+    })
+
+
+about_view = static_page("about.html")
 
 
 def custom_login_view(request):
@@ -354,23 +474,12 @@ def logout_view(request):
     return redirect("login")
 
 
-def newsfeed_view(request):
-    posts_list = NewsfeedPost.objects.select_related("user").order_by("-created_at")
-
-    # Paginate with 5 posts per page
-    paginator = Paginator(posts_list, 5)
-    page_number = request.GET.get("page")
-    posts = paginator.get_page(page_number)  # Safe page object
-
-    return render(request, "newsfeed.html", {"posts": posts})
-
-
 # view for professional detail
 @login_required
 def professional_detail_view(request, pk):
-    professional = get_object_or_404(
-        User, pk=pk, role__in=["Tailor", "Fashion_Designer"], is_active=True
-    )
+    professional = professional_profile(pk)
+    if professional is None:
+        raise Http404("No professional matches the given query.")
     return render(request, "professional_detail.html", {"professional": professional})
 
 
@@ -382,7 +491,7 @@ def dashboard(request):
         or [],
         "orders": Booking.objects.filter(customer=request.user).order_by("-date")[:3]
         or [],
-        "newsfeed_posts": NewsfeedPost.objects.all().order_by("-created_at")[:20] or [],
+        "newsfeed_posts": NewsfeedPost.objects.select_related("user").order_by("-created_at")[:20] or [],
         "highlights": {
             "total_listings": Service.objects.count(),
             "total_bookings": Booking.objects.filter(customer=request.user).count(),
@@ -0,0 +1,19 @@
+"""
+ASGI entry point for TailoRent.
+
+Serve it with an ASGI worker, e.g.
+``gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker``, and
+set ``ASYNC_AUTH_VIEWS=True`` so the auth endpoints run as native async
+views (see config.async_views) instead of holding a thread each.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+from config.db import pool
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+pool.process_type = "asgi"
+
+application = get_asgi_application()
@@ -0,0 +1,79 @@
+"""
+Native async JSON endpoints for I/O-bound views served under ASGI.
+
+DRF's APIView is sync-only, so under ASGI every DRF request holds a thread
+for its whole duration, including the time it spends waiting on the
+database and the Celery broker. ``AsyncAPIView`` is a plain async Django
+view that keeps DRF serializers for validation and the project's JSON
+parser and renderer. Handlers await the async ORM (``aget``, ``acreate``,
+``asave``) and publish tasks with ``apublish``, so the event loop is free
+while they wait.
+
+DRF features without an async equivalent (validators that query, password
+hashing, ``serializer.save()``) run through ``sync_to_async``. Authentication,
+permissions, throttling and content negotiation are not supported, so this
+is only for open JSON endpoints. The DRF views remain the sync fallback and
+are used while ``ASYNC_AUTH_VIEWS`` is off.
+"""
+
+import io
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer, dumps
+
+
+async def apublish(task, *args, **kwargs):
+    """``task.delay(*args, **kwargs)`` without blocking the event loop."""
+    # Publishing needs no database connection, so it can use any executor
+    # thread instead of queueing behind the request's ORM calls. Eager tasks
+    # run inline and may use the ORM, so they keep the request's thread.
+    eager = task.app.conf.task_always_eager
+    return await sync_to_async(task.apply_async, thread_sensitive=eager)(args, kwargs)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAPIView(View):
+    """
+    Base class for async JSON endpoints. Subclasses set ``serializer_class``
+    and define ``async def post()``; API errors are rendered the way DRF's
+    exception handler renders them.
+    """
+
+    serializer_class = None
+    # Set to False when the serializer's validation never touches the database.
+    validation_queries = True
+    http_method_names = ["post", "options"]
+    parser = ORJSONParser()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            return self.respond(detail, status=exc.status_code)
+
+    def get_serializer(self, request):
+        if request.content_type != self.parser.media_type:
+            data = request.POST  # form and multipart bodies, as DRF accepts
+        else:
+            data = self.parser.parse(io.BytesIO(request.body)) if request.body else {}
+        return self.serializer_class(data=data, context={"request": request, "view": self})
+
+    async def validated_serializer(self, request):
+        """Return a validated serializer for the request body or raise ValidationError."""
+        serializer = self.get_serializer(request)
+        if self.validation_queries:
+            await sync_to_async(serializer.is_valid)(raise_exception=True)
+        else:
+            serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def respond(self, data, status=200):
+        return HttpResponse(dumps(data), status=status, content_type=ORJSONRenderer.media_type)
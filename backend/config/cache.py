@@ -0,0 +1,387 @@
+"""
+Two-tier cache: a small per-process LRU in front of the shared Django cache.
+
+Values are read from the in-process LRU first (no network round trip), then
+from ``caches["default"]`` (Redis in production). Misses are recomputed under
+a per-key lock so a popular key expiring doesn't send every worker to the
+database at once, and keys are refreshed slightly before they expire using
+probabilistic early expiration ("XFetch"): the closer a key is to expiry
+and the longer it took to compute, the likelier a reader refreshes it early.
+
+Invalidation is by tag. Entries are tagged with models (``Product``), single
+rows (``model_tag(Product, 5)``) or custom strings. Saving or deleting a
+tracked model bumps the version of its tags, which invalidates every entry
+stored under an older version. Inside a transaction the tags are bumped
+again on commit: a reader in between recomputes from the previously
+committed rows and stores them under the new version. The LRU tier keeps
+entries for at most ``LOCAL_TIMEOUT`` seconds, which bounds how stale
+another process can be.
+
+Hits, misses and evictions are counted per namespace in ``cache_stats()``
+and exported to Prometheus (see config.metrics).
+
+Usage::
+
+    @cached("catalog", timeout=600, tags=[Product])
+    def product_count():
+        return Product.objects.count()
+
+    dashboards = TieredCache("dashboards", timeout=300)
+    counts = dashboards.get_or_set(key, compute, tags=[tag("customer", user.id)])
+"""
+
+import functools
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from .metrics import CACHE_EVENTS
+
+logger = logging.getLogger("tailorent.cache")
+
+TIERED_CACHE_DEFAULTS = {
+    "BACKEND_ALIAS": "default",
+    "LOCAL_MAX_ENTRIES": 1000,
+    "LOCAL_TIMEOUT": 5,
+    # XFetch aggressiveness; 1.0 is the usual choice, higher refreshes earlier.
+    "BETA": 1.0,
+    "LOCK_TIMEOUT": 30,
+    # How long a reader waits for another process to fill a cold key.
+    "LOCK_WAIT": 2.0,
+}
+
+_stats = defaultdict(Counter)
+
+
+def tiered_cache_settings():
+    return {**TIERED_CACHE_DEFAULTS, **getattr(settings, "TIERED_CACHE", {})}
+
+
+def shared_cache():
+    return caches[tiered_cache_settings()["BACKEND_ALIAS"]]
+
+
+def tag(*parts):
+    return ":".join(str(part) for part in parts)
+
+
+def model_tag(model, pk=None):
+    """Tag for a whole model, or for one row when ``pk`` is given."""
+    label = f"model:{model._meta.label_lower}"
+    return label if pk is None else f"{label}:{pk}"
+
+
+def _is_model(item):
+    return isinstance(item, type) and issubclass(item, Model)
+
+
+def _normalize_tags(tags):
+    return tuple(sorted({model_tag(item) if _is_model(item) else item for item in tags}))
+
+
+def _version_key(name):
+    return f"tagver:{name}"
+
+
+class LocalLRU:
+    """Thread-safe bounded LRU of ``key -> (expires_at, entry)``."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry, timeout):
+        """Store ``entry``; returns how many entries were evicted."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, entry)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def drop_tags(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, (_, entry) in self._data.items() if tags & set(entry[3])]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = None
+
+
+def local_cache():
+    global _local
+    if _local is None:
+        _local = LocalLRU(tiered_cache_settings()["LOCAL_MAX_ENTRIES"])
+    return _local
+
+
+class TieredCache:
+    """
+    A key namespace with its own default timeout. Entries are stored as
+    ``(value, compute_seconds, expires_at, tags, tag_versions)``.
+    """
+
+    def __init__(self, namespace, timeout=300, local_timeout=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+
+    def make_key(self, key):
+        return f"tc:{self.namespace}:{key}"
+
+    def get_or_set(self, key, compute, tags=(), timeout=None):
+        config = tiered_cache_settings()
+        full_key = self.make_key(key)
+        tags = _normalize_tags(tags)
+        timeout = self.timeout if timeout is None else timeout
+
+        entry = local_cache().get(full_key)
+        if entry is not None and not self._expire_early(entry, config):
+            self._count("local_hits")
+            return entry[0]
+
+        shared = shared_cache()
+        found = shared.get_many([full_key, *map(_version_key, tags)])
+        versions = tuple(found.get(_version_key(name), 0) for name in tags)
+        entry = found.get(full_key)
+        if entry is not None and entry[4] != versions:
+            self._count("invalidated")
+            entry = None
+
+        if entry is not None and not self._expire_early(entry, config):
+            self._count("shared_hits")
+            self._store_local(full_key, entry, config)
+            return entry[0]
+
+        lock_key = f"lock:{full_key}"
+        if shared.add(lock_key, 1, config["LOCK_TIMEOUT"]):
+            try:
+                self._count("early_refreshes" if entry is not None else "misses")
+                return self._compute(full_key, compute, tags, versions, timeout, config)[0]
+            finally:
+                shared.delete(lock_key)
+
+        # Someone else is computing this key.
+        if entry is not None:
+            self._count("stale_served")
+            return entry[0]
+        self._count("lock_waits")
+        deadline = time.monotonic() + config["LOCK_WAIT"]
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = shared.get(full_key)
+            if entry is not None and entry[4] == versions:
+                self._count("shared_hits")
+                self._store_local(full_key, entry, config)
+                return entry[0]
+        logger.info("cache lock wait timed out namespace=%s key=%s", self.namespace, key)
+        self._count("misses")
+        return self._compute(full_key, compute, tags, versions, timeout, config)[0]
+
+    def get_many_or_set(self, items, compute, timeout=None):
+        """
+        Batch get_or_set: ``items`` maps keys to their tags, and the keys
+        that miss are computed together by ``compute(keys) -> {key: value}``.
+        Keys ``compute`` leaves out are neither cached nor returned. Misses
+        aren't locked; a batch is one page of keys, not one hot key.
+        """
+        config = tiered_cache_settings()
+        timeout = self.timeout if timeout is None else timeout
+        full_keys = {key: self.make_key(key) for key in items}
+        tags = {key: _normalize_tags(item_tags) for key, item_tags in items.items()}
+
+        values, pending = {}, []
+        for key, full_key in full_keys.items():
+            entry = local_cache().get(full_key)
+            if entry is not None and not self._expire_early(entry, config):
+                self._count("local_hits")
+                values[key] = entry[0]
+            else:
+                pending.append(key)
+        if not pending:
+            return values
+
+        version_names = sorted({name for key in pending for name in tags[key]})
+        found = shared_cache().get_many(
+            [*(full_keys[key] for key in pending), *map(_version_key, version_names)]
+        )
+        missing = {}
+        for key in pending:
+            versions = tuple(found.get(_version_key(name), 0) for name in tags[key])
+            entry = found.get(full_keys[key])
+            if entry is not None and entry[4] != versions:
+                self._count("invalidated")
+                entry = None
+            if entry is not None and not self._expire_early(entry, config):
+                self._count("shared_hits")
+                self._store_local(full_keys[key], entry, config)
+                values[key] = entry[0]
+            else:
+                self._count("misses")
+                missing[key] = versions
+        if not missing:
+            return values
+
+        started = time.monotonic()
+        computed = compute(list(missing))
+        took = (time.monotonic() - started) / len(missing)
+        expires_at = time.time() + timeout
+        entries = {}
+        for key, versions in missing.items():
+            if key not in computed:
+                continue
+            entry = (computed[key], took, expires_at, tags[key], versions)
+            entries[full_keys[key]] = entry
+            self._store_local(full_keys[key], entry, config)
+            values[key] = computed[key]
+        shared_cache().set_many(entries, timeout)
+        return values
+
+    def _compute(self, full_key, compute, tags, versions, timeout, config):
+        started = time.monotonic()
+        value = compute()
+        took = time.monotonic() - started
+        entry = (value, took, time.time() + timeout, tags, versions)
+        shared_cache().set(full_key, entry, timeout)
+        self._store_local(full_key, entry, config)
+        return entry
+
+    def _store_local(self, full_key, entry, config):
+        local_timeout = min(
+            self.local_timeout or config["LOCAL_TIMEOUT"],
+            max(0, entry[2] - time.time()),
+        )
+        if local_timeout > 0:
+            self._count("evictions", local_cache().set(full_key, entry, local_timeout))
+
+    def _count(self, event, amount=1):
+        _stats[self.namespace][event] += amount
+        if amount:
+            CACHE_EVENTS.labels(self.namespace, event).inc(amount)
+
+    @staticmethod
+    def _expire_early(entry, config):
+        """XFetch: refresh with growing probability as expiry approaches."""
+        _, took, expires_at, _, _ = entry
+        return time.time() - took * config["BETA"] * math.log(1 - random.random()) >= expires_at
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        local_cache().delete(full_key)
+        shared_cache().delete(full_key)
+
+
+def cached(namespace, timeout=300, tags=(), key=None, local_timeout=None):
+    """
+    Cache a function's result in ``namespace``. ``key(*args, **kwargs)``
+    builds the cache key (default: the repr of the arguments) and ``tags``
+    is a list of models/tags or a callable returning one for the arguments.
+    """
+    store = TieredCache(namespace, timeout, local_timeout)
+    for item in () if callable(tags) else tags:
+        if _is_model(item):
+            track_model(item)
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = f"{function.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            return store.get_or_set(cache_key, lambda: function(*args, **kwargs), entry_tags)
+
+        wrapper.cache = store
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tags(*tags):
+    """Invalidate every entry carrying any of ``tags``, in all processes."""
+    tags = _normalize_tags(tags)
+    shared = shared_cache()
+    for name in tags:
+        version_key = _version_key(name)
+        # add() is a no-op if the key exists; incr() is atomic on Redis.
+        shared.add(version_key, 0, None)
+        try:
+            shared.incr(version_key)
+        except ValueError:
+            shared.set(version_key, 1, None)
+    local_cache().drop_tags(tags)
+
+
+_tracked = {}  # model -> related_tags callable or None
+
+
+def track_model(model, related_tags=None):
+    """
+    Invalidate ``model``'s tag, the saved row's tag and any
+    ``related_tags(instance)`` whenever an instance is saved or deleted.
+    """
+    first = model not in _tracked
+    if first or related_tags is not None:
+        _tracked[model] = related_tags or _tracked.get(model)
+    if not first:
+        return
+
+    def invalidate(sender, instance, **kwargs):
+        related = _tracked.get(sender)
+        tags = (
+            model_tag(sender),
+            model_tag(sender, instance.pk),
+            *(related(instance) if related else ()),
+        )
+        invalidate_tags(*tags)
+        using = router.db_for_write(sender, instance=instance)
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(lambda: invalidate_tags(*tags), using=using)
+
+    label = model._meta.label_lower
+    post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f"tiered-cache:{label}")
+    post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f"tiered-cache:{label}")
+
+
+def cache_stats():
+    """Per-namespace counters for this process."""
+    return {namespace: dict(counters) for namespace, counters in _stats.items()}
+
+
+def reset_local_cache():
+    """Empty this process's LRU tier and counters (for tests)."""
+    local_cache().clear()
+    _stats.clear()
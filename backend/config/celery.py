@@ -4,6 +4,7 @@ Celery configuration for TailoRent project.
 
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
@@ -17,6 +18,35 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Request ids in task logs (see config.log), per-queue wait-time
+# histograms (see config.queue_latency), the slow-query log of task SQL
+# (see config.slow_queries) and Prometheus task metrics (see config.metrics).
+from .log import install_celery_request_ids  # noqa: E402
+from .metrics import install_celery_metrics  # noqa: E402
+from .queue_latency import install_queue_latency  # noqa: E402
+from .slow_queries import install_slow_query_log  # noqa: E402
+
+install_celery_request_ids()
+install_queue_latency()
+install_slow_query_log()
+install_celery_metrics()
+
+
+@worker_init.connect
+def configure_db_pool(**kwargs):
+    """Size database pools for a worker rather than a web process."""
+    from .db import pool
+
+    pool.process_type = "celery"
+
+
+@worker_init.connect
+def setup_task_profiling(**kwargs):
+    """Hook the sampled task profiler in when settings.PROFILING enables it."""
+    from .profiling import install_task_profiling
+
+    install_task_profiling()
+
 
 @app.task(bind=True)
 def debug_task(self):
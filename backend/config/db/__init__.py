@@ -0,0 +1 @@
+# Database connection pooling
@@ -0,0 +1 @@
+# Pooled database backends
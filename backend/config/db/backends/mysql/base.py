@@ -0,0 +1,77 @@
+"""
+MySQL backend whose connections come from config.db.pool.
+"""
+
+import re
+
+from django.db.backends.mysql.base import CursorWrapper
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+# Statements that leave state in the session beyond the transaction: user
+# variables, temporary tables, named and table locks, SET statements.
+SESSION_STATE_RE = re.compile(
+    r"@|\bTEMPORARY\b|\bGET_LOCK\b|\bLOCK\s+TABLES\b|^\s*SET\b", re.IGNORECASE
+)
+
+
+class SessionTrackingCursorWrapper(CursorWrapper):
+    """Flag the connection for a full reset when a statement changes session state."""
+
+    def __init__(self, cursor, db):
+        super().__init__(cursor)
+        self.db = db
+
+    def execute(self, query, args=None):
+        if SESSION_STATE_RE.search(query):
+            self.db.session_dirty = True
+        return super().execute(query, args)
+
+    def executemany(self, query, args):
+        if SESSION_STATE_RE.search(query):
+            self.db.session_dirty = True
+        return super().executemany(query, args)
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    session_dirty = False
+
+    def init_connection_state(self):
+        # Django's own SET statements run on every checkout, so they don't
+        # make the session dirty.
+        super().init_connection_state()
+        self.session_dirty = False
+
+    def create_cursor(self, name=None):
+        return SessionTrackingCursorWrapper(self.connection.cursor(), self)
+
+    def ping(self, connection):
+        try:
+            connection.ping()
+            return True
+        except Exception:
+            return False
+
+    def reset_session(self, connection):
+        # A rollback is enough for sessions that only ran queries. Otherwise
+        # COM_CHANGE_USER drops variables, temporary tables and locks, like a
+        # new connection without the TCP handshake but with a full auth
+        # exchange, and also what init_command set, so that runs again.
+        if not self.session_dirty:
+            return super().reset_session(connection)
+        try:
+            connection.change_user(
+                self.settings_dict["USER"],
+                self.settings_dict["PASSWORD"],
+                self.settings_dict["NAME"],
+            )
+            init_command = self.settings_dict["OPTIONS"].get("init_command")
+            if init_command:
+                cursor = connection.cursor()
+                cursor.execute(init_command)
+                cursor.close()
+        except Exception:
+            return False
+        self.session_dirty = False
+        return True
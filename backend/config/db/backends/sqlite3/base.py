@@ -0,0 +1,15 @@
+"""
+SQLite backend whose connections come from config.db.pool.
+
+Used to exercise the pool locally and in tests; in-memory databases are
+never pooled since each connection would be a different database.
+"""
+
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    def uses_pool(self):
+        return not self.is_in_memory_db()
@@ -0,0 +1,25 @@
+"""
+Portable bulk upserts.
+
+``bulk_create(update_conflicts=True)`` needs ``unique_fields`` on PostgreSQL
+and SQLite but rejects them on MySQL, where ON DUPLICATE KEY UPDATE fires on
+any unique key, so callers can't pass the same arguments everywhere.
+"""
+
+from django.db import connections, router
+
+
+def bulk_upsert(model, rows, unique_fields, update_fields, batch_size=None):
+    """
+    Insert ``rows``, updating ``update_fields`` on rows whose
+    ``unique_fields`` already exist. On MySQL any other unique key of the
+    table also counts as a conflict.
+    """
+    features = connections[router.db_for_write(model)].features
+    return model._default_manager.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields if features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields,
+    )
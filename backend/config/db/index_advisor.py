@@ -0,0 +1,535 @@
+"""
+Index advice from a captured query workload.
+
+A workload is the list of statements an application ran. ``WorkloadRecorder``
+captures one (the test suite saves its own when ``INDEX_ADVISOR_WORKLOAD`` is
+set, see tests/conftest.py) and ``save_workload``/``load_workload`` store it
+as JSON lines of ``{"alias", "sql", "params", "duration"}``.
+
+``advise()`` groups the workload by query shape (see
+config.instrumentation.fingerprint) and derives one candidate index per shape
+and table from its WHERE and ORDER BY: equality columns first, then one range
+or sort column. Candidates an existing index already covers are dropped, and
+each remaining one is EXPLAINed before and after it exists:
+
+* SQLite builds every candidate, with ANALYZE statistics, inside a
+  transaction that is rolled back, so the "after" plans are real.
+* PostgreSQL and MySQL do the same with ``build=True``. PostgreSQL rolls the
+  transaction back and MySQL drops the index again. Building an index on a
+  large table takes time and I/O, so only do that against a staging copy.
+  Without it, the saving is estimated as the whole cost of the shapes that
+  scan or sort the table.
+
+Costs are in the planner's units, times how often the shape ran: query_cost
+on MySQL, total cost on PostgreSQL, estimated rows read on SQLite. They rank
+candidates within one run but don't compare across databases.
+
+``unused_indexes()`` lists the indexes no plan in the workload used, plus
+the indexes the server's own statistics say were never read (MySQL
+performance_schema, PostgreSQL pg_stat_user_indexes).
+"""
+
+import json
+import math
+import re
+import time
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, models, transaction
+
+from config.instrumentation import QueryRecorder, fingerprint
+
+ADVISED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+Query = namedtuple("Query", ["alias", "sql", "params", "duration"])
+Shape = namedtuple("Shape", ["fingerprint", "sql", "params", "calls", "duration"])
+Plan = namedtuple("Plan", ["cost", "scans", "indexes"])
+Candidate = namedtuple("Candidate", ["table", "columns", "equality"])
+Recommendation = namedtuple(
+    "Recommendation",
+    ["model", "index", "calls", "cost_before", "cost_after", "estimated", "shapes"],
+)
+UnusedIndex = namedtuple("UnusedIndex", ["table", "name", "columns", "source", "foreign_key"])
+
+_COLUMN = r'[`"](?P<table>\w+)[`"]\.[`"](?P<column>\w+)[`"]'
+_PREDICATE_RE = re.compile(_COLUMN + r"\s*(?P<op>=|<=|>=|<(?!>)|>|\bIN\b|\bIS\b|\bBETWEEN\b)", re.I)
+_ORDER_RE = re.compile(_COLUMN + r"(?P<desc>\s+DESC)?", re.I)
+_WHERE_RE = re.compile(r"\bWHERE\b", re.I)
+_ORDER_BY_RE = re.compile(r"\bORDER BY\b", re.I)
+_CLAUSE_END_RE = re.compile(r"\b(?:GROUP BY|ORDER BY|HAVING|LIMIT|FOR UPDATE)\b", re.I)
+_INNERMOST_GROUP_RE = re.compile(r"\(([^()]*)\)")
+_OR_RE = re.compile(r"\bOR\b", re.I)
+_SQLITE_STEP_RE = re.compile(
+    r"^(?P<kind>SCAN|SEARCH) (?P<table>\w+)(?: AS \w+)?"
+    r"(?: USING (?:COVERING )?INDEX (?P<index>\w+))?"
+    r"(?P<primary> USING (?:INTEGER )?PRIMARY KEY)?"
+    r"(?: \((?P<terms>[^)]*)\))?"
+)
+
+
+class WorkloadRecorder(QueryRecorder):
+    """``QueryRecorder`` that keeps the parameters of reads, updates and deletes."""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many and sql.lstrip().upper().startswith(ADVISED_STATEMENTS):
+                self.queries.append(
+                    Query(
+                        context["connection"].alias,
+                        sql,
+                        list(params or ()),
+                        time.perf_counter() - started,
+                    )
+                )
+
+
+def save_workload(queries, path):
+    with open(path, "w") as stream:
+        for query in queries:
+            stream.write(json.dumps(query._asdict(), cls=DjangoJSONEncoder) + "\n")
+
+
+def load_workload(path):
+    with open(path) as stream:
+        return [Query(**json.loads(line)) for line in stream if line.strip()]
+
+
+def group_shapes(queries):
+    """One ``Shape`` per fingerprint, keeping the first statement as its sample."""
+    shapes = {}
+    for query in queries:
+        if not query.sql.lstrip().upper().startswith(ADVISED_STATEMENTS):
+            continue
+        key = fingerprint(query.sql)
+        shape = shapes.get(key)
+        if shape is None:
+            shapes[key] = Shape(key, query.sql, query.params, 1, query.duration)
+        else:
+            shapes[key] = shape._replace(
+                calls=shape.calls + 1, duration=shape.duration + query.duration
+            )
+    return list(shapes.values())
+
+
+def _clauses(sql):
+    where = order = ""
+    match = _WHERE_RE.search(sql)
+    if match:
+        end = _CLAUSE_END_RE.search(sql, match.end())
+        where = sql[match.end() : end.start() if end else len(sql)]
+    matches = list(_ORDER_BY_RE.finditer(sql))
+    if matches:
+        start = matches[-1].end()
+        end = _CLAUSE_END_RE.search(sql, start)
+        order = sql[start : end.start() if end else len(sql)]
+    return where, order
+
+
+def _without_or(where):
+    """
+    Drop the OR groups from a WHERE clause: one composite index can't serve
+    ``a = 1 OR b = 2``, so only the AND-ed predicates suggest columns.
+    """
+    while True:
+        match = _INNERMOST_GROUP_RE.search(where)
+        if match is None:
+            return "" if _OR_RE.search(where) else where
+        inner = "" if _OR_RE.search(match[1]) else f"[{match[1]}]"
+        where = where[: match.start()] + inner + where[match.end() :]
+
+
+def candidate_indexes(sql):
+    """
+    ``Candidate`` per table for one statement. Columns prefixed with "-"
+    sort descending; ``equality`` is the set of columns compared with =,
+    IN or IS.
+    """
+    where, order = _clauses(sql)
+    where = _without_or(where)
+    equality, ranges, ordering = defaultdict(list), defaultdict(list), defaultdict(list)
+    for match in _PREDICATE_RE.finditer(where):
+        table, column = match["table"], match["column"]
+        target = equality if match["op"].upper() in ("=", "IN", "IS") else ranges
+        if column not in target[table]:
+            target[table].append(column)
+
+    # Only a sort on the leading ORDER BY columns can be read from an index.
+    for match in _ORDER_RE.finditer(order):
+        if ordering and match["table"] not in ordering:
+            break
+        ordering[match["table"]].append(("-" if match["desc"] else "") + match["column"])
+
+    candidates = []
+    for table in {*equality, *ranges, *ordering}:
+        columns = list(equality[table])
+        if ranges[table]:
+            tail = [column for column in ranges[table] if column not in columns][:1]
+        else:
+            tail = [column for column in ordering[table] if column.lstrip("-") not in columns]
+        columns += tail
+        if columns:
+            candidates.append(Candidate(table, tuple(columns), frozenset(equality[table])))
+    return candidates
+
+
+def project_models():
+    """``{db_table: model}`` for the models of apps under BASE_DIR."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    return {
+        model._meta.db_table: model
+        for model in apps.get_models()
+        if not model._meta.proxy
+        and model._meta.managed
+        and base_dir in Path(model._meta.app_config.path).resolve().parents
+    }
+
+
+def existing_indexes(connection, table):
+    with connection.cursor() as cursor:
+        return connection.introspection.get_constraints(cursor, table)
+
+
+def is_covered(candidate, constraints, implicit_pk=None):
+    """
+    True when an existing index already serves ``candidate``: a unique one
+    inside its equality columns, or one starting with its columns.
+    ``implicit_pk`` is dropped from the end of the candidate, as InnoDB and
+    SQLite secondary indexes already end with the primary key.
+    """
+    columns = [column.lstrip("-") for column in candidate.columns]
+    if implicit_pk and len(columns) > 1 and columns[-1] == implicit_pk:
+        columns = columns[:-1]
+    for constraint in constraints.values():
+        existing = constraint["columns"] or []
+        if not existing or not (constraint["index"] or constraint["unique"] or constraint["primary_key"]):
+            continue
+        if (constraint["unique"] or constraint["primary_key"]) and set(existing) <= candidate.equality:
+            return True
+        if existing[: len(columns)] == columns:
+            return True
+    return False
+
+
+def build_index(model, columns):
+    """The ``models.Index`` for db ``columns`` of ``model``, with Django's generated name."""
+    field_names = {field.column: field.name for field in model._meta.concrete_fields}
+    fields = [
+        ("-" if column.startswith("-") else "") + field_names[column.lstrip("-")]
+        for column in columns
+    ]
+    index = models.Index(fields=fields)
+    index.set_name_with_model(model)
+    return index
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def _relations(node, key):
+    return {item[key] for item in _walk(node) if key in item}
+
+
+def _postgres_plan(data):
+    if isinstance(data, str):
+        data = json.loads(data)
+    plan = data[0]["Plan"]
+    scans, indexes = set(), set()
+    for node in _walk(plan):
+        if node.get("Node Type") == "Seq Scan":
+            scans.add(node["Relation Name"])
+        elif node.get("Node Type") == "Sort":
+            scans |= _relations(node, "Relation Name")
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+    return Plan(float(plan["Total Cost"]), scans, indexes)
+
+
+def _mysql_plan(data):
+    data = json.loads(data)
+    scans, indexes = set(), set()
+    for node in _walk(data):
+        if node.get("access_type") in ("ALL", "index"):
+            scans.add(node["table_name"])
+        if node.get("using_filesort"):
+            scans |= _relations(node, "table_name")
+        if node.get("key"):
+            indexes.add(node["key"])
+    cost = data["query_block"].get("cost_info", {}).get("query_cost", 0)
+    return Plan(float(cost), scans, indexes)
+
+
+def _sqlite_stats(connection):
+    """``{table: rows}`` and ``{index: [rows, rows per prefix...]}`` from sqlite_stat1."""
+    tables, indexes = {}, {}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return tables, indexes
+        cursor.execute("SELECT tbl, idx, stat FROM sqlite_stat1")
+        for table, index, stat in cursor.fetchall():
+            numbers = [int(part) for part in stat.split() if part.isdigit()]
+            if numbers:
+                tables[table] = numbers[0]
+            if index:
+                indexes[index] = numbers
+    return tables, indexes
+
+
+def _sqlite_plan(connection, details):
+    tables, index_stats = _sqlite_stats(connection)
+    cost, last_rows, last_table = 0.0, 0, None
+    scans, indexes = set(), set()
+    for detail in details:
+        if detail.startswith("USE TEMP B-TREE"):
+            # A sort of the previous step's rows.
+            cost += last_rows * math.log2(last_rows + 2)
+            if last_table:
+                scans.add(last_table)
+            continue
+        match = _SQLITE_STEP_RE.match(detail)
+        if not match:
+            continue
+        table_rows = max(1, tables.get(match["table"], 1))
+        if match["index"]:
+            indexes.add(match["index"])
+        if match["kind"] == "SCAN":
+            rows = table_rows
+            scans.add(match["table"])
+        elif match["primary"]:
+            rows = 1
+        else:
+            terms = (match["terms"] or "").split(" AND ")
+            equal = sum(1 for term in terms if "=" in term and not term.startswith(("<", ">")))
+            stat = index_stats.get(match["index"], [table_rows])
+            rows = stat[equal] if equal < len(stat) else table_rows
+            if len(terms) > equal:
+                rows = max(1, rows // 4)
+        cost += rows
+        last_rows, last_table = rows, match["table"]
+    return Plan(cost, scans, indexes)
+
+
+def explain(connection, sql, params):
+    """The planner's ``Plan`` for one statement; nothing is executed."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            return _postgres_plan(cursor.fetchone()[0])
+        if connection.vendor == "mysql":
+            cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+            return _mysql_plan(cursor.fetchone()[0])
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+            return _sqlite_plan(connection, details)
+    raise NotImplementedError(f"No EXPLAIN support for {connection.vendor}.")
+
+
+def _explain_or_none(connection, shape):
+    """EXPLAIN ``shape``, or None when its sample no longer runs (schema drift)."""
+    try:
+        if connection.in_atomic_block:
+            # A failed statement must not abort the surrounding transaction.
+            with transaction.atomic(using=connection.alias):
+                return explain(connection, shape.sql, shape.params)
+        return explain(connection, shape.sql, shape.params)
+    except DatabaseError:
+        return None
+
+
+@contextmanager
+def candidate_index(connection, table, columns):
+    """Build an index on ``columns`` for the duration of the block, then remove it."""
+    quote = connection.ops.quote_name
+    name = "advisor_" + "_".join(column.lstrip("-") for column in columns)[:50]
+    sql = "CREATE INDEX {} ON {} ({})".format(
+        quote(name),
+        quote(table),
+        ", ".join(
+            quote(column.lstrip("-")) + (" DESC" if column.startswith("-") else "")
+            for column in columns
+        ),
+    )
+    if connection.features.can_rollback_ddl:
+        savepoint = transaction.savepoint(using=connection.alias)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                if connection.vendor == "sqlite":
+                    cursor.execute(f"ANALYZE {quote(name)}")
+            yield
+        finally:
+            transaction.savepoint_rollback(savepoint, using=connection.alias)
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX {quote(name)} ON {quote(table)}")
+
+
+def advise(queries, using="default", build=None, min_calls=1, min_saving=0.1):
+    """
+    Rank missing indexes for ``queries`` by the cost they save, highest
+    first, dropping those that save less than ``min_saving`` of the cost of
+    their shapes. ``build`` defaults to True on SQLite only (see module
+    docstring).
+    """
+    connection = connections[using]
+    build = connection.vendor == "sqlite" if build is None else build
+    # SQLite's ANALYZE statistics are rolled back too.
+    rollback = connection.vendor == "sqlite" or (build and connection.features.can_rollback_ddl)
+    tables = project_models()
+    implicit_pk = None if connection.vendor == "postgresql" else "id"
+    shapes = [shape for shape in group_shapes(queries) if shape.calls >= min_calls]
+
+    recommendations = []
+    with transaction.atomic(using=using) if rollback else nullcontext():
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        plans = {shape.fingerprint: _explain_or_none(connection, shape) for shape in shapes}
+
+        candidates = defaultdict(list)
+        constraints = {}
+        for shape in shapes:
+            if plans[shape.fingerprint] is None:
+                continue
+            for candidate in candidate_indexes(shape.sql):
+                if candidate.table not in tables:
+                    continue
+                if candidate.table not in constraints:
+                    constraints[candidate.table] = existing_indexes(connection, candidate.table)
+                if not is_covered(candidate, constraints[candidate.table], implicit_pk):
+                    candidates[candidate.table, candidate.columns].append(shape)
+
+        for (table, columns), matched in candidates.items():
+            before = sum(plans[shape.fingerprint].cost * shape.calls for shape in matched)
+            if build:
+                with candidate_index(connection, table, columns):
+                    after_plans = [(_explain_or_none(connection, shape), shape) for shape in matched]
+                after = sum(
+                    (plan or plans[shape.fingerprint]).cost * shape.calls
+                    for plan, shape in after_plans
+                )
+            else:
+                after = sum(
+                    plans[shape.fingerprint].cost * shape.calls
+                    for shape in matched
+                    if table not in plans[shape.fingerprint].scans
+                )
+            if before <= 0 or (before - after) / before < min_saving:
+                continue
+            recommendations.append(
+                Recommendation(
+                    model=tables[table],
+                    index=build_index(tables[table], columns),
+                    calls=sum(shape.calls for shape in matched),
+                    cost_before=before,
+                    cost_after=after,
+                    estimated=not build,
+                    shapes=[shape.fingerprint for shape in matched],
+                )
+            )
+        if rollback:
+            transaction.set_rollback(True, using=using)
+
+    recommendations.sort(key=lambda item: item.cost_before - item.cost_after, reverse=True)
+    # A candidate is redundant when a better-ranked one on its table starts with it.
+    kept = []
+    for item in recommendations:
+        fields = [field.lstrip("-") for field in item.index.fields]
+        if not any(
+            other.model is item.model
+            and [field.lstrip("-") for field in other.index.fields][: len(fields)] == fields
+            for other in kept
+        ):
+            kept.append(item)
+    return kept
+
+
+def _server_unused_indexes(connection):
+    """``{(table, index)}`` the server's statistics show were never read."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT object_name, index_name "
+                "FROM performance_schema.table_io_waits_summary_by_index_usage "
+                "WHERE object_schema = DATABASE() AND index_name IS NOT NULL "
+                "AND index_name <> 'PRIMARY' AND count_star = 0"
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT relname, indexrelname FROM pg_stat_user_indexes WHERE idx_scan = 0"
+            )
+        else:
+            return set()
+        return {tuple(row) for row in cursor.fetchall()}
+
+
+def unused_indexes(queries=(), using="default"):
+    """
+    Non-unique indexes of project tables that no plan of ``queries`` used
+    (only tables the workload touches are judged), plus those the server's
+    statistics report as never read since they were last reset.
+    """
+    connection = connections[using]
+    tables = project_models()
+    used, touched = set(), set()
+    rollback = connection.vendor == "sqlite"
+    with transaction.atomic(using=using) if rollback else nullcontext():
+        if rollback:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        for shape in group_shapes(queries):
+            plan = _explain_or_none(connection, shape)
+            if plan is not None:
+                used |= plan.indexes
+                touched |= {match["table"] for match in _ORDER_RE.finditer(shape.sql)}
+        if rollback:
+            transaction.set_rollback(True, using=using)
+    server_unused = _server_unused_indexes(connection)
+
+    found = []
+    for table in sorted(tables):
+        constraints = existing_indexes(connection, table)
+        foreign_keys = [
+            constraint["columns"] for constraint in constraints.values() if constraint["foreign_key"]
+        ]
+        for name, constraint in sorted(constraints.items()):
+            if not constraint["index"] or constraint["unique"] or constraint["primary_key"]:
+                continue
+            sources = []
+            if table in touched and name not in used:
+                sources.append("workload")
+            if (table, name) in server_unused:
+                sources.append("server")
+            if sources:
+                columns = constraint["columns"]
+                found.append(
+                    UnusedIndex(
+                        table,
+                        name,
+                        columns,
+                        "+".join(sources),
+                        any(columns[: len(fk)] == fk for fk in foreign_keys),
+                    )
+                )
+    return found
@@ -0,0 +1,285 @@
+"""
+Process-wide pool of raw DB-API connections shared by all threads.
+
+Django opens a connection per thread and, with ``CONN_MAX_AGE = 0``, closes
+it at the end of every request or Celery task. The pooled backends in
+``config.db.backends`` route those opens and closes through a
+``ConnectionPool`` so the TCP and auth handshake is paid once per pooled
+connection instead of once per request.
+
+Connections are handed out most-recently-used first. A connection that has
+been idle longer than ``HEALTH_CHECK_INTERVAL`` is pinged before reuse, and
+connections older than ``MAX_LIFETIME`` are closed instead of reused, so
+server-side timeouts and failovers are absorbed. ``MAX_SIZE`` can differ
+per process type ("web", "asgi" or "celery").
+
+A pool only takes back connections it handed out in the same process;
+anything else is closed without counting against its size. Session state
+(open transactions, and on MySQL variables and temporary tables) is reset
+before a connection goes back to the idle list.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger("tailorent.db")
+
+POOL_DEFAULTS = {
+    # Open connections per process, by process type.
+    "MAX_SIZE": {"web": 10, "asgi": 30, "celery": 2},
+    # Seconds to wait for a free connection before giving up.
+    "TIMEOUT": 5.0,
+    # Seconds after which a connection is closed rather than reused.
+    "MAX_LIFETIME": 30 * 60,
+    # Idle seconds after which a connection is pinged before reuse.
+    "HEALTH_CHECK_INTERVAL": 30.0,
+}
+
+# Set to "celery" by the worker (see config.celery) and "asgi" by config.asgi
+# before any pool exists.
+process_type = os.getenv("PROCESS_TYPE", "web")
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolExhausted(OperationalError):
+    """No connection became free within the pool's TIMEOUT."""
+
+
+class ConnectionPool:
+    def __init__(self, alias, max_size, timeout, max_lifetime, health_check_interval):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._idle = deque()  # (connection, last_used)
+        self._born = {}  # id(connection) -> creation time
+        self._in_use = set()  # id(connection) of handed-out connections
+        self._size = 0
+        self.pid = os.getpid()
+        self._available = threading.Condition()
+        self.counters = dict.fromkeys(
+            (
+                "checkouts",
+                "created",
+                "reused",
+                "expired",
+                "health_check_failures",
+                "exhausted",
+                "foreign",
+            ),
+            0,
+        )
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def checkout(self, connect, ping):
+        """
+        Return a usable connection, reusing an idle one when possible.
+        ``connect()`` opens a new one; ``ping(connection)`` reports whether
+        an idle connection still works.
+        """
+        started = time.monotonic()
+        while True:
+            connection, last_used = self._reserve(started)
+            if connection is None:
+                break
+            if time.monotonic() - last_used < self.health_check_interval or ping(connection):
+                self._record_checkout(connection, started, "reused")
+                return connection
+            with self._available:
+                self.counters["health_check_failures"] += 1
+            self._discard(connection)
+
+        try:
+            connection = connect()
+        except Exception:
+            with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+        self._born[id(connection)] = time.monotonic()
+        self._record_checkout(connection, started, "created")
+        return connection
+
+    def _reserve(self, started):
+        """Pop a fresh idle connection, or claim a slot for a new one (None)."""
+        with self._available:
+            while True:
+                while self._idle:
+                    connection, last_used = self._idle.pop()
+                    if self._age(connection) < self.max_lifetime:
+                        return connection, last_used
+                    self.counters["expired"] += 1
+                    self._close(connection)
+                    self._size -= 1
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.counters["exhausted"] += 1
+                    logger.warning(
+                        "db pool exhausted alias=%s size=%d waited_s=%.3f",
+                        self.alias,
+                        self.max_size,
+                        time.monotonic() - started,
+                    )
+                    raise PoolExhausted(
+                        f"No free connection in the '{self.alias}' pool "
+                        f"({self.max_size} in use) after {self.timeout}s."
+                    )
+                self._available.wait(remaining)
+
+    def checkin(self, connection, reusable=True):
+        """
+        Return a connection; unusable or expired ones are closed, and so are
+        ones this pool didn't hand out in this process (without touching its
+        size).
+        """
+        with self._available:
+            owned = os.getpid() == self.pid and id(connection) in self._in_use
+            self._in_use.discard(id(connection))
+            if not owned and any(idle is connection for idle, _ in self._idle):
+                return  # Checked in twice.
+            if not owned:
+                self.counters["foreign"] += 1
+        if not owned:
+            logger.warning("db pool got back a connection it didn't hand out alias=%s", self.alias)
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+        if not reusable or self._age(connection) >= self.max_lifetime:
+            self._discard(connection)
+            return
+        with self._available:
+            self._idle.append((connection, time.monotonic()))
+            self._available.notify()
+
+    def _discard(self, connection):
+        self._close(connection)
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def _close(self, connection):
+        self._born.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _age(self, connection):
+        return time.monotonic() - self._born.get(id(connection), 0)
+
+    def _record_checkout(self, connection, started, kind):
+        waited = time.monotonic() - started
+        with self._available:
+            self._in_use.add(id(connection))
+            self.counters["checkouts"] += 1
+            self.counters[kind] += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def stats(self):
+        with self._available:
+            idle = len(self._idle)
+            size = self._size
+        return {
+            "alias": self.alias,
+            "max_size": self.max_size,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            **self.counters,
+            "wait_seconds_total": round(self.wait_total, 6),
+            "wait_seconds_max": round(self.wait_max, 6),
+        }
+
+
+def pool_options(settings_dict):
+    options = {**POOL_DEFAULTS, **settings_dict.get("POOL", {})}
+    max_size = options["MAX_SIZE"]
+    if isinstance(max_size, dict):
+        max_size = max_size.get(process_type, max(max_size.values()))
+    return {
+        "max_size": max_size,
+        "timeout": options["TIMEOUT"],
+        "max_lifetime": options["MAX_LIFETIME"],
+        "health_check_interval": options["HEALTH_CHECK_INTERVAL"],
+    }
+
+
+def get_pool(alias, settings_dict):
+    """Return this process's pool for ``alias``, creating it on first use."""
+    # Pools are keyed by PID so forked children never reuse the parent's sockets.
+    key = (os.getpid(), alias)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(alias, **pool_options(settings_dict))
+    return pool
+
+
+def pool_stats():
+    """Metrics for every pool in the current process."""
+    pid = os.getpid()
+    return [pool.stats() for (owner, _), pool in list(_pools.items()) if owner == pid]
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixed into a backend's DatabaseWrapper: connections come from and go
+    back to the process-wide pool instead of being opened and closed.
+    """
+
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def uses_pool(self):
+        return True
+
+    def ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def reset_session(self, connection):
+        """Clear per-session state before reuse; False if that failed."""
+        try:
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        if not self.uses_pool():
+            return connect(conn_params)
+        return self.pool().checkout(lambda: connect(conn_params), self.ping)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if not self.uses_pool():
+            return super()._close()
+        # Connections closed mid-transaction or after errors are not trusted.
+        reusable = not (self.in_atomic_block or self.errors_occurred)
+        if reusable:
+            reusable = self.reset_session(self.connection)
+        self.pool().checkin(self.connection, reusable=reusable)
@@ -0,0 +1,177 @@
+"""
+Read-replica routing with replication-lag checks and read-your-writes.
+
+Reads are only sent to a replica inside a safe (GET/HEAD/OPTIONS) request
+handled by ``config.middleware.ReplicaRoutingMiddleware``; Celery tasks,
+management commands and anything inside ``transaction.atomic()`` keep
+reading from the primary. Once a request writes, the rest of it reads from
+the primary and its user is pinned to the primary for ``STICKY_SECONDS`` so
+they see their own booking, post or profile change on the next page.
+
+Replicas whose lag (from ``LAG_PROBE``, measured at most every
+``LAG_CHECK_INTERVAL`` seconds) exceeds ``MAX_LAG_SECONDS`` or cannot be
+measured are taken out of rotation until they catch up.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("tailorent.db")
+
+REPLICA_ROUTING_DEFAULTS = {
+    "REPLICAS": [],
+    "MAX_LAG_SECONDS": 5.0,
+    "LAG_CHECK_INTERVAL": 10.0,
+    # Callable(alias) -> lag in seconds, or None when unknown.
+    "LAG_PROBE": "config.db.routers.mysql_replica_lag",
+    "STICKY_SECONDS": 10,
+    # Always read from the primary: auth state has to be current.
+    "PRIMARY_MODELS": [
+        "sessions",
+        "token_blacklist",
+        "otp_totp",
+        "otp_static",
+    ],
+    # Writes to these don't pin the user (e.g. view counters on GET pages).
+    "UNPINNED_WRITE_MODELS": ["marketplace.engagementevent"],
+}
+
+_routing_state = ContextVar("db_routing_state", default=None)
+_lag_cache = {}  # alias -> (checked_at, lag)
+
+
+def replica_routing_settings():
+    return {**REPLICA_ROUTING_DEFAULTS, **getattr(settings, "REPLICA_ROUTING", {})}
+
+
+class RoutingState:
+    def __init__(self, request=None, use_replicas=False):
+        self.request = request
+        self.use_replicas = use_replicas
+        self.wrote = False
+        self.pinned = None
+
+
+@contextmanager
+def routing(request=None, use_replicas=False):
+    """Route the reads in this block; yields the RoutingState."""
+    state = RoutingState(request, use_replicas)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+def use_primary():
+    return routing(use_replicas=False)
+
+
+def pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def pin_to_primary(user_id):
+    cache.set(pin_key(user_id), True, replica_routing_settings()["STICKY_SECONDS"])
+
+
+def known_user_id(request):
+    """The request user's id, without triggering a lazy user lookup."""
+    attributes = getattr(request, "__dict__", {})
+    user = attributes.get("user")
+    if user is None or (isinstance(user, LazyObject) and user._wrapped is empty):
+        # Async views load the user with ``await request.auser()`` instead.
+        user = attributes.get("_acached_user")
+        if user is None:
+            return None
+    return user.pk if user.is_authenticated else None
+
+
+def mysql_replica_lag(alias):
+    """Seconds behind the source from SHOW REPLICA STATUS (0 if not a replica)."""
+    connection = connections[alias]
+    if connection.vendor != "mysql":
+        return 0
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Exception:
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        status = dict(zip([column[0] for column in cursor.description], row))
+    return status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+
+
+def replica_lag(alias, config):
+    now = time.monotonic()
+    checked_at, lag = _lag_cache.get(alias, (None, None))
+    if checked_at is None or now - checked_at >= config["LAG_CHECK_INTERVAL"]:
+        try:
+            lag = import_string(config["LAG_PROBE"])(alias)
+        except Exception:
+            logger.exception("db replica lag probe failed alias=%s", alias)
+            lag = None
+        if lag is None or lag > config["MAX_LAG_SECONDS"]:
+            logger.warning("db replica out of rotation alias=%s lag=%s", alias, lag)
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas(config=None):
+    config = config or replica_routing_settings()
+    return [
+        alias
+        for alias in config["REPLICAS"]
+        if (lag := replica_lag(alias, config)) is not None and lag <= config["MAX_LAG_SECONDS"]
+    ]
+
+
+def _matches(model, labels):
+    return model._meta.app_label in labels or model._meta.label_lower in labels
+
+
+class ReplicaRouter:
+    """Send reads from safe requests to a healthy replica, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.use_replicas or state.wrote:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        config = replica_routing_settings()
+        if _matches(model, config["PRIMARY_MODELS"]):
+            return None
+        if state.pinned is None:
+            user_id = known_user_id(state.request)
+            if user_id is not None:
+                state.pinned = bool(cache.get(pin_key(user_id)))
+        if state.pinned:
+            return None
+        replicas = healthy_replicas(config)
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None and not _matches(
+            model, replica_routing_settings()["UNPINNED_WRITE_MODELS"]
+        ):
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_routing_settings()["REPLICAS"]}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for production::
+
+    PROMETHEUS_MULTIPROC_DIR=/run/tailorent/metrics gunicorn -c config/gunicorn.py config.wsgi
+
+The metrics directory is shared with the Celery workers on the host and
+must be emptied before any of them start (see config.metrics).
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+
+
+def child_exit(server, worker):
+    from config.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,82 @@
+"""
+SQL instrumentation helpers shared by the query middleware and tooling.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    Collapse a statement to its shape: literals become ``?`` and IN lists
+    of any length become ``IN (...)``, so the N queries of an N+1 loop all
+    share one fingerprint.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """
+    ``connection.execute_wrapper`` callable that records every statement's
+    SQL and duration. Use ``recorder.installed()`` to wrap all connections.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (context["connection"].alias, sql, time.perf_counter() - started)
+            )
+
+    def installed(self):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self, threshold=2):
+        """Return ``{fingerprint: count}`` for shapes run at least ``threshold`` times."""
+        shapes = Counter(fingerprint(sql) for _, sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+@contextmanager
+def request_recorder(request):
+    """
+    Yield the request's QueryRecorder, installing it unless an outer
+    middleware already has, so every middleware that counts a request's SQL
+    shares one ``execute_wrapper``.
+    """
+    recorder = getattr(request, "query_recorder", None)
+    if recorder is not None:
+        yield recorder
+        return
+    recorder = request.query_recorder = QueryRecorder()
+    with recorder.installed():
+        yield recorder
@@ -0,0 +1,207 @@
+"""
+Non-blocking, structured logging.
+
+Loggers write to ``QueuedHandler``, which only snapshots each record on the
+calling thread and puts it on a bounded in-memory queue. A ``QueueListener``
+thread formats the records and does the actual console and file writes, so
+a slow disk backs up the queue instead of the request. When the queue is
+full, records are dropped and counted rather than blocking the caller.
+
+``RequestIDMiddleware`` (config.middleware) gives each request an id, the
+incoming ``X-Request-ID`` or a new one, and every record logged while the
+request is handled carries it. Tasks published during the request take the
+id along in a Celery header, so worker logs join up with the request that
+caused them.
+
+``JSONFormatter`` writes one JSON object per line, and ``SamplingFilter``
+keeps a fraction of the INFO records of high-volume loggers.
+"""
+
+import contextvars
+import copy
+import logging
+import os
+import queue
+import random
+import re
+import uuid
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+CELERY_HEADER = "request_id"
+
+# Incoming ids are echoed into logs and headers, so only accept plain tokens.
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+# Attributes every LogRecord has; anything else was passed in ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_traceback_formatter = logging.Formatter()
+
+
+def request_id_from(header):
+    """The client's request id if it is a plain token, otherwise a new one."""
+    if header and _VALID_REQUEST_ID.fullmatch(header):
+        return header
+    return uuid.uuid4().hex
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep ``rates[name]`` of the INFO and DEBUG records of logger ``name`` and
+    its children. Warnings and errors always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # Most specific logger name first.
+        self.rates = sorted(dict(rates or {}).items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Block rather than fail when stopping with a full queue.
+        self.queue.put(self._sentinel)
+
+
+_queued_handlers = weakref.WeakSet()
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Pass records to ``handlers`` through a queue drained by a background
+    thread. Use ``cfg://handlers.<name>`` to refer to other LOGGING handlers;
+    dictConfig builds handlers in name order, so they must sort before this one.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.listener = None
+        # Indexing, not iterating, makes dictConfig resolve cfg:// references.
+        self.handlers = [handlers[index] for index in range(len(handlers))]
+        for handler in self.handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(f"{handler!r} is not a configured logging handler.")
+        self.start()
+        _queued_handlers.add(self)
+
+    def start(self):
+        self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Capture what is only valid on this thread; formatting is left to
+        # the listener thread.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def _restart_after_fork():
+    # The listener thread doesn't survive fork (prefork Celery, gunicorn);
+    # records the parent had queued are the parent's to write.
+    for handler in list(_queued_handlers):
+        if handler.listener is not None:
+            handler.queue = queue.Queue(handler.queue.maxsize)
+            handler.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def dropped_records():
+    """Records this process's queued handlers have dropped so far."""
+    return sum(handler.dropped for handler in list(_queued_handlers))
+
+
+# Celery
+
+
+def _stamp_request_id(headers=None, **kwargs):
+    request_id = request_id_var.get()
+    if headers is not None and request_id:
+        headers.setdefault(CELERY_HEADER, request_id)
+
+
+def _task_prerun(task=None, task_id=None, **kwargs):
+    # Eager tasks run inside the request and keep its id; beat-scheduled
+    # tasks have none and use their task id.
+    request_id = getattr(task.request, CELERY_HEADER, None) or request_id_var.get() or task_id
+    task.request.request_id_token = request_id_var.set(request_id)
+
+
+def _task_postrun(task=None, **kwargs):
+    token = getattr(task.request, "request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
+
+
+def install_celery_request_ids():
+    """Carry the publishing request's id into the tasks it queues."""
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    before_task_publish.connect(_stamp_request_id, weak=False)
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
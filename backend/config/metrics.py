@@ -0,0 +1,296 @@
+"""
+Prometheus metrics for the web processes and Celery workers, served at /metrics.
+
+Counters and histograms are recorded where things happen:
+
+* ``MetricsMiddleware``: request latency by URL name (``route``), method and
+  status, and SQL statements per request.
+* Celery task hooks: run time by task and outcome, retries, SQL statements,
+  and queue wait (publish to start, see config.queue_latency) by queue and task.
+* config.cache: ``TieredCache`` hits, misses and evictions per namespace; the
+  hit ratio is ``local_hits`` + ``shared_hits`` over all lookups.
+
+Gauges that are read rather than counted are filled in after each request or
+task (connection pool use, dropped log records) or computed from the
+database when scraped (bookings by status, unsent notifications; cached for
+``BUSINESS_GAUGES_TIMEOUT`` seconds).
+
+With ``PROMETHEUS_MULTIPROC_DIR`` in the environment every process writes
+its samples to files in that directory and /metrics adds up the files of
+all of them, so a scrape of any gunicorn worker covers every worker and
+Celery child on the host. The directory must be empty when the first process
+starts and shared by all of them (see scripts/run.sh and config/gunicorn.py).
+Without it, /metrics reports only the process that serves it.
+
+An observation is a label lookup and one write to memory (an mmap in
+multiprocess mode): a few microseconds.
+"""
+
+import hmac
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .instrumentation import QueryRecorder, request_recorder
+from .middleware import Call, HybridMiddleware
+from .queue_latency import HEADER, QUEUE_LATENCY_DEFAULTS, _queue
+
+logger = logging.getLogger("tailorent.metrics")
+
+METRICS_DEFAULTS = {
+    "ENABLED": True,
+    # /metrics requires "Authorization: Bearer <TOKEN>"; without a token it
+    # is only served with DEBUG on.
+    "TOKEN": "",
+    "BUSINESS_GAUGES_TIMEOUT": 30,
+}
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+UNMATCHED = "<unmatched>"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by URL name.",
+    ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements run by a request, by URL name.",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Time to run a task, by task and final state.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+TASK_RETRIES = Counter("celery_task_retries", "Task retries scheduled.", ["task"])
+TASK_QUERIES = Counter("celery_task_db_queries", "SQL statements run by tasks.", ["task"])
+QUEUE_WAIT = Histogram(
+    "celery_queue_wait_seconds",
+    "Time between publishing a task and a worker starting it.",
+    ["queue", "task"],
+    buckets=QUEUE_LATENCY_DEFAULTS["BUCKETS"],
+)
+CACHE_EVENTS = Counter(
+    "tiered_cache_events", "TieredCache lookups and evictions.", ["namespace", "event"]
+)
+# Per-process readings; live* modes drop processes that have exited.
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state.",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+LOG_RECORDS_DROPPED = Gauge(
+    "log_records_dropped",
+    "Log records dropped because a handler's queue was full.",
+    multiprocess_mode="livesum",
+)
+
+
+def metrics_settings():
+    return {**METRICS_DEFAULTS, **getattr(settings, "METRICS", {})}
+
+
+def update_process_gauges():
+    """Read this process's pools and log handlers into their gauges."""
+    from .db.pool import pool_stats
+    from .log import dropped_records
+
+    for stats in pool_stats():
+        DB_POOL_CONNECTIONS.labels(stats["alias"], "in_use").set(stats["in_use"])
+        DB_POOL_CONNECTIONS.labels(stats["alias"], "idle").set(stats["idle"])
+    LOG_RECORDS_DROPPED.set(dropped_records())
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Time every request and count its SQL (see module docstring)."""
+
+    def __init__(self, get_response):
+        if not metrics_settings()["ENABLED"]:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    @contextmanager
+    def around(self, request):
+        call = Call()
+        started = time.perf_counter()
+        with request_recorder(request) as queries:
+            yield call
+        elapsed = time.perf_counter() - started
+        response = call.response
+
+        match = request.resolver_match
+        route = match.view_name if match else UNMATCHED
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_DURATION.labels(route, method, response.status_code).observe(elapsed)
+        REQUEST_QUERIES.labels(route).observe(queries.count)
+        update_process_gauges()
+
+
+# Celery
+
+_running = {}  # task_id -> (started, QueryRecorder, its ExitStack)
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    if not metrics_settings()["ENABLED"]:
+        return
+    published_at = getattr(task.request, HEADER, None)
+    if published_at is not None and not task.request.is_eager:
+        QUEUE_WAIT.labels(_queue(task.request), task.name).observe(
+            max(0.0, time.time() - published_at)
+        )
+    queries = QueryRecorder()
+    _running[task_id] = time.perf_counter(), queries, queries.installed()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    running = _running.pop(task_id, None)
+    if running is None:
+        return
+    started, queries, installed = running
+    installed.close()
+    TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+    TASK_QUERIES.labels(task.name).inc(queries.count)
+    update_process_gauges()
+
+
+def _task_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+def mark_process_dead(pid=None):
+    """Drop an exited process's live gauges from the multiprocess files."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def _worker_process_shutdown(pid=None, **kwargs):
+    mark_process_dead(pid)
+
+
+def install_celery_metrics():
+    """Connect the Celery task hooks; settings are read when they fire."""
+    from celery.signals import task_postrun, task_prerun, task_retry, worker_process_shutdown
+
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+    task_retry.connect(_task_retry, weak=False)
+    worker_process_shutdown.connect(_worker_process_shutdown, weak=False)
+
+
+# Scrape time
+
+_business = {"expires": 0.0, "values": None}
+_business_lock = threading.Lock()
+
+
+def business_gauges():
+    """Bookings by status and unsent notifications, cached briefly per process."""
+    from apps.bookings.models import Booking
+    from apps.profiles.models import Notification
+    from django.db.models import Count
+
+    with _business_lock:
+        if _business["values"] is not None and time.monotonic() < _business["expires"]:
+            return _business["values"]
+        bookings = dict.fromkeys((status for status, _ in Booking.STATUS_CHOICES), 0)
+        bookings.update(
+            Booking.objects.order_by().values_list("status").annotate(count=Count("id"))
+        )
+        values = {
+            "bookings": bookings,
+            "notifications_unsent": Notification.objects.filter(sent_at__isnull=True).count(),
+        }
+        _business["values"] = values
+        _business["expires"] = time.monotonic() + metrics_settings()["BUSINESS_GAUGES_TIMEOUT"]
+        return values
+
+
+def reset_business_gauges():
+    """Forget the cached business gauges (for tests)."""
+    _business["values"] = None
+
+
+class BusinessCollector:
+    """Gauges computed from the database by the process serving the scrape."""
+
+    def describe(self):
+        # Registering must not query the database.
+        return []
+
+    def collect(self):
+        try:
+            values = business_gauges()
+        except Exception:
+            logger.warning("metrics business_gauges failed", exc_info=True)
+            return
+        bookings = GaugeMetricFamily(
+            "tailorent_bookings", "Bookings by status.", labels=["status"]
+        )
+        for status, count in sorted(values["bookings"].items()):
+            bookings.add_metric([status], count)
+        yield bookings
+        yield GaugeMetricFamily(
+            "tailorent_notifications_unsent",
+            "Notification outbox rows not yet delivered.",
+            value=values["notifications_unsent"],
+        )
+
+
+def scrape_registry():
+    """The registry /metrics reads (see module docstring)."""
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(BusinessCollector())
+    return registry
+
+
+if not MULTIPROCESS:
+    REGISTRY.register(BusinessCollector())
+
+
+# A plain view, like config.slow_queries: this module is imported with the
+# Celery app, before settings are loaded.
+@require_GET
+def metrics_view(request):
+    """All metrics in the Prometheus text format."""
+    config = metrics_settings()
+    token = config["TOKEN"]
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        logger.warning("metrics refused: set METRICS['TOKEN'] to serve /metrics with DEBUG off")
+        return HttpResponseForbidden()
+    if not config["ENABLED"]:
+        return HttpResponse(status=404)
+    update_process_gauges()
+    return HttpResponse(generate_latest(scrape_registry()), content_type=CONTENT_TYPE_LATEST)
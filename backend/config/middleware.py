@@ -0,0 +1,293 @@
+"""
+Project-wide middleware for TailoRent.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .db.routers import known_user_id, pin_to_primary, replica_routing_settings, routing
+from .instrumentation import request_recorder
+from .log import REQUEST_ID_HEADER, request_id_from, request_id_var
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available.
+    brotli = None
+
+logger = logging.getLogger("tailorent.sql")
+
+QUERY_INSTRUMENTATION_DEFAULTS = {
+    "ENABLED": True,
+    # Share of requests instrumented; keep this low in production.
+    "SAMPLE_RATE": 1.0,
+    # A query shape repeated this many times in one request is reported as N+1.
+    "N_PLUS_ONE_THRESHOLD": 5,
+    # Per-view query budgets, keyed by URL name ("profiles:dashboard").
+    "BUDGETS": {},
+    "DEFAULT_BUDGET": None,
+    # "log" or "raise" when a view goes over its budget.
+    "BUDGET_ACTION": "log",
+}
+
+
+class Call:
+    """The request in flight through a ``HybridMiddleware.around()`` block."""
+
+    def __init__(self):
+        self.response = None
+        self.deferred = []
+
+    def defer(self, function, *args):
+        """Run ``function(*args)`` once the response is back; off the event loop under ASGI."""
+        self.deferred.append((function, args))
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively in both handlers, so Django never
+    adapts it (and the rest of the chain) onto a thread under ASGI.
+
+    Subclasses implement ``around(request)``, a context manager yielding a
+    ``Call`` whose ``response`` is set when the block exits normally. Work
+    that blocks (cache writes) goes through ``call.defer()``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with self.around(request) as call:
+            call.response = self.get_response(request)
+        for function, args in call.deferred:
+            function(*args)
+        return call.response
+
+    async def __acall__(self, request):
+        with self.around(request) as call:
+            call.response = await self.get_response(request)
+        for function, args in call.deferred:
+            await sync_to_async(function, thread_sensitive=False)(*args)
+        return call.response
+
+    def around(self, request):
+        raise NotImplementedError
+
+
+class RequestIDMiddleware(HybridMiddleware):
+    """
+    Tag the request, its log records and the tasks it publishes with a
+    request id (see config.log), and return it in ``X-Request-ID``.
+    """
+
+    @contextmanager
+    def around(self, request):
+        request.request_id = request_id_from(request.headers.get(REQUEST_ID_HEADER))
+        token = request_id_var.set(request.request_id)
+        call = Call()
+        try:
+            yield call
+        finally:
+            request_id_var.reset(token)
+        call.response[REQUEST_ID_HEADER] = request.request_id
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in "raise" mode when a view runs more queries than its budget."""
+
+
+def query_instrumentation_settings():
+    return {
+        **QUERY_INSTRUMENTATION_DEFAULTS,
+        **getattr(settings, "QUERY_INSTRUMENTATION", {}),
+    }
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Count the queries and DB time of each request, flag repeated query shapes
+    (N+1 patterns), enforce per-view budgets and report everything in a
+    ``Server-Timing`` header plus one structured log line.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.config = query_instrumentation_settings()
+
+    @contextmanager
+    def around(self, request):
+        config = self.config
+        call = Call()
+        if not config["ENABLED"] or random.random() >= config["SAMPLE_RATE"]:
+            yield call
+            return
+
+        started = time.perf_counter()
+        with request_recorder(request) as recorder:
+            yield call
+        elapsed = time.perf_counter() - started
+        response = call.response
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else request.path
+        duplicates = recorder.duplicates(config["N_PLUS_ONE_THRESHOLD"])
+        db_ms = recorder.total_time * 1000
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={db_ms:.2f};desc="{recorder.count} queries"',
+                f'app;dur={elapsed * 1000:.2f}',
+            ]
+        )
+
+        logger.info(
+            "sql view=%s method=%s status=%s queries=%d db_ms=%.2f total_ms=%.2f n_plus_one=%d",
+            view_name,
+            request.method,
+            response.status_code,
+            recorder.count,
+            db_ms,
+            elapsed * 1000,
+            len(duplicates),
+        )
+        for shape, count in duplicates.items():
+            logger.warning("sql n_plus_one view=%s count=%d shape=%s", view_name, count, shape)
+
+        budget = config["BUDGETS"].get(view_name, config["DEFAULT_BUDGET"])
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"{view_name} ran {recorder.count} queries, over its budget of {budget}."
+            )
+            if config["BUDGET_ACTION"] == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning("sql budget_exceeded %s", message)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Let reads in safe requests go to replicas (see config.db.routers) and
+    pin users who write to the primary for a short read-your-writes window.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        if not replica_routing_settings()["REPLICAS"]:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    @contextmanager
+    def around(self, request):
+        call = Call()
+        with routing(request, use_replicas=request.method in self.SAFE_METHODS) as state:
+            yield call
+        if state.wrote:
+            user_id = known_user_id(request)
+            if user_id is not None:
+                call.defer(pin_to_primary, user_id)
+
+
+def accepted_encodings(header):
+    """Parse Accept-Encoding into ``{coding: q}``."""
+    encodings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+def carries_secrets(request, response):
+    """
+    Whether the body may hold a secret that BREACH could recover: the
+    response sets cookies or renders the CSRF token, or the request was
+    made with credentials.
+    """
+    return bool(
+        response.cookies
+        or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        or "HTTP_AUTHORIZATION" in request.META
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+
+
+def brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        # Flush per chunk so streamed lists reach the client progressively.
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses of at least COMPRESSION_MIN_SIZE bytes with Brotli
+    when the client prefers it and the ``brotli`` package is installed,
+    otherwise with gzip. Streaming responses are compressed chunk by chunk.
+
+    Brotli has no equivalent of the random gzip filename Django adds against
+    BREACH, so responses that may carry secrets (see ``carries_secrets``)
+    always get gzip.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+        self.brotli_quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        encodings = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        use_brotli = (
+            brotli is not None
+            and encodings.get("br", 0) > 0
+            and encodings.get("br", 0) >= encodings.get("gzip", 0)
+            and not response.has_header("Content-Encoding")
+            and not (response.streaming and response.is_async)
+            and not carries_secrets(request, response)
+        )
+        if not use_brotli:
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.streaming:
+            response.streaming_content = brotli_sequence(
+                response.streaming_content, self.brotli_quality
+            )
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
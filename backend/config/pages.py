@@ -0,0 +1,42 @@
+"""
+Whole-page caching for templates that don't depend on the request.
+
+``static_page("about.html")`` returns a view that renders the template once
+per process and then serves the stored bytes. The response carries an ETag
+of its content, so browsers and proxies revalidate with ``If-None-Match``
+and get a 304 with no body, in any process, until the page changes. With
+DEBUG on, the template is re-rendered on every request so edits show up.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control, quote_etag
+from django.views.decorators.http import condition, require_safe
+
+
+def static_page(template_name, max_age=300):
+    page = None
+
+    def load():
+        nonlocal page
+        if page is None or settings.DEBUG:
+            content = render_to_string(template_name).encode()
+            etag = quote_etag(hashlib.md5(content, usedforsecurity=False).hexdigest())
+            page = (content, etag)
+        return page
+
+    @condition(etag_func=lambda request: load()[1])
+    def serve(request):
+        return HttpResponse(load()[0])
+
+    @require_safe
+    def view(request):
+        response = serve(request)
+        # On 304s too, so caches keep the page for another max_age.
+        patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    return view
@@ -0,0 +1,265 @@
+"""
+Opt-in profiling for individual requests and Celery tasks.
+
+A request is profiled when it carries a valid signed ``X-Profile`` header,
+when its URL name is on the ``VIEWS`` allowlist, or when it falls in the
+random ``SAMPLE_RATE`` share. Each profile writes a ``.pstats`` file
+(cProfile, for ``snakeviz``/``pstats``) and a ``.collapsed`` file of
+sampled stacks (for ``flamegraph.pl`` or speedscope) to ``DIRECTORY``,
+keeping only the newest ``MAX_FILES`` files. Only header-authorised
+responses get an ``X-Profile-Id`` header naming the files.
+
+The profile wraps the rest of the handler, so view middleware, exception
+handling, ATOMIC_REQUESTS and template rendering are all included. cProfile
+follows the request thread only; for async views, which run on an event
+loop thread, the stack sampler records every thread instead.
+
+With ``ENABLED`` off the middleware removes itself at startup and the
+Celery hooks are never connected, so there is no per-request cost.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from .middleware import Call, HybridMiddleware
+
+logger = logging.getLogger("tailorent.profiling")
+
+PROFILING_DEFAULTS = {
+    "ENABLED": False,
+    "DIRECTORY": None,  # defaults to BASE_DIR / "var" / "profiles"
+    # Share of all requests profiled at random.
+    "SAMPLE_RATE": 0.0,
+    # URL names ("marketplace:product-list-create") profiled on every request.
+    "VIEWS": [],
+    # Requests with this header set to a token from make_profile_token().
+    "HEADER": "X-Profile",
+    "TOKEN_MAX_AGE": 60 * 60,
+    # Any of "cprofile" and "sampling".
+    "PROFILERS": ["cprofile", "sampling"],
+    "SAMPLING_INTERVAL": 0.005,
+    "MAX_FILES": 200,
+    # Celery task name prefixes to profile, and the share of their runs.
+    "TASKS": [],
+    "TASK_SAMPLE_RATE": 1.0,
+}
+
+TOKEN_SALT = "tailorent.profiling"
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+UNMATCHED = "unmatched"
+# Only one cProfile profiler can be active per process on Python 3.12+.
+_cprofile_lock = threading.Lock()
+
+
+def profiling_settings():
+    config = {**PROFILING_DEFAULTS, **getattr(settings, "PROFILING", {})}
+    config["DIRECTORY"] = Path(
+        config["DIRECTORY"] or settings.BASE_DIR / "var" / "profiles"
+    )
+    return config
+
+
+def make_profile_token():
+    """Return a signed, expiring value for the profiling request header."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def check_profile_token(token, max_age):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age) == "profile"
+    except signing.BadSignature:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """
+    Periodically record the call stack of one thread (every other thread
+    when ``thread_id`` is None) as collapsed stacks.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name="profiling-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            for thread_id, frame in frames.items():
+                if thread_id != self.ident:
+                    self.record(frame)
+
+    def record(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class ProfileSession:
+    """Profile the current thread between ``start()`` and ``stop()``."""
+
+    def __init__(self, config, label, all_threads=False):
+        self.config = config
+        self.label = _SAFE_NAME_RE.sub("_", label)[:80]
+        self.all_threads = all_threads
+        self.profiler = None
+        self.sampler = None
+
+    def start(self):
+        if "cprofile" in self.config["PROFILERS"] and _cprofile_lock.acquire(blocking=False):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if "sampling" in self.config["PROFILERS"]:
+            self.sampler = StackSampler(
+                None if self.all_threads else threading.get_ident(),
+                self.config["SAMPLING_INTERVAL"],
+            )
+            self.sampler.start()
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        """Stop profiling, write the output files and return their common stem."""
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if self.profiler is not None:
+            self.profiler.disable()
+            _cprofile_lock.release()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+        directory = self.config["DIRECTORY"]
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self.label}-{elapsed_ms:.0f}ms"
+        if self.profiler is not None:
+            self.profiler.dump_stats(directory / f"{stem}.pstats")
+        if self.sampler is not None:
+            (directory / f"{stem}.collapsed").write_text(
+                "".join(f"{stack} {count}\n" for stack, count in self.sampler.stacks.items())
+            )
+        rotate(directory, self.config["MAX_FILES"])
+        logger.info("profile written label=%s ms=%.1f file=%s", self.label, elapsed_ms, stem)
+        return stem
+
+
+def rotate(directory, max_files):
+    """Delete the oldest profile files beyond ``max_files``."""
+    files = sorted(
+        (entry for entry in os.scandir(directory) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in files[: max(0, len(files) - max_files)]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Profile selected requests around the rest of the handler. Place it last
+    in MIDDLEWARE so the profile covers the view rather than the middleware
+    stack.
+    """
+
+    def __init__(self, get_response):
+        self.config = profiling_settings()
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.views = set(self.config["VIEWS"])
+
+    @contextmanager
+    def around(self, request):
+        authorised = self.has_token(request)
+        call = Call()
+        match = None
+        if not authorised and random.random() >= self.config["SAMPLE_RATE"]:
+            match = resolve_request(request) if self.views else None
+            if match is None or match.view_name not in self.views:
+                yield call
+                return
+        match = match or resolve_request(request)
+
+        session = ProfileSession(
+            self.config,
+            match.view_name if match else UNMATCHED,
+            all_threads=match is not None and iscoroutinefunction(match.func),
+        ).start()
+        try:
+            yield call
+        finally:
+            stem = session.stop()
+        if authorised:
+            call.response["X-Profile-Id"] = stem
+
+    def has_token(self, request):
+        token = request.headers.get(self.config["HEADER"])
+        return bool(token) and check_profile_token(token, self.config["TOKEN_MAX_AGE"])
+
+
+def resolve_request(request):
+    """The URL match the handler will use, or None for unmatched paths."""
+    try:
+        return resolve(request.path_info, getattr(request, "urlconf", None))
+    except Resolver404:
+        return None
+
+
+# Celery
+
+_task_sessions = {}
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    config = profiling_settings()
+    if not any(task.name.startswith(prefix) for prefix in config["TASKS"]):
+        return
+    if random.random() < config["TASK_SAMPLE_RATE"]:
+        _task_sessions[task_id] = ProfileSession(config, task.name).start()
+
+
+def _task_postrun(task_id=None, **kwargs):
+    session = _task_sessions.pop(task_id, None)
+    if session is not None:
+        session.stop()
+
+
+def install_task_profiling():
+    """Connect the Celery task hooks if profiling is enabled for any task."""
+    from celery.signals import task_postrun, task_prerun
+
+    config = profiling_settings()
+    if not (config["ENABLED"] and config["TASKS"]):
+        return False
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+    return True
@@ -0,0 +1,143 @@
+"""
+Per-queue Celery latency: how long tasks wait between publish and start.
+
+Publishers stamp every message with a ``published_at`` header. When a worker
+starts a task, the wait is counted in a per-queue, per-minute histogram in
+the shared cache, and tasks a worker drops because their ``expires``
+deadline passed are counted alongside. ``latency_summary()`` (and ``manage.py
+queue_latency``) turns the last few minutes into p50/p95/p99 estimates per
+queue from any process, so the OTP queue can be checked against its target.
+
+Waits are wall-clock differences between hosts, so they are only as
+accurate as the clocks of the web and worker machines.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("tailorent.celery")
+
+QUEUE_LATENCY_DEFAULTS = {
+    "ENABLED": True,
+    # Upper bounds in seconds of the histogram buckets; one more catches the rest.
+    "BUCKETS": [0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 300],
+    "RETENTION_MINUTES": 60,
+    # Target p99 wait per queue in seconds; slower starts are logged.
+    "SLO": {},
+}
+
+HEADER = "published_at"
+
+
+def queue_latency_settings():
+    return {**QUEUE_LATENCY_DEFAULTS, **getattr(settings, "CELERY_QUEUE_LATENCY", {})}
+
+
+def _key(queue, minute, bucket):
+    return f"qlat:{queue}:{minute}:{bucket}"
+
+
+def _incr(key, timeout):
+    cache.add(key, 0, timeout)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout)
+
+
+def _queue(request):
+    return (request.delivery_info or {}).get("routing_key") or "celery"
+
+
+def record_wait(queue, seconds, task_name="", config=None):
+    config = config or queue_latency_settings()
+    bucket = bisect_left(config["BUCKETS"], seconds)
+    _incr(_key(queue, int(time.time() // 60), bucket), config["RETENTION_MINUTES"] * 60)
+    target = config["SLO"].get(queue)
+    if target is not None and seconds > target:
+        logger.warning(
+            "celery queue_wait over_slo queue=%s task=%s wait_s=%.3f slo_s=%s",
+            queue,
+            task_name,
+            seconds,
+            target,
+        )
+
+
+def stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(HEADER, time.time())
+
+
+def _task_prerun(task=None, **kwargs):
+    published_at = getattr(task.request, HEADER, None)
+    if published_at is None or task.request.is_eager:
+        return
+    config = queue_latency_settings()
+    if config["ENABLED"]:
+        record_wait(
+            _queue(task.request), max(0.0, time.time() - published_at), task.name, config
+        )
+
+
+def _task_revoked(request=None, expired=False, **kwargs):
+    config = queue_latency_settings()
+    if not (expired and config["ENABLED"]):
+        return
+    queue = _queue(request)
+    _incr(_key(queue, int(time.time() // 60), "expired"), config["RETENTION_MINUTES"] * 60)
+    logger.info("celery task_expired queue=%s task=%s id=%s", queue, request.task_name, request.id)
+
+
+def install_queue_latency():
+    """Connect the publish and worker hooks; settings are read when they fire."""
+    from celery.signals import before_task_publish, task_prerun, task_revoked
+
+    before_task_publish.connect(stamp_publish_time, weak=False)
+    task_prerun.connect(_task_prerun, weak=False)
+    task_revoked.connect(_task_revoked, weak=False)
+
+
+def latency_summary(queues, minutes=15):
+    """
+    ``{queue: {"started", "expired", "p50", "p95", "p99"}}`` over the last
+    ``minutes``. Percentiles are bucket upper bounds in seconds (None when
+    no task started; ``inf`` when past the last bucket).
+    """
+    config = queue_latency_settings()
+    bounds = [*config["BUCKETS"], float("inf")]
+    now = int(time.time() // 60)
+    window = range(now - minutes + 1, now + 1)
+    keys = [
+        _key(queue, minute, bucket)
+        for queue in queues
+        for minute in window
+        for bucket in [*range(len(bounds)), "expired"]
+    ]
+    found = cache.get_many(keys)
+
+    summary = {}
+    for queue in queues:
+        counts = [
+            sum(found.get(_key(queue, minute, bucket), 0) for minute in window)
+            for bucket in range(len(bounds))
+        ]
+        started = sum(counts)
+        result = {
+            "started": started,
+            "expired": sum(found.get(_key(queue, minute, "expired"), 0) for minute in window),
+        }
+        for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            result[name] = None
+            seen = 0
+            for bound, count in zip(bounds, counts):
+                seen += count
+                if started and seen >= quantile * started:
+                    result[name] = bound
+                    break
+        summary[queue] = result
+    return summary
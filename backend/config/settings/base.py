@@ -7,8 +7,10 @@ from pathlib import Path
 from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
-# Load environment variables from .env
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Load environment variables from .env
 load_dotenv(BASE_DIR / ".env")
 
 
@@ -20,21 +22,6 @@ def get_env_variable(var_name, default=None):
     return value
 
 
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-
-# Celery Configuration
-from celery import Celery
-import os
-
-# Set the default Django settings module for the 'celery' program.
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
-
-app = Celery("tailorent")
-app.config_from_object("django.conf:settings", namespace="CELERY")
-app.autodiscover_tasks()
-
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = get_env_variable(
     "SECRET_KEY", "django-insecure-^21&y0wmogtcou^4*m1t4h^0wij%1$pt3p!)c5^=5yjr23!1ff"
@@ -61,13 +48,16 @@ THIRD_PARTY_APPS = [
     "rest_framework_simplejwt.token_blacklist",
     "django_filters",
     "corsheaders",
-    "cloudinary",
     "django_otp",
     "django_otp.plugins.otp_totp",
     "django_otp.plugins.otp_static",
     "anymail",
 ]
 
+# The Cloudinary SDK is only imported when an account is configured.
+if os.getenv("CLOUDINARY_CLOUD_NAME"):
+    THIRD_PARTY_APPS.append("cloudinary")
+
 LOCAL_APPS = [
     "apps.profiles",
     "apps.bookings",
@@ -77,6 +67,13 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # First, so everything below logs with the request id (see config.log)
+    "config.middleware.RequestIDMiddleware",
+    "config.metrics.MetricsMiddleware",
+    "config.slow_queries.SlowQueryMiddleware",
+    "config.middleware.QueryInstrumentationMiddleware",
+    "config.middleware.ReplicaRoutingMiddleware",
+    "config.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -86,17 +83,129 @@ MIDDLEWARE = [
     "django_otp.middleware.OTPMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Last, so profiles cover the view itself (see config.profiling)
+    "config.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
 
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+            # Compile each template once per process; the dev server's
+            # autoreloader still clears it when a template changes.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
+
+# {% cachefragment %} blocks (see apps/profiles/templatetags/fragments.py).
+FRAGMENT_CACHE = {
+    "ENABLED": get_env_variable("FRAGMENT_CACHE_ENABLED", "True").lower() == "true",
+    "TIMEOUT": 60 * 60,
+}
+
+ASGI_APPLICATION = "config.asgi.application"
+
+# Serve registration, OTP login and email verification with native async
+# views; turn on when running under ASGI (see config.asgi).
+ASYNC_AUTH_VIEWS = get_env_variable("ASYNC_AUTH_VIEWS", "False").lower() == "true"
+
+# Per-request SQL instrumentation (see config.middleware)
+QUERY_INSTRUMENTATION = {
+    "SAMPLE_RATE": float(get_env_variable("QUERY_INSTRUMENTATION_SAMPLE_RATE", "1.0")),
+    "N_PLUS_ONE_THRESHOLD": 5,
+    "BUDGETS": {
+        "profiles:dashboard": 5,
+        "customer-dashboard": 2,
+        "professional-dashboard": 2,
+        "marketplace:product-list-create": 5,
+        "marketplace:service-list-create": 5,
+        "marketplace:newsfeed-list": 3,
+    },
+    "BUDGET_ACTION": "log",
+}
+
+# Per-fingerprint SQL timings and slow statements with plans, for every
+# request and task (see config.slow_queries)
+SLOW_QUERY_LOG = {
+    "ENABLED": get_env_variable("SLOW_QUERY_LOG_ENABLED", "True").lower() == "true",
+    "THRESHOLD_MS": float(get_env_variable("SLOW_QUERY_THRESHOLD_MS", "200")),
+}
+
+# Prometheus metrics at /metrics; set PROMETHEUS_MULTIPROC_DIR in the
+# environment to aggregate every process on the host (see config.metrics).
+# Scrapers send "Authorization: Bearer $METRICS_TOKEN"; with DEBUG off
+# /metrics is refused until a token is set.
+METRICS = {
+    "ENABLED": get_env_variable("METRICS_ENABLED", "True").lower() == "true",
+    "TOKEN": get_env_variable("METRICS_TOKEN", ""),
+}
+
+# Opt-in request/task profiling (see config.profiling)
+PROFILING = {
+    "ENABLED": get_env_variable("PROFILING_ENABLED", "False").lower() == "true",
+    "DIRECTORY": BASE_DIR / "var" / "profiles",
+    "SAMPLE_RATE": float(get_env_variable("PROFILING_SAMPLE_RATE", "0")),
+    "VIEWS": [
+        view for view in get_env_variable("PROFILING_VIEWS", "").split(",") if view
+    ],
+    "MAX_FILES": 200,
+    "TASKS": ["apps.profiles.tasks."],
+    "TASK_SAMPLE_RATE": float(get_env_variable("PROFILING_TASK_SAMPLE_RATE", "0.1")),
+}
+
 # Custom User Model
 AUTH_USER_MODEL = "profiles.User"
 
 # Database
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.mysql",
+# Connections are pooled per process (see config.db.pool). CONN_MAX_AGE stays 0
+# so Django hands each connection back to the pool after every request or task.
+DATABASE_POOL = {
+    "MAX_SIZE": {
+        "web": int(get_env_variable("DB_POOL_WEB_SIZE", "10")),
+        # An async worker keeps many more requests in flight, each holding a connection.
+        "asgi": int(get_env_variable("DB_POOL_ASGI_SIZE", "30")),
+        "celery": int(get_env_variable("DB_POOL_CELERY_SIZE", "2")),
+    },
+    "TIMEOUT": 5,
+    "MAX_LIFETIME": 30 * 60,
+    "HEALTH_CHECK_INTERVAL": 30,
+}
+
+# Read replicas, one alias per host in DB_REPLICA_HOSTS (see config.db.routers).
+DB_REPLICA_HOSTS = [
+    host for host in get_env_variable("DB_REPLICA_HOSTS", "").split(",") if host
+]
+
+
+def with_replicas(primary):
+    """Return DATABASES for ``primary`` plus a "replicaN" alias per replica host."""
+    replicas = {
+        f"replica{number}": {**primary, "HOST": host, "TEST": {"MIRROR": "default"}}
+        for number, host in enumerate(DB_REPLICA_HOSTS, start=1)
+    }
+    return {"default": primary, **replicas}
+
+
+DATABASES = with_replicas(
+    {
+        "ENGINE": "config.db.backends.mysql",
         "NAME": get_env_variable("DB_NAME", "tailorent_db"),
         "USER": get_env_variable("DB_USER", "root"),
         "PASSWORD": get_env_variable("DB_PASSWORD", ""),
@@ -105,7 +214,42 @@ DATABASES = {
         "OPTIONS": {
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        "CONN_MAX_AGE": 0,
+        "POOL": DATABASE_POOL,
     }
+)
+
+DATABASE_ROUTERS = ["config.db.routers.ReplicaRouter"]
+REPLICA_ROUTING = {
+    "REPLICAS": [f"replica{number}" for number in range(1, len(DB_REPLICA_HOSTS) + 1)],
+    "MAX_LAG_SECONDS": float(get_env_variable("DB_REPLICA_MAX_LAG", "5")),
+    "LAG_CHECK_INTERVAL": 10,
+    "STICKY_SECONDS": 10,
+}
+
+# Cache
+# Shared tier of config.cache (Redis when REDIS_CACHE_URL is set, else per-process).
+if os.getenv("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+TIERED_CACHE = {
+    "LOCAL_MAX_ENTRIES": 1000,
+    "LOCAL_TIMEOUT": 5,
+    "BETA": 1.0,
+    "LOCK_TIMEOUT": 30,
+    "LOCK_WAIT": 2.0,
 }
 
 # Password validation
@@ -141,6 +285,19 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are deduplicated by content hash on top of MEDIA_STORAGE_BACKEND.
+MEDIA_STORAGE_BACKEND = get_env_variable(
+    "MEDIA_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"
+)
+STORAGES = {
+    "default": {
+        "BACKEND": "apps.marketplace.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -166,15 +323,19 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "config.renderers.ORJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "config.parsers.ORJSONParser",
         "rest_framework.parsers.MultiPartParser",
         "rest_framework.parsers.FormParser",
     ],
 }
 
+# Responses smaller than this are sent uncompressed (see config.middleware).
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
 # Login URLs
 LOGIN_URL = "/api/profiles/login/"
 LOGIN_REDIRECT_URL = "/api/profiles/dashboard/"
@@ -188,12 +349,99 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 # Celery Configuration
+from celery.schedules import crontab
+from kombu import Queue
+
 CELERY_BROKER_URL = get_env_variable("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = get_env_variable("REDIS_URL", "redis://localhost:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# Workers log through LOGGING below instead of Celery's own handlers.
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+
+# Queues, most urgent first. Each normally has its own workers (see
+# scripts/run.sh); a worker consuming several drains them in -Q order.
+CELERY_TASK_QUEUES = (
+    Queue("otp"),
+    Queue("transactional"),
+    Queue("bulk"),
+    Queue("celery"),
+)
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+CELERY_TASK_ROUTES = {
+    "apps.profiles.tasks.send_otp_sms": {"queue": "otp"},
+    "apps.profiles.tasks.dispatch_notifications": {"queue": "transactional"},
+    "apps.profiles.tasks.send_verification_email": {"queue": "transactional"},
+    "apps.profiles.tasks.send_welcome_email": {"queue": "transactional"},
+    "apps.profiles.tasks.send_booking_confirmation_email": {"queue": "transactional"},
+    "apps.profiles.tasks.send_bulk_sms": {"queue": "bulk"},
+    "apps.profiles.tasks.deactivate_users": {"queue": "bulk"},
+    "apps.marketplace.tasks.delete_newsfeed_posts": {"queue": "bulk"},
+    "apps.bookings.tasks.send_booking_reminders": {"queue": "bulk"},
+}
+CELERY_BROKER_TRANSPORT_OPTIONS = {"queue_order_strategy": "priority"}
+# Publish-to-start wait per queue (see config.queue_latency).
+CELERY_QUEUE_LATENCY = {
+    "SLO": {"otp": 5, "transactional": 60},
+}
+
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for outbox rows whose dispatch message was lost.
+    "dispatch-notifications": {
+        "task": "apps.profiles.tasks.dispatch_notifications",
+        "schedule": 60,
+    },
+    "maintain-stylefeed-timelines": {
+        "task": "apps.marketplace.tasks.maintain_timelines",
+        "schedule": 60 * 10,
+    },
+    "update-trending-scores": {
+        "task": "apps.marketplace.tasks.update_trending_scores",
+        "schedule": 60,
+    },
+    "send-booking-reminders": {
+        "task": "apps.bookings.tasks.send_booking_reminders",
+        "schedule": crontab(minute=0),
+    },
+    "build-professional-recommendations": {
+        "task": "apps.bookings.tasks.build_professional_recommendations",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "rebuild-similar-products": {
+        "task": "apps.marketplace.tasks.rebuild_similar_products",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
+
+# Email outbox (see apps.profiles.notifications)
+NOTIFICATIONS = {
+    "BATCH_SIZE": 200,
+    "MAX_ATTEMPTS": 5,
+    "DISPATCH_DELAY": 2,
+}
+
+# StyleFeed timelines
+STYLEFEED_TIMELINE_LENGTH = 500
+# Authors with at least this many followers are merged in on read, not fanned out.
+STYLEFEED_CELEBRITY_FOLLOWERS = 5000
+
+# Trending rankings
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_TOP_K = 50
+# Events are folded in once this old, so late commits aren't skipped.
+TRENDING_EVENT_LAG_SECONDS = 60
+
+# Professional recommendations
+RECOMMENDATIONS_TOP_N = 10
+# Most similar professionals kept per professional when scoring customers.
+RECOMMENDATIONS_NEIGHBOURS = 50
+
+# Similar products
+SIMILAR_PRODUCTS_TOP_K = 10
+# Must be shared by every host running the similarity tasks.
+SIMILARITY_INDEX_DIR = BASE_DIR / "var" / "similarity"
 
 # Cloudinary Configuration
 CLOUDINARY_STORAGE = {
@@ -216,6 +464,21 @@ TWILIO_ACCOUNT_SID = get_env_variable("TWILIO_ACCOUNT_SID", "")
 TWILIO_AUTH_TOKEN = get_env_variable("TWILIO_AUTH_TOKEN", "")
 TWILIO_PHONE_NUMBER = get_env_variable("TWILIO_PHONE_NUMBER", "")
 
+# SMS gateway (see apps.profiles.sms). SMS_STUB_URL sends every message to a
+# local stub (manage.py sms_stub) instead of Twilio.
+SMS_STUB_URL = get_env_variable("SMS_STUB_URL", "")
+SMS = {
+    "PROVIDERS": (
+        [{"BACKEND": "apps.profiles.sms.HTTPStubProvider", "URL": SMS_STUB_URL}]
+        if SMS_STUB_URL
+        else [{"BACKEND": "apps.profiles.sms.TwilioProvider", "RATE_LIMIT": 50}]
+    ),
+    "CONCURRENCY": int(get_env_variable("SMS_CONCURRENCY", "20")),
+    "TIMEOUT": 10,
+    "MAX_ATTEMPTS": 3,
+    "BACKOFF": 0.5,
+}
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -246,44 +509,64 @@ SIMPLE_JWT = {
 }
 
 # Logging
+# Loggers only enqueue records; a background thread formats and writes them
+# (see config.log). The file gets one JSON object per line.
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
-        "verbose": {
-            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
-            "style": "{",
+        "json": {
+            "()": "config.log.JSONFormatter",
         },
         "simple": {
             "format": "{levelname} {message}",
             "style": "{",
         },
     },
+    "filters": {
+        # Share of INFO records kept from per-request and per-task loggers.
+        "sample": {
+            "()": "config.log.SamplingFilter",
+            "rates": {
+                "tailorent.sql": float(get_env_variable("LOG_SQL_SAMPLE_RATE", "0.1")),
+                "celery.app.trace": float(get_env_variable("LOG_TASK_SAMPLE_RATE", "0.1")),
+            },
+        },
+    },
     "handlers": {
+        # Every gunicorn worker and Celery child appends to this file, so it
+        # is rotated by logrotate rather than by any one process; the handler
+        # reopens it when the inode changes.
         "file": {
             "level": "INFO",
-            "class": "logging.FileHandler",
+            "class": "logging.handlers.WatchedFileHandler",
             "filename": BASE_DIR / "logs" / "django.log",
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "console": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
             "formatter": "simple",
         },
+        # Must sort after the handlers it feeds: dictConfig builds them in name order.
+        "queue": {
+            "()": "config.log.QueuedHandler",
+            "handlers": ["cfg://handlers.console", "cfg://handlers.file"],
+            "filters": ["sample"],
+        },
     },
     "root": {
-        "handlers": ["console", "file"],
+        "handlers": ["queue"],
         "level": "INFO",
     },
     "loggers": {
         "django": {
-            "handlers": ["console", "file"],
+            "handlers": ["queue"],
             "level": "INFO",
             "propagate": False,
         },
         "tailorent": {
-            "handlers": ["console", "file"],
+            "handlers": ["queue"],
             "level": "DEBUG",
             "propagate": False,
         },
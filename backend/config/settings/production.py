@@ -4,14 +4,23 @@ DEBUG = False
 
 ALLOWED_HOSTS = get_env_variable("ALLOWED_HOSTS").split(",")
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.mysql",
+DATABASES = with_replicas(
+    {
+        "ENGINE": "config.db.backends.mysql",
         "NAME": get_env_variable("DB_NAME"),
         "USER": get_env_variable("DB_USER"),
         "PASSWORD": get_env_variable("DB_PASSWORD"),
         "HOST": get_env_variable("DB_HOST"),
         "PORT": get_env_variable("DB_PORT", "3306"),
+        "CONN_MAX_AGE": 0,
+        "POOL": DATABASE_POOL,
+    }
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": get_env_variable("REDIS_CACHE_URL", "redis://localhost:6379/1"),
     }
 }
 
@@ -21,11 +30,22 @@ DEFAULT_FROM_EMAIL = get_env_variable("DEFAULT_FROM_EMAIL")
 
 # Static files (served by whitenoise or web server)
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 # Media
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Only instrument a sample of production traffic.
+QUERY_INSTRUMENTATION = {
+    **QUERY_INSTRUMENTATION,
+    "SAMPLE_RATE": float(get_env_variable("QUERY_INSTRUMENTATION_SAMPLE_RATE", "0.01")),
+}
+
 # Security (keep as you already had)
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True
@@ -0,0 +1,360 @@
+"""
+Slow-query log: per-fingerprint SQL timings for every view and Celery task.
+
+``SlowQueryMiddleware`` and the Celery task hooks wrap every database
+connection with ``SlowQueryRecorder`` for the length of a request or task.
+Each statement is fingerprinted (see config.instrumentation.fingerprint), and
+its count, total and max time are added up per (view or task, fingerprint)
+in this process. Statements slower than ``THRESHOLD_MS`` are logged and kept
+in a bounded ring buffer. Their EXPLAIN output is captured right after they
+run, at most once per shape every ``EXPLAIN_INTERVAL`` seconds. Only the
+fingerprint and plan are kept: the statement's parameters (emails, tokens,
+...) never leave the process that ran it.
+
+At most every ``FLUSH_INTERVAL`` seconds, after a request or task, a process
+writes a snapshot of both to the shared cache. ``top_offenders()`` merges the
+snapshots of all processes; ``manage.py slow_queries`` and the staff-only
+/api/admin/slow-queries/ endpoint show it. Aggregates are cumulative since
+each process started and hold at most ``MAX_FINGERPRINTS`` shapes; statements
+of further shapes are only counted as dropped.
+"""
+
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .instrumentation import QueryRecorder, fingerprint
+from .log import request_id_var
+from .middleware import Call, HybridMiddleware
+
+logger = logging.getLogger("tailorent.sql")
+
+SLOW_QUERY_LOG_DEFAULTS = {
+    "ENABLED": True,
+    # Statements at least this slow are logged, buffered and EXPLAINed.
+    "THRESHOLD_MS": 200,
+    # Slow statements kept per process.
+    "BUFFER_SIZE": 200,
+    # (view or task, fingerprint) pairs aggregated per process.
+    "MAX_FINGERPRINTS": 2000,
+    "EXPLAIN": True,
+    # Seconds before the same shape is EXPLAINed again.
+    "EXPLAIN_INTERVAL": 300,
+    "FLUSH_INTERVAL": 60,
+    # How long a process's snapshot outlives its last flush.
+    "RETENTION": 24 * 60 * 60,
+}
+
+ORDERINGS = ("total_ms", "count", "max_ms", "avg_ms")
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+REGISTRY_KEY = "slowq:processes"
+
+SlowQuery = namedtuple(
+    "SlowQuery", ["at", "context", "fingerprint", "ms", "request_id", "plan"]
+)
+
+_explaining = ContextVar("slow_query_explaining", default=False)
+
+
+def slow_query_settings():
+    return {**SLOW_QUERY_LOG_DEFAULTS, **getattr(settings, "SLOW_QUERY_LOG", {})}
+
+
+@functools.lru_cache(maxsize=4096)
+def cached_fingerprint(sql):
+    # Django reuses the same parametrized SQL strings, so this mostly hits.
+    return fingerprint(sql)
+
+
+class QueryLog:
+    """This process's aggregates and ring buffer of slow statements."""
+
+    def __init__(self, config):
+        self.config = config
+        self.process = f"{socket.gethostname()}:{os.getpid()}"
+        self.lock = threading.Lock()
+        self.aggregates = {}  # (context, fingerprint) -> [count, total_ms, max_ms]
+        self.slow = deque(maxlen=config["BUFFER_SIZE"])
+        self.explained = {}  # fingerprint -> monotonic time of its last EXPLAIN
+        self.dropped = 0
+        self.flushed_at = time.monotonic()
+
+    def record(self, context, shape, ms):
+        with self.lock:
+            values = self.aggregates.get((context, shape))
+            if values is None:
+                if len(self.aggregates) >= self.config["MAX_FINGERPRINTS"]:
+                    self.dropped += 1
+                    return
+                values = self.aggregates[context, shape] = [0, 0.0, 0.0]
+            values[0] += 1
+            values[1] += ms
+            values[2] = max(values[2], ms)
+
+    def should_explain(self, shape):
+        now = time.monotonic()
+        with self.lock:
+            last = self.explained.get(shape)
+            if last is not None and now - last < self.config["EXPLAIN_INTERVAL"]:
+                return False
+            if len(self.explained) >= self.config["MAX_FINGERPRINTS"]:
+                self.explained.clear()
+            self.explained[shape] = now
+            return True
+
+    def add_slow(self, entry):
+        with self.lock:
+            self.slow.append(entry)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "process": self.process,
+                "updated": time.time(),
+                "dropped": self.dropped,
+                "aggregates": [
+                    [context, shape, *values]
+                    for (context, shape), values in self.aggregates.items()
+                ],
+                "slow": [entry._asdict() for entry in self.slow],
+            }
+
+    def flush_due(self):
+        return time.monotonic() - self.flushed_at >= self.config["FLUSH_INTERVAL"]
+
+    def flush(self, force=False):
+        """Write this process's snapshot to the shared cache if it is due."""
+        if not (force or self.flush_due()):
+            return
+        self.flushed_at = time.monotonic()
+        retention = self.config["RETENTION"]
+        try:
+            cache.set(f"slowq:{self.process}", self.snapshot(), retention)
+            # get/set can lose a concurrent registration; the process
+            # registers again on its next flush.
+            registry = cache.get(REGISTRY_KEY) or {}
+            cutoff = time.time() - retention
+            registry = {process: seen for process, seen in registry.items() if seen > cutoff}
+            registry[self.process] = time.time()
+            cache.set(REGISTRY_KEY, registry, retention)
+        except Exception:
+            logger.warning("sql slow_log flush_failed", exc_info=True)
+
+
+_log = None
+
+
+def query_log():
+    global _log
+    if _log is None:
+        _log = QueryLog(slow_query_settings())
+    return _log
+
+
+def reset_query_log():
+    """Start this process's log afresh with the current settings (for tests)."""
+    global _log
+    _log = None
+
+
+# A forked worker must not report under its parent's name and numbers.
+os.register_at_fork(after_in_child=reset_query_log)
+
+
+def explain_plan(connection, sql, params):
+    """EXPLAIN output for a statement that just ran, as text, or None."""
+    token = _explaining.set(True)
+    try:
+        # A failed EXPLAIN must not abort the surrounding transaction.
+        atomic = (
+            transaction.atomic(using=connection.alias)
+            if connection.in_atomic_block
+            else nullcontext()
+        )
+        with atomic, connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join("\t".join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError:
+        return None
+    finally:
+        _explaining.reset(token)
+
+
+class SlowQueryRecorder(QueryRecorder):
+    """
+    ``execute_wrapper`` adding each statement to the process's QueryLog
+    under ``label[0]``, the view or task name; callers may update it once
+    the name is known.
+    """
+
+    def __init__(self, label):
+        super().__init__()
+        self.label = label
+
+    def __call__(self, execute, sql, params, many, context):
+        if _explaining.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = execute(sql, params, many, context)
+            failed = False
+            return result
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            log = query_log()
+            shape = cached_fingerprint(sql)
+            log.record(self.label[0], shape, ms)
+            if ms >= log.config["THRESHOLD_MS"]:
+                self.capture(log, context["connection"], sql, params, shape, ms, not (failed or many))
+
+    def capture(self, log, connection, sql, params, shape, ms, explain):
+        plan = None
+        if (
+            explain
+            and log.config["EXPLAIN"]
+            and sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS)
+            and log.should_explain(shape)
+        ):
+            plan = explain_plan(connection, sql, params)
+        log.add_slow(
+            SlowQuery(
+                at=time.time(),
+                context=self.label[0],
+                fingerprint=shape,
+                ms=round(ms, 2),
+                request_id=request_id_var.get(),
+                plan=plan,
+            )
+        )
+        logger.warning(
+            "sql slow context=%s db=%s ms=%.1f shape=%s",
+            self.label[0],
+            connection.alias,
+            ms,
+            shape[:1000],
+        )
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Record every request's SQL under its URL name (see module docstring)."""
+
+    def __init__(self, get_response):
+        if not slow_query_settings()["ENABLED"]:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    @contextmanager
+    def around(self, request):
+        # Until the URL resolves, the statements belong to the middleware.
+        request.query_label = ["middleware"]
+        call = Call()
+        with SlowQueryRecorder(request.query_label).installed():
+            yield call
+        if query_log().flush_due():
+            call.defer(query_log().flush)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_label[0] = request.resolver_match.view_name
+        return None
+
+
+# Celery
+
+_task_recorders = {}
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    # Eager tasks run inside a request that already records them.
+    if task.request.is_eager or not slow_query_settings()["ENABLED"]:
+        return
+    _task_recorders[task_id] = SlowQueryRecorder([task.name]).installed()
+
+
+def _task_postrun(task_id=None, **kwargs):
+    recorders = _task_recorders.pop(task_id, None)
+    if recorders is not None:
+        recorders.close()
+        query_log().flush()
+
+
+def install_slow_query_log():
+    """Connect the Celery task hooks; settings are read when they fire."""
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+
+
+def top_offenders(limit=20, order_by="total_ms", context=None):
+    """
+    ``(shapes, slow)`` across every process that flushed recently: the
+    ``limit`` worst (context, fingerprint) rows by ``order_by``, and the
+    slowest captured statement of each shape, slowest first.
+    """
+    if order_by not in ORDERINGS:
+        raise ValueError(f"order_by must be one of {', '.join(ORDERINGS)}.")
+    query_log().flush(force=True)
+    registry = cache.get(REGISTRY_KEY) or {}
+    snapshots = cache.get_many([f"slowq:{process}" for process in registry]).values()
+
+    shapes, slowest, plans = {}, {}, {}
+    for snapshot in snapshots:
+        for row_context, shape, count, total_ms, max_ms in snapshot["aggregates"]:
+            if context and row_context != context:
+                continue
+            row = shapes.setdefault(
+                (row_context, shape),
+                {"context": row_context, "fingerprint": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            row["count"] += count
+            row["total_ms"] += total_ms
+            row["max_ms"] = max(row["max_ms"], max_ms)
+        for entry in snapshot["slow"]:
+            if context and entry["context"] != context:
+                continue
+            key = entry["context"], entry["fingerprint"]
+            if entry["plan"]:
+                plans.setdefault(key, entry["plan"])
+            if key not in slowest or entry["ms"] > slowest[key]["ms"]:
+                slowest[key] = entry
+
+    for row in shapes.values():
+        row["total_ms"] = round(row["total_ms"], 2)
+        row["avg_ms"] = round(row["total_ms"] / row["count"], 2) if row["count"] else 0.0
+    rows = sorted(shapes.values(), key=lambda row: row[order_by], reverse=True)[:limit]
+    # The slowest run may have been inside another's EXPLAIN_INTERVAL.
+    slow = [{**entry, "plan": entry["plan"] or plans.get(key)} for key, entry in slowest.items()]
+    slow.sort(key=lambda entry: entry["ms"], reverse=True)
+    return rows, slow[:limit]
+
+
+# A plain view: this module is imported with the Celery app, before
+# settings are loaded, which rules out DRF's APIView.
+@require_GET
+def slow_query_report(request):
+    """Staff only: the worst query shapes and the slowest statements with their plans."""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({"detail": "Staff only."}, status=403)
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 20)), 200))
+    except ValueError:
+        return JsonResponse({"limit": "Must be an integer."}, status=400)
+    order_by = request.GET.get("order_by", "total_ms")
+    if order_by not in ORDERINGS:
+        return JsonResponse({"order_by": f"One of {', '.join(ORDERINGS)}."}, status=400)
+    shapes, slow = top_offenders(limit, order_by, request.GET.get("context"))
+    return JsonResponse({"shapes": shapes, "slow": slow})
@@ -8,6 +8,11 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.views.generic import TemplateView
+from django.views.static import serve
+
+from apps.marketplace.storage import IMMUTABLE_CACHE_CONTROL, ContentAddressedStorage
+from config.metrics import metrics_view
+from config.slow_queries import slow_query_report
 
 
 def api_root(request):
@@ -27,11 +32,22 @@ def api_root(request):
     )
 
 
+def serve_media(request, path, document_root=None):
+    """Serve media files, marking content-addressed ones as immutable."""
+    response = serve(request, path, document_root=document_root)
+    if ContentAddressedStorage.is_content_addressed(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
 urlpatterns = [
     # API Root
     path("api/", api_root, name="api_root"),
     # Admin
     path("admin/", admin.site.urls),
+    path("api/admin/slow-queries/", slow_query_report, name="slow-queries"),
+    # Prometheus scrape target
+    path("metrics", metrics_view, name="metrics"),
     # API Endpoints
     path("api/profiles/", include("apps.profiles.urls")),
     path("api/bookings/", include("apps.bookings.urls")),
@@ -49,5 +65,7 @@ urlpatterns = [
 
 # Serve media files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(
+        settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT
+    )
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -6,13 +6,22 @@ echo "🚀 Starting TailoRent backend with Celery..."
 # Activate virtual environment
 source fashion/bin/activate
 
+# Every process writes its metrics here and /metrics adds them up
+# (see config.metrics); start from an empty directory.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-$PWD/var/metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start Django server
 echo "Starting Django server on http://127.0.0.1:8000"
 python manage.py runserver &
 
-# Start Celery worker
-echo "Starting Celery worker..."
-celery -A config worker --loglevel=info &
+# Start Celery workers, one pool per queue so bulk sends never delay OTPs.
+# Prefetch 1 keeps a busy worker from holding messages another could start.
+echo "Starting Celery workers..."
+celery -A config worker -Q otp -c 4 --prefetch-multiplier 1 -n otp@%h --loglevel=info &
+celery -A config worker -Q transactional -c 4 --prefetch-multiplier 1 -n transactional@%h --loglevel=info &
+celery -A config worker -Q bulk,celery -c 2 -n bulk@%h --loglevel=info &
 
 # Start Celery beat scheduler
 echo "Starting Celery beat..."
@@ -2,14 +2,30 @@
 Pytest configuration and fixtures for TailoRent tests.
 """
 
+import os
+
 import pytest
 from django.test import Client
 from django.contrib.auth import get_user_model
 from apps.profiles.models import User
+from config.db.index_advisor import WorkloadRecorder, save_workload
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True, scope="session")
+def query_workload():
+    """Save the suite's queries to $INDEX_ADVISOR_WORKLOAD for ``index_advisor``."""
+    path = os.environ.get("INDEX_ADVISOR_WORKLOAD")
+    if not path:
+        yield
+        return
+    recorder = WorkloadRecorder()
+    with recorder.installed():
+        yield
+    save_workload(recorder.queries, path)
+
+
 @pytest.fixture
 def client():
     """Django test client fixture."""
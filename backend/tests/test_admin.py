@@ -0,0 +1,147 @@
+"""
+Tests for the large-table admin changelists.
+"""
+
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.marketplace.models import NewsfeedPost
+from apps.marketplace.tasks import delete_newsfeed_posts
+from apps.profiles.models import User
+from apps.profiles.tasks import deactivate_users
+from config.admin import EstimatedCountPaginator, selection_chunks
+from config.db.lookups import boolean_mode_term
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    """Test cases for EstimatedCountPaginator."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(email=f"user{n}@example.com", role="Customer") for n in range(30)
+        )
+
+    @mock.patch("config.admin.estimated_count", return_value=5_000_000)
+    def test_unfiltered_uses_estimate(self, estimated_count):
+        """Test that an unfiltered large table is not counted."""
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(User.objects.all(), 100).count
+        self.assertEqual(count, 5_000_000)
+        self.assertEqual(len(queries), 0)
+
+    @mock.patch("config.admin.estimated_count", return_value=5_000_000)
+    @override_settings(LARGE_TABLE_ADMIN={"COUNT_LIMIT": 10})
+    def test_filtered_count_is_capped(self, estimated_count):
+        """Test that filtered lists count exactly up to COUNT_LIMIT."""
+        users = User.objects.filter(email__startswith="user1")
+        self.assertEqual(EstimatedCountPaginator(users, 100).count, 10)
+        users = User.objects.filter(email__startswith="user29")
+        self.assertEqual(EstimatedCountPaginator(users, 100).count, 1)
+
+    def test_small_tables_are_counted(self):
+        """Test that tables without statistics fall back to COUNT(*)."""
+        self.assertEqual(EstimatedCountPaginator(User.objects.all(), 100).count, 30)
+
+
+class LargeTableAdminTest(TestCase):
+    """Test cases for the user and newsfeed admins."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123", role="Admin"
+        )
+        self.client.force_login(self.admin)
+        self.users = User.objects.bulk_create(
+            User(email=f"user{n}@example.com", first_name=f"Name{n}", role="Customer")
+            for n in range(5)
+        )
+
+    def test_user_prefix_search(self):
+        """Test that the user changelist searches by prefix."""
+        response = self.client.get(reverse("admin:profiles_user_changelist"), {"q": "Name3"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user.email for user in response.context["cl"].result_list], ["user3@example.com"]
+        )
+        actions = [name for name, _ in response.context["action_form"].fields["action"].choices]
+        self.assertNotIn("delete_selected", actions)
+
+    def test_deactivate_in_background(self):
+        """Test that deactivation is queued in chunks and skips the acting admin."""
+        with mock.patch.object(deactivate_users, "delay") as delay:
+            response = self.client.post(
+                reverse("admin:profiles_user_changelist"),
+                {
+                    "action": "deactivate_in_background",
+                    "_selected_action": [self.admin.pk, *(user.pk for user in self.users)],
+                },
+            )
+        self.assertEqual(response.status_code, 302)
+        delay.assert_called_once()
+        selection = delay.call_args.args[0]
+        self.assertEqual(json.loads(json.dumps(selection)), selection)
+        queued = [pk for chunk in selection_chunks(selection) for pk in chunk]
+        self.assertEqual(queued, sorted(user.pk for user in self.users))
+
+        self.assertEqual(deactivate_users(selection), 5)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 5)
+        self.assertContains(self.client.get(response.url), "5 users queued to be deactivated.")
+
+    def test_select_all_rebuilds_changelist(self):
+        """Test that "select all" sends the changelist filters, not primary keys."""
+        url = reverse("admin:profiles_user_changelist") + "?role__exact=Customer&q=Name"
+        with mock.patch.object(deactivate_users, "delay") as delay:
+            self.client.post(
+                url,
+                {
+                    "action": "deactivate_in_background",
+                    "select_across": "1",
+                    "_selected_action": [self.users[0].pk],
+                },
+            )
+        selection = delay.call_args.args[0]
+        self.assertNotIn("pks", selection)
+        self.assertEqual(
+            [pk for chunk in selection_chunks(selection) for pk in chunk],
+            sorted(user.pk for user in self.users),
+        )
+
+    def test_newsfeed_search_and_delete(self):
+        """Test content search and chunked background deletes of posts."""
+        posts = NewsfeedPost.objects.bulk_create(
+            NewsfeedPost(user=self.users[n % 5], content=f"Linen suit fitting {n}")
+            for n in range(7)
+        )
+        response = self.client.get(
+            reverse("admin:marketplace_newsfeedpost_changelist"), {"q": "suit"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 7)
+
+        with mock.patch.object(delete_newsfeed_posts, "delay") as delay:
+            self.client.post(
+                reverse("admin:marketplace_newsfeedpost_changelist"),
+                {
+                    "action": "delete_in_background",
+                    "_selected_action": [post.pk for post in posts[1:]],
+                },
+            )
+        delay.assert_called_once()
+        selection = {**delay.call_args.args[0], "chunk_size": 4}
+        self.assertEqual([len(chunk) for chunk in selection_chunks(selection)], [4, 2])
+
+        self.assertEqual(delete_newsfeed_posts(selection), 6)
+        self.assertEqual(NewsfeedPost.objects.get(), posts[0])
+        # Pk lists queued before selections still work.
+        self.assertEqual(delete_newsfeed_posts([posts[0].pk]), 1)
+
+    def test_boolean_mode_term(self):
+        """Test that search terms become prefix matches without stray operators."""
+        self.assertEqual(boolean_mode_term('linen "suit'), "+linen* +suit*")
+        self.assertEqual(boolean_mode_term("+-()"), "")
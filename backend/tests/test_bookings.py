@@ -3,11 +3,14 @@ Tests for bookings app.
 """
 
 import pytest
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
+from django.utils import timezone
 from rest_framework import status
-from apps.bookings.models import Booking
+from apps.bookings.models import Booking, ProfessionalRecommendation
+from apps.bookings.recommendations import build_recommendations, recommended_professionals
 from apps.profiles.models import User
 
 
@@ -87,3 +90,101 @@ class BookingAPITest(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProfessionalRecommendationTest(TestCase):
+    """Test cases for co-occurrence based professional recommendations."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.alice = User.objects.create_user(
+            email="alice@example.com", password="testpass123", role="Customer"
+        )
+        self.bola = User.objects.create_user(
+            email="bola@example.com", password="testpass123", role="Customer"
+        )
+        self.tailor = User.objects.create_user(
+            email="tailor@example.com", password="testpass123", role="Tailor"
+        )
+        self.designer = User.objects.create_user(
+            email="designer@example.com", password="testpass123", role="Fashion_Designer"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", password="testpass123", role="Tailor"
+        )
+
+    def book(self, customer, professional):
+        Booking.objects.create(
+            customer=customer,
+            professional=professional,
+            service_type="Fitting",
+            date=timezone.now(),
+        )
+
+    def test_customer_gets_professionals_booked_by_similar_customers(self):
+        """Test that co-booked professionals are recommended."""
+        self.book(self.alice, self.tailor)
+        self.book(self.bola, self.tailor)
+        self.book(self.bola, self.designer)
+
+        build_recommendations()
+
+        self.assertEqual(
+            [p.id for p in recommended_professionals(self.alice)], [self.designer.id]
+        )
+        self.assertEqual(
+            ProfessionalRecommendation.objects.get(user=self.tailor).professional_ids,
+            [self.designer.id],
+        )
+
+    def test_new_customer_falls_back_to_popular(self):
+        """Test that customers without bookings get the most booked professionals."""
+        self.book(self.alice, self.tailor)
+        self.book(self.bola, self.tailor)
+        self.book(self.bola, self.designer)
+        build_recommendations()
+
+        newcomer = User.objects.create_user(
+            email="new@example.com", password="testpass123", role="Customer"
+        )
+        self.assertEqual(
+            [p.id for p in recommended_professionals(newcomer, limit=2)],
+            [self.tailor.id, self.designer.id],
+        )
+
+    def test_stale_rows_removed(self):
+        """Test that a rebuild drops lists of users who no longer have bookings."""
+        self.book(self.alice, self.tailor)
+        self.book(self.bola, self.tailor)
+        self.book(self.bola, self.designer)
+        build_recommendations()
+        self.assertTrue(ProfessionalRecommendation.objects.filter(user=self.alice).exists())
+
+        Booking.objects.filter(customer=self.alice).delete()
+        build_recommendations()
+        self.assertFalse(ProfessionalRecommendation.objects.filter(user=self.alice).exists())
+        self.assertTrue(ProfessionalRecommendation.objects.filter(user=self.bola).exists())
+
+    @override_settings(RECOMMENDATIONS_NEIGHBOURS=1)
+    def test_neighbours_pruned(self):
+        """Test that customers are only scored from each professional's closest neighbours."""
+        # designer shares both of tailor's customers, other only one.
+        self.book(self.alice, self.tailor)
+        self.book(self.alice, self.designer)
+        self.book(self.bola, self.tailor)
+        self.book(self.bola, self.designer)
+        self.book(self.bola, self.other)
+        cara = User.objects.create_user(
+            email="cara@example.com", password="testpass123", role="Customer"
+        )
+        self.book(cara, self.tailor)
+        build_recommendations()
+        self.assertEqual(
+            ProfessionalRecommendation.objects.get(user=self.tailor).professional_ids,
+            [self.designer.id],
+        )
+        self.assertEqual(
+            ProfessionalRecommendation.objects.get(user=cara).professional_ids,
+            [self.designer.id],
+        )
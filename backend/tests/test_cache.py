@@ -0,0 +1,137 @@
+"""
+Tests for the two-tier cache.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.bookings.models import Booking
+from apps.bookings.views import dashboard_cache
+from apps.profiles.models import User
+from config import cache as tiered
+from config.cache import TieredCache, cache_stats, cached, invalidate_tags, tag
+
+
+class TieredCacheTest(TestCase):
+    """Test cases for TieredCache."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        tiered.reset_local_cache()
+        self.store = TieredCache("test", timeout=60)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_local_then_shared_hits(self):
+        """Test that values come from the LRU, then the shared tier."""
+        self.assertEqual(self.store.get_or_set("k", self.compute), 1)
+        self.assertEqual(self.store.get_or_set("k", self.compute), 1)
+        tiered.local_cache().clear()
+        self.assertEqual(self.store.get_or_set("k", self.compute), 1)
+        stats = cache_stats()["test"]
+        self.assertEqual((stats["misses"], stats["local_hits"], stats["shared_hits"]), (1, 1, 1))
+
+    def test_tag_invalidation(self):
+        """Test that bumping a tag invalidates entries carrying it."""
+        self.store.get_or_set("k", self.compute, tags=["a"])
+        self.store.get_or_set("other", self.compute, tags=["b"])
+        invalidate_tags("a")
+        self.assertEqual(self.store.get_or_set("k", self.compute, tags=["a"]), 3)
+        self.assertEqual(self.store.get_or_set("other", self.compute, tags=["b"]), 2)
+
+    def test_locked_key_serves_stale_value(self):
+        """Test that readers don't recompute while another holds the lock."""
+        self.store.get_or_set("k", self.compute)
+        tiered.local_cache().clear()
+        cache.add(f"lock:{self.store.make_key('k')}", 1)
+        with mock.patch.object(TieredCache, "_expire_early", return_value=True):
+            self.assertEqual(self.store.get_or_set("k", self.compute), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache_stats()["test"]["stale_served"], 1)
+
+    def test_lru_is_bounded(self):
+        """Test that the local tier evicts least-recently-used entries."""
+        lru = tiered.LocalLRU(max_entries=2)
+        for key in "abc":
+            lru.set(key, (key, 0, 0, (), ()), 60)
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(lru.get("c")[0], "c")
+
+    def test_cached_decorator_tracks_models(self):
+        """Test that saving a tagged model invalidates decorated results."""
+
+        @cached("users", tags=[User])
+        def user_count():
+            return User.objects.count()
+
+        self.assertEqual(user_count(), 0)
+        User.objects.create_user(email="new@example.com", password="pass12345", role="Customer")
+        self.assertEqual(user_count(), 1)
+
+
+class DashboardCacheTest(TestCase):
+    """Test cases for cached booking dashboards."""
+
+    def test_booking_change_invalidates_dashboard(self):
+        """Test that a new booking refreshes only its participants' counts."""
+        cache.clear()
+        tiered.reset_local_cache()
+        customer = User.objects.create_user(email="c@example.com", password="pass12345", role="Customer")
+        tailor = User.objects.create_user(email="t@example.com", password="pass12345", role="Tailor")
+        key = f"customer:{customer.id}"
+        tags = [tag("bookings", "customer", customer.id)]
+        count = lambda: Booking.objects.filter(customer=customer).count()
+
+        self.assertEqual(dashboard_cache.get_or_set(key, count, tags=tags), 0)
+        Booking.objects.create(
+            customer=customer, professional=tailor, service_type="Suit", date="2026-01-15T10:00Z"
+        )
+        self.assertEqual(dashboard_cache.get_or_set(key, count, tags=tags), 1)
+
+    def test_dashboards_through_views(self):
+        """Test that each role reaches its dashboard and sees new bookings."""
+        cache.clear()
+        tiered.reset_local_cache()
+        customer = User.objects.create_user(email="c@example.com", password="pass12345", role="Customer")
+        tailor = User.objects.create_user(email="t@example.com", password="pass12345", role="Tailor")
+        client = APIClient()
+
+        client.force_authenticate(customer)
+        self.assertEqual(client.get(reverse("customer-dashboard")).data["total_bookings"], 0)
+        self.assertEqual(client.get(reverse("professional-dashboard")).status_code, 403)
+        Booking.objects.create(
+            customer=customer, professional=tailor, service_type="Suit", date="2026-01-15T10:00Z"
+        )
+        self.assertEqual(client.get(reverse("customer-dashboard")).data["total_bookings"], 1)
+
+        client.force_authenticate(tailor)
+        response = client.get(reverse("professional-dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["pending_bookings"], 1)
+        self.assertEqual(client.get(reverse("customer-dashboard")).status_code, 403)
+
+    def test_invalidated_again_on_commit(self):
+        """Test that counts cached before the writer commits are dropped."""
+        cache.clear()
+        tiered.reset_local_cache()
+        customer = User.objects.create_user(email="c@example.com", password="pass12345", role="Customer")
+        tailor = User.objects.create_user(email="t@example.com", password="pass12345", role="Tailor")
+        key = f"customer:{customer.id}"
+        tags = [tag("bookings", "customer", customer.id)]
+        stale = lambda: 0
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                customer=customer, professional=tailor, service_type="Suit", date="2026-01-15T10:00Z"
+            )
+            # A reader that can't see the uncommitted booking yet.
+            self.assertEqual(dashboard_cache.get_or_set(key, stale, tags=tags), 0)
+        count = lambda: Booking.objects.filter(customer=customer).count()
+        self.assertEqual(dashboard_cache.get_or_set(key, count, tags=tags), 1)
@@ -0,0 +1,247 @@
+"""
+Tests for database pooling and replica routing.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from apps.bookings.models import Booking, ProfessionalRecommendation
+from apps.marketplace.models import Product
+from apps.profiles.models import User
+from config.db.bulk import bulk_upsert
+from config.db.pool import ConnectionPool, PoolExhausted
+from config.db.routers import ReplicaRouter, routing
+from config.middleware import ReplicaRoutingMiddleware
+
+
+def ping(connection):
+    try:
+        connection.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Test cases for ConnectionPool."""
+
+    def make_pool(self, **options):
+        options = {
+            "max_size": 2,
+            "timeout": 0,
+            "max_lifetime": 60,
+            "health_check_interval": 60,
+            **options,
+        }
+        return ConnectionPool("test", **options)
+
+    def connect(self):
+        return sqlite3.connect(":memory:", check_same_thread=False)
+
+    def test_connections_are_reused(self):
+        """Test that a returned connection is handed out again."""
+        pool = self.make_pool()
+        first = pool.checkout(self.connect, ping)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(self.connect, ping), first)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["reused"], 1)
+
+    def test_exhaustion_is_counted(self):
+        """Test that checkouts beyond MAX_SIZE time out and are counted."""
+        pool = self.make_pool()
+        pool.checkout(self.connect, ping)
+        pool.checkout(self.connect, ping)
+        with self.assertRaises(PoolExhausted):
+            pool.checkout(self.connect, ping)
+        self.assertEqual(pool.stats()["exhausted"], 1)
+        self.assertEqual(pool.stats()["in_use"], 2)
+
+    def test_dead_and_expired_connections_are_replaced(self):
+        """Test health checks and max-lifetime rotation."""
+        pool = self.make_pool(health_check_interval=0)
+        dead = pool.checkout(self.connect, ping)
+        pool.checkin(dead)
+        dead.close()
+        self.assertIsNot(pool.checkout(self.connect, ping), dead)
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+        pool = self.make_pool(max_lifetime=0)
+        old = pool.checkout(self.connect, ping)
+        pool.checkin(old)
+        self.assertIsNot(pool.checkout(self.connect, ping), old)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
+    def test_foreign_connections_are_closed(self):
+        """Test that only connections this pool handed out are taken back."""
+        pool = self.make_pool()
+        own = pool.checkout(self.connect, ping)
+        foreign = self.connect()
+        pool.checkin(foreign)
+        pool.checkin(own)
+        pool.checkin(own)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            foreign.execute("SELECT 1")
+        self.assertTrue(ping(own))
+        stats = pool.stats()
+        self.assertEqual((stats["size"], stats["idle"], stats["foreign"]), (1, 1, 1))
+
+
+class PooledSQLiteBackendTest(TestCase):
+    """Test cases for the pooled SQLite backend."""
+
+    def test_close_returns_connection_to_pool(self):
+        """Test that closing a Django connection recycles the raw connection."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        handler = ConnectionHandler(
+            {
+                "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+                "pooled": {
+                    "ENGINE": "config.db.backends.sqlite3",
+                    "NAME": os.path.join(directory, "pool.sqlite3"),
+                    "POOL": {"MAX_SIZE": 1},
+                }
+            }
+        )
+        connection = handler["pooled"]
+        for _ in range(3):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.close()
+
+        stats = connection.pool().stats()
+        self.assertEqual((stats["created"], stats["reused"], stats["idle"]), (1, 2, 1))
+
+    def test_open_transaction_rolled_back_on_reuse(self):
+        """Test that work left uncommitted is not seen by the next user."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        handler = ConnectionHandler(
+            {
+                "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+                "uncommitted": {
+                    "ENGINE": "config.db.backends.sqlite3",
+                    "NAME": os.path.join(directory, "uncommitted.sqlite3"),
+                    "POOL": {"MAX_SIZE": 1},
+                    "AUTOCOMMIT": False,
+                },
+            }
+        )
+        # Pools are per process and alias, so this one gets its own.
+        connection = handler["uncommitted"]
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (id integer)")
+        connection.commit()
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO t VALUES (1)")
+        connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM t")
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertEqual(connection.pool().stats()["reused"], 1)
+        connection.close()
+
+
+REPLICA_LAG = {"replica": 0}
+
+
+def fake_replica_lag(alias):
+    return REPLICA_LAG[alias]
+
+
+@override_settings(
+    REPLICA_ROUTING={
+        "REPLICAS": ["replica"],
+        "LAG_PROBE": "tests.test_database.fake_replica_lag",
+        "LAG_CHECK_INTERVAL": 0,
+    }
+)
+class ReplicaRouterTest(SimpleTestCase):
+    """Test cases for ReplicaRouter and ReplicaRoutingMiddleware."""
+
+    def setUp(self):
+        """Set up test data."""
+        REPLICA_LAG["replica"] = 0
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.user = User(id=42, email="reader@example.com", role="Customer")
+
+    def request(self, method="get"):
+        request = getattr(RequestFactory(), method)("/")
+        request.user = self.user
+        return request
+
+    def test_reads_outside_safe_requests_use_primary(self):
+        """Test that only safe requests read from replicas."""
+        self.assertIsNone(self.router.db_for_read(Product))
+        with routing(self.request("post"), use_replicas=False):
+            self.assertIsNone(self.router.db_for_read(Product))
+        with routing(self.request(), use_replicas=True):
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+            self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_lagging_replica_leaves_rotation(self):
+        """Test that a replica over MAX_LAG_SECONDS gets no reads."""
+        REPLICA_LAG["replica"] = 60
+        with routing(self.request(), use_replicas=True):
+            self.assertIsNone(self.router.db_for_read(Product))
+        REPLICA_LAG["replica"] = 1
+        with routing(self.request(), use_replicas=True):
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_writers_are_pinned_to_primary(self):
+        """Test read-your-writes stickiness after a write."""
+
+        def write_then_read(request):
+            self.assertEqual(self.router.db_for_write(Booking), "default")
+            self.assertIsNone(self.router.db_for_read(Booking))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(write_then_read)(self.request("post"))
+
+        def read(request):
+            return HttpResponse(str(self.router.db_for_read(Booking)))
+
+        self.assertEqual(ReplicaRoutingMiddleware(read)(self.request()).content, b"None")
+        cache.clear()
+        self.assertEqual(ReplicaRoutingMiddleware(read)(self.request()).content, b"replica")
+
+
+class BulkUpsertTest(TestCase):
+    """Test cases for bulk_upsert."""
+
+    def test_upsert(self):
+        """Test that existing rows are updated and new ones inserted."""
+        user = User.objects.create_user(
+            email="user@example.com", password="pass12345", role="Customer"
+        )
+        ProfessionalRecommendation.objects.create(user=user, professional_ids=[1])
+        bulk_upsert(
+            ProfessionalRecommendation,
+            [ProfessionalRecommendation(user=user, professional_ids=[2])],
+            unique_fields=["user"],
+            update_fields=["professional_ids"],
+        )
+        self.assertEqual(ProfessionalRecommendation.objects.get().professional_ids, [2])
+
+    def test_mysql_has_no_conflict_target(self):
+        """Test that unique_fields are left out where the backend rejects them."""
+        with mock.patch.object(
+            connection.features, "supports_update_conflicts_with_target", False
+        ), mock.patch.object(ProfessionalRecommendation._default_manager, "bulk_create") as create:
+            bulk_upsert(ProfessionalRecommendation, [], ["user"], ["professional_ids"])
+        self.assertIsNone(create.call_args.kwargs["unique_fields"])
+
@@ -0,0 +1,121 @@
+"""
+Tests for the workload-driven index advisor.
+"""
+
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.marketplace.models import Product
+from apps.profiles.models import User
+from config.db.index_advisor import (
+    WorkloadRecorder,
+    advise,
+    candidate_indexes,
+    load_workload,
+    save_workload,
+    unused_indexes,
+)
+
+
+class CandidateIndexTest(TestCase):
+    """Test cases for deriving candidate indexes from SQL."""
+
+    def test_equality_then_range(self):
+        """Test that equality columns come first, then one range column."""
+        [candidate] = candidate_indexes(
+            'SELECT "t"."id" FROM "t" WHERE ("t"."created" > %s AND "t"."user_id" = %s '
+            'AND "t"."status" IN (%s, %s)) ORDER BY "t"."name" ASC'
+        )
+        self.assertEqual(candidate.columns, ("user_id", "status", "created"))
+
+    def test_sort_columns(self):
+        """Test that ORDER BY columns follow the equality columns."""
+        [candidate] = candidate_indexes(
+            'SELECT "t"."id" FROM "t" WHERE "t"."user_id" = %s ORDER BY "t"."date" DESC LIMIT 5'
+        )
+        self.assertEqual(candidate.columns, ("user_id", "-date"))
+
+    def test_or_groups_ignored(self):
+        """Test that OR-ed predicates don't suggest a composite index."""
+        self.assertEqual(
+            candidate_indexes(
+                'SELECT "t"."id" FROM "t" WHERE ("t"."a" = %s OR "t"."b" = %s) LIMIT 1'
+            ),
+            [],
+        )
+        [candidate] = candidate_indexes(
+            'SELECT "t"."id" FROM "t" WHERE ("t"."c" = %s AND ("t"."a" = %s OR "t"."b" = %s))'
+        )
+        self.assertEqual(candidate.columns, ("c",))
+
+
+class IndexAdvisorTest(TestCase):
+    """Test cases for advise() and unused_indexes() on the test database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendor = User.objects.create_user(
+            email="vendor@example.com", password="pass12345", role="Vendor"
+        )
+        Product.objects.bulk_create(
+            Product(vendor=vendor, name=f"Ankara {n}", price=Decimal(n)) for n in range(300)
+        )
+
+    def record(self, queryset):
+        recorder = WorkloadRecorder()
+        with recorder.installed():
+            list(queryset)
+        return recorder.queries
+
+    def test_recommends_missing_index(self):
+        """Test that a scanned filter gets a cheaper composite index."""
+        workload = self.record(Product.objects.filter(name="Ankara 7", price__lt=10))
+        [recommendation] = advise(workload)
+        self.assertIs(recommendation.model, Product)
+        self.assertEqual(recommendation.index.fields, ["name", "price"])
+        self.assertLess(recommendation.cost_after, recommendation.cost_before)
+        self.assertFalse(recommendation.estimated)
+
+    def test_covered_shapes_skipped(self):
+        """Test that lookups an existing index serves are not recommended."""
+        workload = self.record(Product.objects.filter(vendor_id=1))
+        workload += self.record(User.objects.filter(email="vendor@example.com"))
+        self.assertEqual(advise(workload), [])
+
+    def test_workload_round_trip(self):
+        """Test that a saved workload loads back with its parameters."""
+        workload = self.record(Product.objects.filter(name="Ankara 7"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "workload.jsonl"
+            save_workload(workload, path)
+            loaded = load_workload(path)
+        self.assertEqual([query.sql for query in loaded], [query.sql for query in workload])
+        self.assertEqual(loaded[0].params, ["Ankara 7"])
+
+    def test_unused_indexes(self):
+        """Test that indexes the workload's plans never read are flagged."""
+        workload = self.record(User.objects.filter(email="vendor@example.com"))
+        unused = unused_indexes(workload)
+        self.assertIn("user_first_name_idx", {item.name for item in unused})
+        # Unique indexes enforce constraints and are never flagged.
+        self.assertNotIn(["email"], [item.columns for item in unused])
+
+    def test_command(self):
+        """Test the command's report and its empty-workload error."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "workload.jsonl"
+            save_workload(self.record(Product.objects.filter(vendor_id=1)), path)
+            out = StringIO()
+            call_command("index_advisor", str(path), "--unused", stdout=out)
+            self.assertIn("No missing indexes found.", out.getvalue())
+            self.assertIn("Unused indexes", out.getvalue())
+
+            path.write_text("")
+            with self.assertRaises(CommandError):
+                call_command("index_advisor", str(path), stdout=StringIO())
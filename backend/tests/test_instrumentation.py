@@ -0,0 +1,204 @@
+"""
+Tests for request and SQL instrumentation.
+"""
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, override_settings
+from django.urls import path
+from apps.profiles.models import User
+from config.instrumentation import fingerprint
+from config.middleware import QueryBudgetExceeded, QueryInstrumentationMiddleware
+from config.profiling import ProfilingMiddleware, make_profile_token
+
+
+def n_plus_one_view(request):
+    for user in User.objects.all():
+        User.objects.filter(pk=user.pk).exists()
+    return HttpResponse("ok")
+
+
+class FingerprintTest(TestCase):
+    """Test cases for SQL fingerprinting."""
+
+    def test_literals_and_in_lists_collapse(self):
+        """Test that statements differing only in values share a shape."""
+        first = fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'")
+        second = fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = %s")
+        self.assertEqual(first, second)
+        self.assertEqual(first, "SELECT * FROM t WHERE id IN (...) AND name = ?")
+
+
+class QueryInstrumentationMiddlewareTest(TestCase):
+    """Test cases for QueryInstrumentationMiddleware."""
+
+    def setUp(self):
+        """Set up test data."""
+        for i in range(6):
+            User.objects.create_user(
+                email=f"user{i}@example.com", password="testpass123", role="Customer"
+            )
+        self.request = RequestFactory().get("/")
+
+    def test_server_timing_and_n_plus_one(self):
+        """Test that query counts are reported and N+1 shapes are logged."""
+        middleware = QueryInstrumentationMiddleware(n_plus_one_view)
+        with self.assertLogs("tailorent.sql", level="INFO") as logs:
+            response = middleware(self.request)
+
+        self.assertIn('desc="7 queries"', response["Server-Timing"])
+        self.assertTrue(any("n_plus_one" in line and "count=6" in line for line in logs.output))
+
+    @override_settings(
+        QUERY_INSTRUMENTATION={"DEFAULT_BUDGET": 3, "BUDGET_ACTION": "raise"}
+    )
+    def test_budget_raises(self):
+        """Test that raise mode fails requests over their query budget."""
+        middleware = QueryInstrumentationMiddleware(n_plus_one_view)
+        with self.assertRaises(QueryBudgetExceeded):
+            middleware(self.request)
+
+    @override_settings(QUERY_INSTRUMENTATION={"SAMPLE_RATE": 0})
+    def test_unsampled_requests_are_untouched(self):
+        """Test that requests outside the sample are not instrumented."""
+        response = QueryInstrumentationMiddleware(n_plus_one_view)(self.request)
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(ROOT_URLCONF="tests.test_instrumentation")
+class ProfilingMiddlewareTest(TestCase):
+    """Test cases for ProfilingMiddleware."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def get(self, headers=None, path="/profiled/", **config):
+        config = {"ENABLED": True, "DIRECTORY": self.directory, **config}
+        with self.settings(PROFILING=config):
+            # A new client so the middleware is built with this config.
+            response = Client().get(path, headers=headers or {})
+        return response, sorted(os.listdir(self.directory))
+
+    def test_disabled_middleware_is_removed(self):
+        """Test that the middleware opts out of the chain when disabled."""
+        with self.settings(PROFILING={"ENABLED": False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_unselected_request_is_not_profiled(self):
+        """Test that requests without a trigger go straight to the view."""
+        response, files = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(files, [])
+
+    def test_signed_header_writes_profiles(self):
+        """Test that a signed header profiles the view and writes both outputs."""
+        response, files = self.get(headers={"X-Profile": make_profile_token()})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(name.endswith(".pstats") for name in files))
+        self.assertTrue(any(name.endswith(".collapsed") for name in files))
+        self.assertIn(response["X-Profile-Id"], files[0])
+
+    def test_bad_token_and_rotation(self):
+        """Test that forged tokens are ignored and old profiles are rotated out."""
+        _, files = self.get(headers={"X-Profile": "profile:forged"})
+        self.assertEqual(files, [])
+        for _ in range(3):
+            response, files = self.get(VIEWS=["profiled"], MAX_FILES=2)
+        self.assertEqual(len(files), 2)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_async_view_sampled(self):
+        """Test that sampled coroutine views run normally and are profiled."""
+        response, files = self.get(path="/profiled-async/", SAMPLE_RATE=1)
+        self.assertEqual(response.content, b"async")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertTrue(any("profiled-async" in name for name in files))
+
+    def test_view_errors_reach_exception_handling(self):
+        """Test that profiled views still fail through the normal handler."""
+        with self.assertRaises(ValueError):
+            self.get(path="/profiled-error/", SAMPLE_RATE=1)
+        self.assertTrue(any("profiled-error" in name for name in os.listdir(self.directory)))
+
+
+@override_settings(ROOT_URLCONF="tests.test_instrumentation")
+class RequestRecorderTest(TestCase):
+    """Test cases for sharing one QueryRecorder per request."""
+
+    def test_middlewares_share_one_wrapper(self):
+        """Test that metrics and instrumentation count SQL through one wrapper."""
+        response = Client().get("/wrappers/")
+        # The shared QueryRecorder and the slow query log's own recorder.
+        self.assertEqual(response.content, b"2")
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+
+@override_settings(
+    ROOT_URLCONF="tests.test_instrumentation",
+    DEBUG=True,
+    REPLICA_ROUTING={"REPLICAS": ["default"]},
+)
+class HybridMiddlewareTest(TestCase):
+    """Test cases for running the project middleware natively under ASGI."""
+
+    def test_asgi_handler_adapts_nothing(self):
+        """Test that building the ASGI chain adapts no handler to sync."""
+        with mock.patch("django.core.handlers.base.logger") as logger:
+            ASGIHandler()
+        adapted = [call for call in logger.debug.call_args_list if "adapted" in call.args[0]]
+        self.assertEqual(adapted, [])
+
+    async def test_async_request_through_the_stack(self):
+        """Test that an async view gets the middleware headers under ASGI."""
+        response = await AsyncClient().get("/profiled-async/")
+        self.assertEqual(response.content, b"async")
+        self.assertEqual(len(response["X-Request-ID"]), 32)
+        self.assertIn("Server-Timing", response)
+
+    async def test_writes_pin_the_user_off_the_loop(self):
+        """Test that a write under ASGI still pins the user to the primary."""
+        user = await User.objects.acreate(email="hybrid@example.com", role="Customer")
+        client = AsyncClient()
+        await client.aforce_login(user)
+        with mock.patch("config.middleware.pin_to_primary") as pin:
+            await client.post("/async-write/")
+        pin.assert_called_once_with(user.pk)
+
+
+async def async_view(request):
+    return HttpResponse("async")
+
+
+async def async_write_view(request):
+    user = await request.auser()
+    await User.objects.filter(pk=user.pk).aupdate(first_name="Written")
+    return HttpResponse("written")
+
+
+def wrappers_view(request):
+    User.objects.exists()
+    return HttpResponse(str(len(connection.execute_wrappers)))
+
+
+def error_view(request):
+    raise ValueError("boom")
+
+
+urlpatterns = [
+    path("profiled/", n_plus_one_view, name="profiled"),
+    path("profiled-async/", async_view, name="profiled-async"),
+    path("profiled-error/", error_view, name="profiled-error"),
+    path("async-write/", async_write_view, name="async-write"),
+    path("wrappers/", wrappers_view, name="wrappers"),
+]
@@ -0,0 +1,171 @@
+"""
+Tests for the queued, structured logging pipeline.
+"""
+
+import json
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from config.log import (
+    JSONFormatter,
+    QueuedHandler,
+    SamplingFilter,
+    _stamp_request_id,
+    _task_postrun,
+    _task_prerun,
+    request_id_var,
+)
+from config.middleware import RequestIDMiddleware
+
+
+class SlowHandler(logging.Handler):
+    """Stands in for a file handler on a slow disk."""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.lines = []
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+        self.setFormatter(JSONFormatter())
+
+    def emit(self, record):
+        self.unblocked.wait()
+        time.sleep(self.delay)
+        self.lines.append(self.format(record))
+
+
+class QueuedHandlerTest(SimpleTestCase):
+    """Test cases for QueuedHandler."""
+
+    def logger(self, handler):
+        logger = logging.getLogger(f"tailorent.tests.{self._testMethodName}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return logger
+
+    def test_slow_disk_does_not_block_callers(self):
+        """Test that logging returns immediately and records are written later."""
+        target = SlowHandler(delay=0.02)
+        handler = QueuedHandler([target])
+        logger = self.logger(handler)
+
+        started = time.perf_counter()
+        for n in range(20):
+            logger.info("event %d", n)
+        self.assertLess(time.perf_counter() - started, 0.1)
+
+        handler.close()
+        self.assertEqual(
+            [json.loads(line)["message"] for line in target.lines],
+            [f"event {n}" for n in range(20)],
+        )
+
+    def test_full_queue_drops(self):
+        """Test that records are dropped and counted when the queue is full."""
+        target = SlowHandler()
+        target.unblocked.clear()
+        handler = QueuedHandler([target], maxsize=5)
+        logger = self.logger(handler)
+
+        for n in range(20):
+            logger.info("event %d", n)
+        self.assertGreaterEqual(handler.dropped, 14)
+        target.unblocked.set()
+        handler.close()
+        self.assertEqual(len(target.lines) + handler.dropped, 20)
+
+    def test_record_snapshot(self):
+        """Test that the message, traceback and request id are captured by the caller."""
+        target = SlowHandler()
+        handler = QueuedHandler([target])
+        logger = self.logger(handler)
+
+        token = request_id_var.set("req-1")
+        try:
+            try:
+                raise ValueError("broken")
+            except ValueError:
+                logger.exception("failed for %s", "user-1", extra={"booking": 7})
+        finally:
+            request_id_var.reset(token)
+        handler.close()
+
+        entry = json.loads(target.lines[0])
+        self.assertEqual(entry["message"], "failed for user-1")
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["booking"], 7)
+        self.assertIn("ValueError: broken", entry["exc"])
+
+
+class SamplingFilterTest(SimpleTestCase):
+    """Test cases for SamplingFilter."""
+
+    def record(self, name, level):
+        return logging.LogRecord(name, level, __file__, 1, "message", None, None)
+
+    def test_sampling(self):
+        """Test that only INFO records of listed loggers are sampled."""
+        sampler = SamplingFilter({"tailorent.sql": 0, "tailorent": 1})
+        self.assertFalse(sampler.filter(self.record("tailorent.sql", logging.INFO)))
+        self.assertFalse(sampler.filter(self.record("tailorent.sql.view", logging.INFO)))
+        self.assertTrue(sampler.filter(self.record("tailorent.sql", logging.WARNING)))
+        self.assertTrue(sampler.filter(self.record("tailorent.sqlite", logging.INFO)))
+        self.assertTrue(sampler.filter(self.record("django", logging.INFO)))
+
+
+class RequestIDTest(SimpleTestCase):
+    """Test cases for request id correlation."""
+
+    def setUp(self):
+        self.seen = []
+
+        def view(request):
+            self.seen.append(request_id_var.get())
+            return HttpResponse()
+
+        self.middleware = RequestIDMiddleware(view)
+        self.factory = RequestFactory()
+
+    def test_new_request_id(self):
+        """Test that a request without an id gets one, in logs and the response."""
+        response = self.middleware(self.factory.get("/"))
+        self.assertEqual(len(response["X-Request-ID"]), 32)
+        self.assertEqual(self.seen, [response["X-Request-ID"]])
+        self.assertIsNone(request_id_var.get())
+
+    def test_incoming_request_id(self):
+        """Test that a plain incoming id is kept and anything else replaced."""
+        response = self.middleware(self.factory.get("/", HTTP_X_REQUEST_ID="lb-123"))
+        self.assertEqual(response["X-Request-ID"], "lb-123")
+        response = self.middleware(self.factory.get("/", HTTP_X_REQUEST_ID="bad id\n"))
+        self.assertNotEqual(response["X-Request-ID"], "bad id\n")
+
+    def test_celery_propagation(self):
+        """Test that tasks log with the id of the request that published them."""
+        headers = {}
+        token = request_id_var.set("req-2")
+        try:
+            _stamp_request_id(headers=headers)
+        finally:
+            request_id_var.reset(token)
+        self.assertEqual(headers, {"request_id": "req-2"})
+
+        task = SimpleNamespace(request=SimpleNamespace(**headers))
+        _task_prerun(task=task, task_id="task-1")
+        self.assertEqual(request_id_var.get(), "req-2")
+        _task_postrun(task=task)
+        self.assertIsNone(request_id_var.get())
+
+        task = SimpleNamespace(request=SimpleNamespace())
+        _task_prerun(task=task, task_id="task-1")
+        self.assertEqual(request_id_var.get(), "task-1")
+        _task_postrun(task=task)
@@ -0,0 +1,406 @@
+"""
+Tests for marketplace app.
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from apps.marketplace.models import (
+    EngagementEvent,
+    MediaBlob,
+    NewsfeedPost,
+    Product,
+    Service,
+    SimilarityDelta,
+    StyleFeed,
+    TimelineEntry,
+    TrendingScore,
+)
+from apps.marketplace import similarity
+from apps.marketplace.timelines import (
+    fan_out_former_celebrities,
+    fan_out_post,
+    refresh_celebrities,
+    timeline_page,
+)
+from apps.marketplace.trending import apply_new_events, record_engagement, trending
+from apps.profiles.models import Follow, User
+from config.cache import reset_local_cache
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Test cases for deduplicated media storage."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.vendor = User.objects.create_user(
+            email="vendor@example.com", password="testpass123", role="Vendor"
+        )
+
+    def create_product(self, name, payload):
+        product = Product(vendor=self.vendor, name=name, price="10.00")
+        product.image.save("fabric.JPG", ContentFile(payload), save=True)
+        return product
+
+    def test_identical_uploads_share_one_file(self):
+        """Test that identical uploads are stored once."""
+        first = self.create_product("Ankara", b"same bytes")
+        second = self.create_product("Ankara copy", b"same bytes")
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith("cas/"))
+        self.assertTrue(first.image.name.endswith(".jpg"))
+        self.assertEqual(MediaBlob.objects.get().refcount, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Test that deleting rows releases references safely."""
+        first = self.create_product("Ankara", b"same bytes")
+        second = self.create_product("Ankara copy", b"same bytes")
+        storage = first.image.storage
+        name = first.image.name
+
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_released_blob_taken_back_before_removal(self):
+        """Test that saving the content again before the file is removed keeps it."""
+        first = self.create_product("Ankara", b"same bytes")
+        storage = first.image.storage
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+        self.assertEqual(MediaBlob.objects.get().refcount, 0)
+        self.create_product("Ankara again", b"same bytes")
+        for callback in callbacks:
+            callback()
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().refcount, 1)
+
+    def test_profile_picture_references_released(self):
+        """Test that replacing and deleting profile pictures releases their blobs."""
+        storage = User._meta.get_field("profile_picture").storage
+        self.vendor.profile_picture.save("me.png", ContentFile(b"first"), save=True)
+        first = self.vendor.profile_picture.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.profile_picture.save("me.png", ContentFile(b"second"), save=True)
+        self.assertFalse(storage.exists(first))
+        second = self.vendor.profile_picture.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.delete()
+        self.assertFalse(storage.exists(second))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_dedupe_media_shared_legacy_file(self):
+        """Test that rows naming the same legacy file all move before it is deleted."""
+        storage = Product._meta.get_field("image").storage
+        legacy = storage.backend.save("products/fabric.jpg", ContentFile(b"legacy bytes"))
+        products = Product.objects.bulk_create(
+            Product(vendor=self.vendor, name=f"Ankara {n}", price="10.00") for n in range(2)
+        )
+        Product.objects.update(image=legacy)
+
+        out = StringIO()
+        call_command("dedupe_media", stdout=out)
+
+        moved = Product.objects.filter(pk__in=[product.pk for product in products])
+        [name] = {product.image.name for product in moved}
+        self.assertTrue(storage.exists(name))
+        self.assertFalse(storage.backend.exists(legacy))
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 2)
+        self.assertIn("1 files migrated", out.getvalue())
+        self.assertIn("0 missing", out.getvalue())
+
+
+class NewsfeedAPITest(APITestCase):
+    """Test cases for the cursor-paginated newsfeed API."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.author = User.objects.create_user(
+            email="author@example.com", password="testpass123", role="Tailor"
+        )
+        self.posts = [
+            NewsfeedPost.objects.create(user=self.author, content=f"Post {i}")
+            for i in range(5)
+        ]
+
+    def test_cursor_walks_every_post_once(self):
+        """Test that following cursors returns each post exactly once."""
+        url = reverse("marketplace:newsfeed-list")
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(post["id"] for post in response.data["results"])
+            cursor = response.data["next"]
+            if cursor is None:
+                break
+
+        expected = [post.id for post in reversed(self.posts)]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        """Test that a garbled cursor is rejected."""
+        url = reverse("marketplace:newsfeed-list")
+        response = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_shows_renamed_author(self):
+        """Test that cached post fragments are re-rendered when the author changes."""
+        cache.clear()
+        reset_local_cache()
+        url = reverse("marketplace:newsfeed")
+        self.author.first_name = "Ada"
+        self.author.save()
+        self.assertContains(self.client.get(url), "Ada", count=5)
+
+        self.author.first_name = "Bisi"
+        self.author.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Bisi", count=5)
+        self.assertNotContains(response, "Ada")
+
+
+class StyleFeedTimelineTest(TestCase):
+    """Test cases for fan-out-on-write StyleFeed timelines."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="testpass123", role="Customer"
+        )
+        self.tailor = User.objects.create_user(
+            email="tailor@example.com", password="testpass123", role="Tailor"
+        )
+        self.designer = User.objects.create_user(
+            email="designer@example.com", password="testpass123", role="Fashion_Designer"
+        )
+        Follow.objects.create(follower=self.customer, followee=self.tailor)
+        Follow.objects.create(follower=self.customer, followee=self.designer)
+
+    def post(self, author, caption):
+        post = StyleFeed.objects.create(user=author, image="stylefeed/a.jpg", caption=caption)
+        fan_out_post(post)
+        return post
+
+    def test_posts_fanned_out_to_followers(self):
+        """Test that followers see posts materialized in their timeline."""
+        first = self.post(self.tailor, "Agbada")
+        second = self.post(self.designer, "Kaftan")
+
+        posts, next_cursor = timeline_page(self.customer)
+        self.assertEqual([p.id for p in posts], [second.id, first.id])
+        self.assertIsNone(next_cursor)
+        self.assertEqual(TimelineEntry.objects.filter(owner=self.customer).count(), 2)
+
+    @override_settings(STYLEFEED_CELEBRITY_FOLLOWERS=1)
+    def test_celebrity_posts_merged_on_read(self):
+        """Test that celebrity posts are not fanned out but still appear."""
+        post = self.post(self.tailor, "Agbada")
+
+        self.assertFalse(
+            TimelineEntry.objects.filter(owner=self.customer, post=post).exists()
+        )
+        posts, _ = timeline_page(self.customer)
+        self.assertEqual([p.id for p in posts], [post.id])
+
+    def test_former_celebrity_posts_kept(self):
+        """Test that posts skipped while the author was a celebrity stay visible."""
+        with self.settings(STYLEFEED_CELEBRITY_FOLLOWERS=1):
+            post = self.post(self.tailor, "Agbada")
+        self.assertTrue(StyleFeed.objects.get(pk=post.pk).merged_on_read)
+
+        # The author drops below the threshold: still merged until delivered.
+        celebrities, _ = refresh_celebrities()
+        self.assertNotIn(self.tailor.pk, celebrities)
+        self.assertEqual([p.id for p in timeline_page(self.customer)[0]], [post.id])
+
+        self.assertEqual(fan_out_former_celebrities(celebrities), 1)
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.customer, post=post).exists())
+        self.assertFalse(StyleFeed.objects.get(pk=post.pk).merged_on_read)
+        refresh_celebrities()
+        self.assertEqual([p.id for p in timeline_page(self.customer)[0]], [post.id])
+
+    def test_pages_follow_cursor(self):
+        """Test that the cursor continues where the previous page stopped."""
+        created = [self.post(self.tailor, f"Look {i}") for i in range(3)]
+
+        first_page, cursor = timeline_page(self.customer, limit=2)
+        second_page, last_cursor = timeline_page(self.customer, cursor=cursor, limit=2)
+        self.assertEqual(
+            [p.id for p in first_page + second_page],
+            [p.id for p in reversed(created)],
+        )
+        self.assertIsNone(last_cursor)
+
+
+@override_settings(TRENDING_EVENT_LAG_SECONDS=0)
+class TrendingTest(TestCase):
+    """Test cases for time-decayed trending rankings."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.tailor = User.objects.create_user(
+            email="tailor@example.com", password="testpass123", role="Tailor"
+        )
+        self.quiet = StyleFeed.objects.create(user=self.tailor, image="stylefeed/a.jpg")
+        self.hot = StyleFeed.objects.create(user=self.tailor, image="stylefeed/b.jpg")
+        self.service = Service.objects.create(
+            provider=self.tailor, title="Suit fitting", description="Fitting", price="50.00"
+        )
+
+    def test_incremental_scores_rank_by_engagement(self):
+        """Test that likes outweigh views and only new events are applied."""
+        record_engagement("view", style_post_id=self.quiet.id)
+        record_engagement("like", style_post_id=self.hot.id)
+        record_engagement("view", service_id=self.service.id)
+
+        self.assertEqual(apply_new_events(), 3)
+        self.assertEqual(apply_new_events(), 0)
+
+        ranking = trending("style")
+        self.assertEqual([post.id for post, _ in ranking], [self.hot.id, self.quiet.id])
+        self.assertEqual([service.id for service, _ in trending("service")], [self.service.id])
+
+    def test_rebuild_matches_incremental(self):
+        """Test that the NumPy rebuild reproduces the incremental scores."""
+        for _ in range(3):
+            record_engagement("view", style_post_id=self.quiet.id)
+        record_engagement("like", style_post_id=self.hot.id)
+        apply_new_events(batch_size=2)
+        incremental = dict(
+            TrendingScore.objects.values_list("object_id", "log_score")
+        )
+
+        call_command("rebuild_trending", stdout=StringIO())
+        rebuilt = dict(TrendingScore.objects.values_list("object_id", "log_score"))
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for object_id, score in incremental.items():
+            self.assertAlmostEqual(score, rebuilt[object_id], places=6)
+
+    @override_settings(TRENDING_EVENT_LAG_SECONDS=60)
+    def test_recent_events_wait_for_lag(self):
+        """Test that events younger than the lag are left for a later run."""
+        record_engagement("view", style_post_id=self.quiet.id)
+        self.assertEqual(apply_new_events(), 0)
+        EngagementEvent.objects.update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(apply_new_events(), 1)
+
+    def test_likes_once_per_user(self):
+        """Test that a user's repeated like of a target is not counted again."""
+        client = APIClient()
+        client.force_authenticate(self.tailor)
+        url = reverse("marketplace:style-feed-like", args=[self.hot.id])
+        self.assertEqual(client.post(url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(EngagementEvent.objects.filter(kind="like").count(), 1)
+
+    def test_service_detail(self):
+        """Test that anyone can view a service but only its provider can change it."""
+        customer = User.objects.create_user(
+            email="customer@example.com", password="testpass123", role="Customer"
+        )
+        url = reverse("marketplace:service-detail", args=[self.service.id])
+        client = APIClient()
+        client.force_authenticate(customer)
+        self.assertEqual(client.get(url).status_code, status.HTTP_200_OK)
+        views = EngagementEvent.objects.filter(kind="view", service=self.service)
+        self.assertTrue(views.exists())
+        response = client.patch(url, {"title": "Mine"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        client.force_authenticate(self.tailor)
+        response = client.patch(url, {"title": "Suit"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SimilarProductsTest(TestCase):
+    """Test cases for the TF-IDF similar-products index."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        settings_override = override_settings(SIMILARITY_INDEX_DIR=self.index_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        vendor = User.objects.create_user(
+            email="vendor@example.com", password="testpass123", role="Vendor"
+        )
+        self.make = lambda name, description: Product.objects.create(
+            vendor=vendor, name=name, description=description, price="10.00"
+        )
+        self.ankara = self.make("Ankara wax print", "Bright cotton ankara wax print")
+        self.ankara_blue = self.make("Blue ankara wax", "Cotton ankara wax print in blue")
+        self.lace = self.make("Swiss lace", "French voile lace with stones")
+
+    def test_build_finds_textual_neighbours(self):
+        """Test that the full build ranks similar products first."""
+        similarity.build_index()
+
+        self.assertEqual(similarity.similar_products(self.ankara.id)[0], self.ankara_blue)
+
+    def test_new_product_indexed_incrementally(self):
+        """Test that a new product gets neighbours without a rebuild."""
+        similarity.build_index()
+        lace_copy = self.make("Swiss voile lace", "Voile lace with stones")
+
+        similarity.update_product(lace_copy.id)
+        self.assertEqual(similarity.similar_products(lace_copy.id)[0], self.lace)
+        self.assertIn(lace_copy, similarity.similar_products(self.lace.id))
+
+    def test_delta_kept_in_database(self):
+        """Test that incremental vectors are stored as rows the next build clears."""
+        similarity.build_index()
+        lace_copy = self.make("Swiss voile lace", "Voile lace with stones")
+        similarity.update_product(lace_copy.id)
+        other_copy = self.make("Voile lace", "Swiss voile lace with stones")
+
+        similarity.update_product(other_copy.id)
+        self.assertEqual(similarity.neighbor_ids(other_copy.id)[0], lace_copy.id)
+        self.assertEqual(SimilarityDelta.objects.count(), 2)
+        similarity.build_index()
+        self.assertFalse(SimilarityDelta.objects.exists())
+
+    def test_renamed_neighbour_shown(self):
+        """Test that cached lists are invalidated by their neighbours' rows."""
+        reset_local_cache()
+        self.addCleanup(reset_local_cache)
+        similarity.build_index()
+        similarity.similar_products(self.ankara.id)
+        self.ankara_blue.name = "Indigo ankara wax"
+        self.ankara_blue.save()
+
+        self.assertEqual(similarity.similar_products(self.ankara.id)[0].name, "Indigo ankara wax")
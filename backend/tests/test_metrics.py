@@ -0,0 +1,126 @@
+"""
+Tests for the Prometheus metrics.
+"""
+
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from apps.bookings.models import Booking
+from apps.profiles.models import User
+from config.cache import TieredCache, reset_local_cache
+from config.metrics import (
+    _task_postrun,
+    _task_prerun,
+    _task_retry,
+    reset_business_gauges,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(CACHES=LOCMEM_CACHE, METRICS={"TOKEN": "s3cret"})
+class MetricsEndpointTest(TestCase):
+    """Test cases for the request middleware and the /metrics endpoint."""
+
+    def setUp(self):
+        reset_business_gauges()
+        self.addCleanup(reset_business_gauges)
+
+    def scrape(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+
+    def test_requests_by_route(self):
+        """Test that requests are timed and their SQL counted by URL name."""
+        route = "profiles:professionals-template"
+        labels = {"route": route, "method": "GET", "status": "200"}
+        before = sample("http_request_duration_seconds_count", **labels)
+        self.client.get(reverse(route))
+        self.assertEqual(sample("http_request_duration_seconds_count", **labels), before + 1)
+        self.assertGreater(sample("http_request_db_queries_sum", route=route), 0)
+
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(f'route="{route}"', response.content.decode())
+
+    def test_business_gauges(self):
+        """Test that bookings are reported by status, zero included."""
+        customer = User.objects.create_user(
+            email="customer@example.com", password="pass12345", role="Customer"
+        )
+        tailor = User.objects.create_user(
+            email="tailor@example.com", password="pass12345", role="Tailor"
+        )
+        Booking.objects.create(
+            customer=customer,
+            professional=tailor,
+            service_type="Fitting",
+            date=timezone.now() + timedelta(days=1),
+        )
+        body = self.scrape().content.decode()
+        self.assertIn('tailorent_bookings{status="pending"} 1.0', body)
+        self.assertIn('tailorent_bookings{status="rejected"} 0.0', body)
+        self.assertIn("tailorent_notifications_unsent", body)
+
+    def test_token(self):
+        """Test that a configured token is required."""
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS={"TOKEN": ""})
+    def test_no_token_only_with_debug(self):
+        """Test that /metrics is refused without a token unless DEBUG is on."""
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_cache_events(self):
+        """Test that TieredCache lookups are counted per namespace."""
+        reset_local_cache()
+        self.addCleanup(reset_local_cache)
+        cache = TieredCache("metrics-test")
+        cache.get_or_set("key", lambda: 1)
+        cache.get_or_set("key", lambda: 1)
+        events = {"namespace": "metrics-test"}
+        self.assertEqual(sample("tiered_cache_events_total", event="misses", **events), 1)
+        self.assertEqual(sample("tiered_cache_events_total", event="local_hits", **events), 1)
+
+
+class TaskMetricsTest(SimpleTestCase):
+    """Test cases for the Celery task hooks."""
+
+    def test_task_hooks(self):
+        """Test that tasks are timed by state and their queue wait observed."""
+        name = "apps.profiles.tasks.send_otp_sms"
+        task = SimpleNamespace(
+            name=name,
+            request=SimpleNamespace(
+                published_at=time.time() - 0.3,
+                is_eager=False,
+                delivery_info={"routing_key": "otp"},
+            ),
+        )
+        success = {"task": name, "state": "SUCCESS"}
+        runs = sample("celery_task_duration_seconds_count", **success)
+        waits = sample("celery_queue_wait_seconds_count", queue="otp", task=name)
+        retries = sample("celery_task_retries_total", task=name)
+
+        _task_prerun(task_id="task-id", task=task)
+        _task_postrun(task_id="task-id", task=task, state="SUCCESS")
+        _task_retry(sender=task)
+
+        self.assertEqual(sample("celery_task_duration_seconds_count", **success), runs + 1)
+        self.assertEqual(
+            sample("celery_queue_wait_seconds_count", queue="otp", task=name), waits + 1
+        )
+        self.assertEqual(sample("celery_task_retries_total", task=name), retries + 1)
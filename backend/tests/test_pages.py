@@ -0,0 +1,167 @@
+"""
+Tests for server-rendered pages, fragment caching and static pages.
+"""
+
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.marketplace.models import NewsfeedPost
+from apps.profiles.directory import InvalidCursor, directory_page, professional_profile
+from apps.profiles.models import User
+from config.cache import reset_local_cache
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(DEBUG=False)
+class StaticPageTest(TestCase):
+    """Test cases for whole-page cached static pages."""
+
+    def test_conditional_get(self):
+        """Test that a static page revalidates with its ETag."""
+        response = self.client.get(reverse("profiles:about"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "About TailoRent")
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+        response = self.client.get(reverse("profiles:about"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+    def test_unsafe_methods(self):
+        """Test that static pages only answer GET and HEAD."""
+        self.assertEqual(self.client.post(reverse("profiles:home")).status_code, 405)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FragmentCacheTest(TestCase):
+    """Test cases for the {% cachefragment %} tag."""
+
+    def setUp(self):
+        reset_local_cache()
+        self.professional = User.objects.create_user(
+            email="tailor@example.com", password="pass12345", role="Tailor", first_name="Ada"
+        )
+
+    def render(self):
+        template = Template(
+            '{% load fragments %}{% cachefragment "name" professional %}'
+            "{{ professional.first_name }}{% endcachefragment %}"
+        )
+        return template.render(Context({"professional": self.professional}))
+
+    def test_fragment_follows_model_version(self):
+        """Test that a fragment is reused until its row is saved."""
+        self.assertEqual(self.render(), "Ada")
+        # Without a save signal the cached fragment is still served.
+        User.objects.filter(pk=self.professional.pk).update(first_name="Grace")
+        self.professional.refresh_from_db()
+        self.assertEqual(self.render(), "Ada")
+
+        self.professional.save()
+        reset_local_cache()
+        self.assertEqual(self.render(), "Grace")
+
+    @override_settings(FRAGMENT_CACHE={"ENABLED": False})
+    def test_disabled(self):
+        """Test that fragments render every time when caching is off."""
+        self.assertEqual(self.render(), "Ada")
+        User.objects.filter(pk=self.professional.pk).update(first_name="Grace")
+        self.professional.refresh_from_db()
+        self.assertEqual(self.render(), "Grace")
+
+    def test_dashboard_page(self):
+        """Test that the dashboard renders with cached cards and posts."""
+        customer = User.objects.create_user(
+            email="customer@example.com", password="pass12345", role="Customer"
+        )
+        NewsfeedPost.objects.create(user=self.professional, content="New linen collection")
+        self.client.force_login(customer)
+        for _ in range(2):
+            response = self.client.get(reverse("profiles:dashboard-template"))
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "New linen collection")
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProfessionalDirectoryTest(TestCase):
+    """Test cases for the keyset-paginated professional directory."""
+
+    def setUp(self):
+        reset_local_cache()
+        self.viewer = User.objects.create_user(
+            email="viewer@example.com", password="pass12345", role="Customer"
+        )
+        self.professionals = [
+            User.objects.create_user(
+                email=f"pro{n}@example.com",
+                password="pass12345",
+                role="Tailor" if n % 2 else "Fashion_Designer",
+                first_name=f"Pro{n}",
+                address="Lagos" if n < 3 else "Accra",
+            )
+            for n in range(5)
+        ]
+
+    def test_keyset_pages(self):
+        """Test that pages follow the cursor, newest first, without overlap."""
+        first = directory_page(limit=3)
+        self.assertEqual(len(first.cards), 3)
+        self.assertIn("Pro4", first.cards[0])
+        second = directory_page(cursor=first.next_cursor, limit=3)
+        self.assertEqual(len(second.cards), 2)
+        self.assertIn("Pro0", second.cards[-1])
+        self.assertIsNone(second.next_cursor)
+
+    def test_filters(self):
+        """Test the role and location filters."""
+        self.assertEqual(len(directory_page(role="Tailor").cards), 2)
+        self.assertEqual(len(directory_page(location="accra").cards), 2)
+        self.assertEqual(len(directory_page(role="Tailor", location="Lagos").cards), 1)
+        with self.assertRaises(InvalidCursor):
+            directory_page(cursor="not-a-cursor")
+
+    def test_cards_cached_until_saved(self):
+        """Test that a warm page is one query and a save re-renders its card."""
+        directory_page()
+        with self.assertNumQueries(1):
+            directory_page()
+
+        professional = self.professionals[4]
+        professional.first_name = "Renamed"
+        professional.save()
+        reset_local_cache()
+        with self.assertNumQueries(2):
+            cards = directory_page().cards
+        self.assertIn("Renamed", cards[0])
+
+    def test_list_view(self):
+        """Test the directory page's filters, next link and bad input."""
+        url = reverse("profiles:professionals-template")
+        response = self.client.get(url, {"role": "Tailor", "location": "Lagos"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Pro1")
+        self.assertNotContains(response, "Pro3")
+        self.assertEqual(self.client.get(url, {"role": "Vendor"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "x"}).status_code, 400)
+
+    def test_detail_view(self):
+        """Test that a profile is served from cache until the row changes."""
+        self.client.force_login(self.viewer)
+        professional = self.professionals[0]
+        url = reverse("profiles:professional-detail", args=[professional.pk])
+        self.assertContains(self.client.get(url), "Pro0")
+        self.assertIsNotNone(professional_profile(professional.pk))
+        with self.assertNumQueries(0):
+            professional_profile(professional.pk)
+
+        professional.is_active = False
+        professional.save()
+        reset_local_cache()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("profiles:professional-detail", args=[self.viewer.pk])).status_code,
+            404,
+        )
@@ -2,6 +2,9 @@
 Tests for profiles app.
 """
 
+import json
+from unittest import mock
+
 import pytest
 from django.test import TestCase
 from django.urls import reverse
@@ -94,3 +97,200 @@ class ProfileAPITest(APITestCase):
         user.refresh_from_db()
         self.assertEqual(user.first_name, "Updated")
         self.assertEqual(user.last_name, "Name")
+
+
+class LoadBenchmarkCommandTest(TestCase):
+    """Test cases for the seed_data and benchmark_endpoints commands."""
+
+    def test_seed_and_benchmark(self):
+        """Test seeding data and benchmarking endpoints against a baseline."""
+        import json
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from apps.bookings.models import Booking
+
+        call_command(
+            "seed_data", users=60, bookings=40, products=20, services=10,
+            style_posts=10, newsfeed_posts=10, follows=20, seed=7, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Booking.objects.count(), 40)
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_endpoints", iterations=3, warmup=0, memory_iterations=1,
+                only=["marketplace:product"], output=output.name, stdout=StringIO(),
+            )
+            results = json.load(open(output.name))["endpoints"]
+            self.assertIn("marketplace:product-detail", results)
+            self.assertIn("p99_ms", results["marketplace:product-detail"])
+
+            out = StringIO()
+            call_command(
+                "benchmark_endpoints", iterations=3, warmup=0, memory_iterations=1,
+                only=["marketplace:product-detail"], baseline=output.name, stdout=out,
+            )
+            self.assertNotIn("REGRESSION marketplace:product-detail queries", out.getvalue())
+
+
+class StartupImportTest(TestCase):
+    """Test cases for cold-start import time."""
+
+    # Generous headroom over a typical ~500 ms so only real regressions fail.
+    IMPORT_BUDGET_MS = 1500
+
+    def test_web_worker_import_budget(self):
+        """Test that a web worker starts within budget without SDK imports."""
+        import json
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command(
+            "import_profile", target="web", json=True, stdout=out,
+            forbid=["twilio", "cloudinary"], budget_ms=self.IMPORT_BUDGET_MS,
+        )
+        self.assertLess(json.loads(out.getvalue())["total_ms"], self.IMPORT_BUDGET_MS)
+
+
+class AsyncAuthViewTest(TestCase):
+    """Test cases for the async auth views."""
+
+    def post(self, view, data, content_type="application/json"):
+        from django.test import AsyncRequestFactory
+
+        body = json.dumps(data) if content_type == "application/json" else data
+        request = AsyncRequestFactory().post("/", data=body, content_type=content_type)
+        return view.as_view()(request)
+
+    async def test_otp_login(self):
+        """Test that OTP login creates the user and code and publishes the SMS."""
+        from apps.profiles.models import PhoneVerification
+        from apps.profiles.tasks import send_otp_sms
+        from apps.profiles.views import AsyncOTPLoginView
+
+        with mock.patch.object(send_otp_sms, "apply_async") as publish:
+            response = await self.post(AsyncOTPLoginView, {"phone_number": "+2348012345678"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {"message": "OTP sent successfully", "phone_number": "+2348012345678"},
+        )
+        verification = await PhoneVerification.objects.aget(phone_number="+2348012345678")
+        publish.assert_called_once_with(("+2348012345678", verification.otp_code), {})
+
+    async def test_registration_and_email_verification(self):
+        """Test registering through the async view and verifying the email."""
+        from apps.profiles.models import EmailVerification
+        from apps.profiles.views import AsyncEmailVerificationView, AsyncRegistrationView
+
+        data = {
+            "email": "async@example.com",
+            "password": "Tailor-pass-2024",
+            "password_confirm": "Tailor-pass-2024",
+            "role": "Customer",
+        }
+        response = await self.post(AsyncRegistrationView, data)
+        self.assertEqual(response.status_code, 201)
+        user = await User.objects.aget(email="async@example.com")
+        self.assertTrue(user.check_password("Tailor-pass-2024"))
+        self.assertEqual(await user.notifications.acount(), 2)
+
+        duplicate = await self.post(AsyncRegistrationView, data)
+        self.assertEqual(duplicate.status_code, 400)
+        self.assertIn("email", json.loads(duplicate.content))
+
+        verification = await EmailVerification.objects.aget(user=user)
+        response = await self.post(
+            AsyncEmailVerificationView, {"token": str(verification.token)}
+        )
+        self.assertEqual(response.status_code, 200)
+        await user.arefresh_from_db()
+        self.assertTrue(user.is_verified)
+
+    async def test_invalid_bodies(self):
+        """Test that malformed JSON and invalid fields are rejected with 400."""
+        from apps.profiles.views import AsyncOTPLoginView
+
+        from django.test import AsyncRequestFactory
+
+        request = AsyncRequestFactory().post(
+            "/", data="{not json", content_type="application/json"
+        )
+        response = await AsyncOTPLoginView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", json.loads(response.content))
+
+        response = await self.post(
+            AsyncOTPLoginView,
+            "phone_number=08012345678",
+            content_type="application/x-www-form-urlencoded",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("phone_number", json.loads(response.content))
+
+
+class NotificationOutboxTest(TestCase):
+    """Test cases for the notification outbox and its dispatcher."""
+
+    def register(self, email):
+        serializer = RegistrationSerializer(
+            data={
+                "email": email,
+                "password": "Tailor-pass-2024",
+                "password_confirm": "Tailor-pass-2024",
+                "role": "Customer",
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_signup_dispatch_is_batched(self):
+        """Test that signups publish one task and each user gets one email."""
+        from django.core import mail
+        from django.core.cache import cache
+        from apps.profiles.notifications import dispatch
+        from apps.profiles.tasks import dispatch_notifications
+
+        cache.clear()
+        with mock.patch.object(dispatch_notifications, "apply_async") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                users = [self.register(f"user{n}@example.com") for n in range(5)]
+        publish.assert_called_once()
+
+        # One query loads the batch and one marks it sent, however many users.
+        with self.assertNumQueries(4):  # plus SAVEPOINT/RELEASE
+            self.assertEqual(dispatch(batch_size=50), 10)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, [users[0].email])
+        self.assertIn("verify-email", mail.outbox[0].body)
+        self.assertIn("successfully created", mail.outbox[0].body)
+        self.assertEqual(dispatch(), 0)
+
+    def test_booking_confirmation_and_failures(self):
+        """Test booking confirmations and that undeliverable rows are retried."""
+        from django.core import mail
+        from django.utils import timezone
+        from apps.bookings.models import Booking
+        from apps.profiles.models import Notification
+        from apps.profiles.notifications import dispatch, notify
+
+        customer = User.objects.create_user(email="c@example.com", password="x", role="Customer")
+        tailor = User.objects.create_user(
+            email="t@example.com", password="x", role="Tailor", first_name="Ada"
+        )
+        booking = Booking.objects.create(
+            customer=customer, professional=tailor, service_type="Agbada", date=timezone.now()
+        )
+        notify(customer.id, Notification.BOOKING_CONFIRMED, booking=booking)
+        phone_only = User.objects.create_user(
+            phone_number="+2348000000000", password="x", role="Customer"
+        )
+        notify(phone_only.id, Notification.WELCOME)
+
+        self.assertEqual(dispatch(), 1)
+        self.assertIn("Professional: Ada", mail.outbox[0].body)
+        failed = Notification.objects.get(recipient=phone_only)
+        self.assertIsNone(failed.sent_at)
+        self.assertEqual(failed.attempts, 1)
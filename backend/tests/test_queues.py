@@ -0,0 +1,116 @@
+"""
+Tests for Celery queue routing and queue latency instrumentation.
+"""
+
+import time
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from apps.bookings.tasks import send_booking_reminders
+from apps.profiles.tasks import dispatch_notifications, send_otp_sms
+from config.celery import app
+from config.queue_latency import (
+    _task_prerun,
+    _task_revoked,
+    latency_summary,
+    record_wait,
+    stamp_publish_time,
+)
+
+
+class QueueRoutingTest(SimpleTestCase):
+    """Test cases for task routing and deadlines."""
+
+    def route(self, name):
+        return app.amqp.router.route({}, name)["queue"].name
+
+    def test_tasks_are_routed_by_priority_class(self):
+        """Test that each task class lands on its own queue."""
+        self.assertEqual(self.route("apps.profiles.tasks.send_otp_sms"), "otp")
+        self.assertEqual(self.route("apps.profiles.tasks.dispatch_notifications"), "transactional")
+        self.assertEqual(self.route("apps.profiles.tasks.send_bulk_sms"), "bulk")
+        self.assertEqual(self.route("apps.bookings.tasks.send_booking_reminders"), "bulk")
+        self.assertEqual(
+            self.route("apps.bookings.tasks.build_professional_recommendations"), "celery"
+        )
+
+    def test_time_sensitive_tasks_expire(self):
+        """Test that OTP, notification and reminder tasks carry a deadline."""
+        self.assertEqual(send_otp_sms.expires, 10 * 60)
+        self.assertEqual(dispatch_notifications.expires, 5 * 60)
+        self.assertEqual(send_booking_reminders.expires, 60 * 60)
+
+    def test_publish_is_stamped(self):
+        """Test that published messages carry their publish time."""
+        headers = {}
+        stamp_publish_time(headers=headers)
+        self.assertAlmostEqual(headers["published_at"], time.time(), delta=1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CELERY_QUEUE_LATENCY={"SLO": {"otp": 5}},
+)
+class QueueLatencyTest(SimpleTestCase):
+    """Test cases for the queue wait histograms."""
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, queue, published_at=None, is_eager=False):
+        return SimpleNamespace(
+            published_at=published_at,
+            is_eager=is_eager,
+            delivery_info={"routing_key": queue},
+            task_name="apps.profiles.tasks.send_otp_sms",
+            id="task-id",
+        )
+
+    def test_percentiles(self):
+        """Test that waits are summarized as bucket upper bounds."""
+        for _ in range(98):
+            record_wait("otp", 0.05)
+        record_wait("otp", 1.5)
+        with self.assertLogs("tailorent.celery", "WARNING"):
+            record_wait("otp", 45)
+
+        summary = latency_summary(["otp", "bulk"])
+        self.assertEqual(summary["otp"]["started"], 100)
+        self.assertEqual(summary["otp"]["p50"], 0.1)
+        self.assertEqual(summary["otp"]["p99"], 2)
+        self.assertEqual(summary["bulk"]["started"], 0)
+        self.assertIsNone(summary["bulk"]["p99"])
+
+    def test_worker_hooks(self):
+        """Test that started tasks are timed and expired ones counted."""
+        task = SimpleNamespace(name="send_otp_sms")
+        task.request = self.request("otp", published_at=time.time() - 0.3)
+        _task_prerun(task=task)
+        # Eager tasks never went through a queue.
+        task.request = self.request("otp", published_at=time.time(), is_eager=True)
+        _task_prerun(task=task)
+        _task_revoked(request=self.request("otp"), expired=True)
+        _task_revoked(request=self.request("otp"), expired=False)
+
+        summary = latency_summary(["otp"])["otp"]
+        self.assertEqual(summary["started"], 1)
+        self.assertEqual(summary["p50"], 0.5)
+        self.assertEqual(summary["expired"], 1)
+
+    def test_check_command(self):
+        """Test that --check fails when a queue's p99 misses its SLO."""
+        record_wait("otp", 0.2)
+        out = StringIO()
+        call_command("queue_latency", "--queue", "otp", "--check", stdout=out)
+        self.assertIn("<=0.25", out.getvalue())
+
+        with mock.patch("config.queue_latency.logger"):
+            record_wait("otp", 20)
+        with self.assertRaises(CommandError):
+            call_command("queue_latency", "--queue", "otp", "--check", stdout=StringIO())
@@ -0,0 +1,104 @@
+"""
+Tests for JSON rendering, parsing and response compression.
+"""
+
+import gzip
+import io
+import json
+import unittest
+from unittest import mock
+import uuid
+from decimal import Decimal
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from apps.bookings.models import Booking
+from apps.profiles.models import User
+from config import middleware
+from config.middleware import CompressionMiddleware, accepted_encodings
+from config.parsers import ORJSONParser
+from config.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """Test cases for ORJSONRenderer and ORJSONParser."""
+
+    def test_matches_drf_output(self):
+        """Test that Decimal, datetime and UUID values render like DRF's renderer."""
+        data = [{"id": uuid.uuid4(), "price": Decimal("12.50"), "at": timezone.now(), "n": None}]
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data))
+        )
+
+    def test_line_separators_are_escaped(self):
+        """Test that output stays a valid JavaScript literal."""
+        self.assertEqual(ORJSONRenderer().render({"caption": "a b"}), b'{"caption":"a\\u2028b"}')
+
+    def test_parser(self):
+        """Test parsing valid and invalid bodies."""
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')), {"a": [1, 2]})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b"{not json"))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTest(SimpleTestCase):
+    """Test cases for CompressionMiddleware."""
+
+    body = b'{"name": "Ankara print"}' * 50
+
+    def get(self, accept_encoding, body=None, **headers):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding, **headers)
+        response = CompressionMiddleware(lambda request: HttpResponse(body or self.body))(request)
+        return response
+
+    def test_accept_encoding_qualities(self):
+        """Test Accept-Encoding parsing with q-values."""
+        self.assertEqual(accepted_encodings("gzip, br;q=0.5"), {"gzip": 1.0, "br": 0.5})
+
+    def test_small_bodies_are_not_compressed(self):
+        """Test that bodies under COMPRESSION_MIN_SIZE are left alone."""
+        self.assertFalse(self.get("gzip", body=b"{}").has_header("Content-Encoding"))
+
+    def test_gzip_without_brotli(self):
+        """Test that gzip is used when Brotli isn't available or preferred."""
+        with mock.patch.object(middleware, "brotli", None):
+            response = self.get("br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    @unittest.skipIf(middleware.brotli is None, "brotli is not installed")
+    def test_brotli_preferred(self):
+        """Test that Brotli is chosen when the client accepts it."""
+        response = self.get("gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(middleware.brotli.decompress(response.content), self.body)
+
+    @unittest.skipIf(middleware.brotli is None, "brotli is not installed")
+    def test_secrets_use_gzip(self):
+        """Test that credentialed requests get gzip, which is padded against BREACH."""
+        response = self.get("gzip, br", HTTP_AUTHORIZATION="Bearer token")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+class BookingExportTest(APITestCase):
+    """Test cases for the streaming booking export."""
+
+    def test_export_streams_all_bookings(self):
+        """Test that the export is one JSON array of every booking."""
+        customer = User.objects.create_user(email="c@example.com", password="pass12345", role="Customer")
+        tailor = User.objects.create_user(email="t@example.com", password="pass12345", role="Tailor")
+        for _ in range(3):
+            Booking.objects.create(
+                customer=customer, professional=tailor, service_type="Suit", date=timezone.now()
+            )
+        self.client.force_authenticate(user=tailor)
+        response = self.client.get(reverse("booking-export"))
+        self.assertTrue(response.streaming)
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row["professional"] for row in rows], [tailor.id] * 3)
@@ -0,0 +1,110 @@
+"""
+Tests for the slow-query log.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.profiles.models import User
+from config.slow_queries import (
+    SlowQueryRecorder,
+    query_log,
+    reset_query_log,
+    top_offenders,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, SLOW_QUERY_LOG={"THRESHOLD_MS": 0, "BUFFER_SIZE": 5})
+class SlowQueryLogTest(TestCase):
+    """Test cases for per-fingerprint aggregation and slow statement capture."""
+
+    def setUp(self):
+        reset_query_log()
+        self.addCleanup(reset_query_log)
+
+    def run_queries(self, label, count):
+        with SlowQueryRecorder([label]).installed():
+            for n in range(count):
+                User.objects.filter(email=f"user{n}@example.com").exists()
+
+    def test_aggregates_by_fingerprint_and_context(self):
+        """Test that one shape run N times is one row per context."""
+        self.run_queries("view-a", 3)
+        self.run_queries("view-b", 1)
+        shapes, _ = top_offenders(order_by="count")
+        counts = {
+            row["context"]: row["count"] for row in shapes if "profiles_user" in row["fingerprint"]
+        }
+        self.assertEqual(counts, {"view-a": 3, "view-b": 1})
+        self.assertEqual(top_offenders(context="view-b")[0][0]["context"], "view-b")
+
+    def test_slow_statements_explained_once(self):
+        """Test that slow statements are buffered, with one EXPLAIN per shape."""
+        self.run_queries("view-a", 3)
+        entries = list(query_log().slow)
+        self.assertEqual(len(entries), 3)
+        self.assertIsNotNone(entries[0].plan)
+        self.assertIsNone(entries[1].plan)
+        self.assertNotIn("user0@example.com", repr(entries))
+
+        # The merged report keeps one statement per shape, with its plan.
+        _, slow = top_offenders()
+        [entry] = [entry for entry in slow if "profiles_user" in entry["fingerprint"]]
+        self.assertIsNotNone(entry["plan"])
+
+    def test_ring_buffer_bounded(self):
+        """Test that the ring buffer keeps only the newest BUFFER_SIZE statements."""
+        self.run_queries("view-a", 8)
+        self.assertEqual(len(query_log().slow), 5)
+
+    @override_settings(SLOW_QUERY_LOG={"MAX_FINGERPRINTS": 1, "THRESHOLD_MS": 10_000})
+    def test_fingerprints_bounded(self):
+        """Test that shapes past MAX_FINGERPRINTS are counted as dropped."""
+        reset_query_log()
+        with SlowQueryRecorder(["view-a"]).installed():
+            User.objects.count()
+            User.objects.filter(email="a@example.com").exists()
+        self.assertEqual(len(query_log().aggregates), 1)
+        self.assertEqual(query_log().dropped, 1)
+        self.assertEqual(len(query_log().slow), 0)
+
+    def test_explain_in_transaction(self):
+        """Test that capturing a plan leaves the surrounding transaction usable."""
+        with SlowQueryRecorder(["view-a"]).installed():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            self.assertTrue(User.objects.create_user(email="x@example.com", password="pass12345", role="Customer"))
+
+    def test_middleware_and_endpoint(self):
+        """Test that requests are labelled by view and the report is staff only."""
+        self.client.get(reverse("profiles:professionals-template"))
+        shapes, _ = top_offenders(context="profiles:professionals-template")
+        self.assertTrue(shapes)
+
+        url = reverse("slow-queries")
+        user = User.objects.create_user(
+            email="user@example.com", password="pass12345", role="Customer"
+        )
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(url, {"order_by": "max_ms", "limit": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.json()["shapes"]), 5)
+        self.assertEqual(self.client.get(url, {"order_by": "x"}).status_code, 400)
+
+    def test_command(self):
+        """Test the slow_queries command's report."""
+        self.run_queries("view-a", 2)
+        out = StringIO()
+        call_command("slow_queries", "--context", "view-a", "--plans", stdout=out)
+        self.assertIn("view-a", out.getvalue())
+        self.assertIn("Slowest statements", out.getvalue())
@@ -0,0 +1,125 @@
+"""
+Tests for the SMS gateway.
+"""
+
+import socket
+
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.profiles.sms import (
+    HTTPStubProvider,
+    SMSGateway,
+    StubSMSServer,
+    get_gateway,
+    reset_gateway,
+)
+from apps.bookings.models import Booking
+from apps.bookings.tasks import send_booking_reminders
+from apps.profiles.models import User
+from apps.profiles.tasks import send_bulk_sms, send_otp_sms
+
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+
+class SMSGatewayTest(SimpleTestCase):
+    """Test cases for SMSGateway."""
+
+    def setUp(self):
+        self.server = StubSMSServer().start()
+        self.addCleanup(self.server.stop)
+
+    def gateway(self, *providers, **options):
+        gateway = SMSGateway(list(providers), backoff=0.01, **options)
+        self.addCleanup(gateway.close)
+        return gateway
+
+    def test_send_many(self):
+        """Test that a batch is delivered concurrently with results in order."""
+        messages = [(f"+15550000{n:03d}", f"Reminder {n}") for n in range(50)]
+        results = self.gateway(HTTPStubProvider(url=self.server.url), concurrency=10).send_many(
+            messages
+        )
+        self.assertTrue(all(result.sent for result in results))
+        self.assertEqual([result.to for result in results], [to for to, _ in messages])
+        self.assertEqual(len(self.server.messages), 50)
+
+    def test_rate_limited_sends_are_retried(self):
+        """Test that 429 responses are retried after backing off."""
+        limited = StubSMSServer(rate_limit=20).start()
+        self.addCleanup(limited.stop)
+        gateway = self.gateway(HTTPStubProvider(url=limited.url), concurrency=10, max_attempts=10)
+        results = gateway.send_many([(f"+1555{n:07d}", "hi") for n in range(30)])
+        self.assertTrue(all(result.sent for result in results))
+        self.assertEqual(len(limited.messages), 30)
+
+    def test_failover_to_next_provider(self):
+        """Test that an unreachable provider falls back to the next one."""
+        gateway = self.gateway(
+            HTTPStubProvider(name="down", url=unused_url()),
+            HTTPStubProvider(name="stub", url=self.server.url),
+            max_attempts=2,
+            timeout=1,
+        )
+        result = gateway.send("+15550000001", "hi")
+        self.assertTrue(result.sent)
+        self.assertEqual(result.provider, "stub")
+
+    def test_refused_credentials_fail_over(self):
+        """Test that a 401 moves on to the next provider without retrying."""
+        refusing = StubSMSServer(status=401).start()
+        self.addCleanup(refusing.stop)
+        gateway = self.gateway(
+            HTTPStubProvider(name="refusing", url=refusing.url),
+            HTTPStubProvider(name="stub", url=self.server.url),
+        )
+        result = gateway.send("+15550000001", "hi")
+        self.assertTrue(result.sent)
+        self.assertEqual(result.provider, "stub")
+        self.assertEqual(refusing.requests, 1)
+
+    def test_tasks_use_configured_providers(self):
+        """Test the OTP and bulk tasks against the stub provider from settings."""
+        providers = [{"BACKEND": "apps.profiles.sms.HTTPStubProvider", "URL": self.server.url}]
+        with override_settings(SMS={"PROVIDERS": providers}):
+            reset_gateway()
+            self.addCleanup(reset_gateway)
+            self.assertIs(get_gateway(), get_gateway())
+            send_otp_sms.run("+15550000001", "123456")
+            counts = send_bulk_sms.run([["+15550000002", "a"], ["+15550000003", "b"]])
+        self.assertEqual(counts, {"sent": 2, "failed": 0})
+        self.assertIn("123456", self.server.messages[0]["body"])
+        self.assertEqual(len(self.server.messages), 3)
+
+
+class BookingReminderTest(TestCase):
+    """Test cases for the hourly booking reminder task."""
+
+    def test_reminds_accepted_bookings_a_day_ahead(self):
+        """Test that only accepted bookings in the 24-25 hour window are reminded."""
+        server = StubSMSServer().start()
+        self.addCleanup(server.stop)
+        customer = User.objects.create_user(
+            phone_number="+1555000001", password="x", role="Customer"
+        )
+        tailor = User.objects.create_user(email="t@example.com", password="x", role="Tailor")
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for status, hours in [("accepted", 24.5), ("pending", 24.5), ("accepted", 30)]:
+            Booking.objects.create(
+                customer=customer, professional=tailor, service_type="Kaftan",
+                date=hour + timedelta(hours=hours), status=status,
+            )
+
+        providers = [{"BACKEND": "apps.profiles.sms.HTTPStubProvider", "URL": server.url}]
+        with override_settings(SMS={"PROVIDERS": providers}):
+            reset_gateway()
+            self.addCleanup(reset_gateway)
+            self.assertEqual(send_booking_reminders.run(), 1)
+        self.assertEqual(server.messages[0]["to"], "+1555000001")
+        self.assertIn("Kaftan", server.messages[0]["body"])